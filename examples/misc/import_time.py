@@ -0,0 +1,39 @@
+"""
+Benchmark of the import time of the swmm_api modules.
+
+Every module is imported in a new interpreter (like in a worker process or a command line call)
+and the heavy dependencies which are loaded by the import are listed.
+"""
+import subprocess
+import sys
+
+MODULES = ['swmm_api', 'swmm_api.run', 'swmm_api.output_file', 'swmm_api.report_file', 'swmm_api.input_file',
+           'swmm_api.input_file.macros']
+HEAVY = ['numpy', 'pandas', 'matplotlib', 'networkx', 'shapely', 'geopandas', 'tqdm']
+REPEAT = 5
+
+_SCRIPT = """
+import sys, time
+t0 = time.perf_counter()
+import {module}
+print(time.perf_counter() - t0)
+print(','.join(m for m in {heavy!r} if m in sys.modules))
+"""
+
+
+def measure(module):
+    times = []
+    for _ in range(REPEAT):
+        output = subprocess.run([sys.executable, '-c', _SCRIPT.format(module=module, heavy=HEAVY)],
+                                capture_output=True, text=True, check=True).stdout.split('\n')
+        times.append(float(output[0]))
+    return min(times), output[1]
+
+
+if __name__ == '__main__':
+    print(f'{"module":<30} {"time [ms]":>10}  heavy modules loaded')
+    for module in MODULES:
+        duration, loaded = measure(module)
+        print(f'{module:<30} {duration * 1000:>10.1f}  {loaded or "-"}')
+
+    print('\nDetails per module: python -X importtime -c "import swmm_api.run"')
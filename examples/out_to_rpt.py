@@ -17,7 +17,7 @@ def out_to_rpt(inp: SwmmInput, out: SwmmOutput, rpt: SwmmReport):
     # report ist unabhängig von report time - beeinflusst nur out file länge
     rpt.outfall_loading_summary['Total_Volume_10^6 ltr']
     # ungleich
-    out.get_part(OBJECTS.NODE, ['ARA', 'Mischwasserueberlauf', 'O09', 'O10'], VARIABLES.NODE.TOTAL_INFLOW).sum() * 5 / 1000000
+    out.integrate(OBJECTS.NODE, VARIABLES.NODE.TOTAL_INFLOW, ['ARA', 'Mischwasserueberlauf', 'O09', 'O10'])
     # --------------
 
     # --------------
@@ -27,7 +27,7 @@ def out_to_rpt(inp: SwmmInput, out: SwmmOutput, rpt: SwmmReport):
 
     # --------------
     rpt.subcatchment_runoff_summary['Total_Runoff_10^6 ltr']
-    out.get_part(OBJECTS.NODE, ['ARA', 'Mischwasserueberlauf', 'O09', 'O10'], VARIABLES.NODE.TOTAL_INFLOW).sum() * 5 / 1000000
+    out.integrate(OBJECTS.NODE, VARIABLES.NODE.TOTAL_INFLOW, ['ARA', 'Mischwasserueberlauf', 'O09', 'O10'])
     # --------------
 
     # --------------
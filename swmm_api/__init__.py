@@ -1,6 +1,19 @@
 __version__ = '0.3a10'
-from .input_file import read_inp_file, SwmmInput
-from .report_file import read_rpt_file, SwmmReport
-from .output_file import read_out_file, SwmmOutput, out2frame
-from .run import swmm5_run
-from .hotstart import SwmmHotstart
+
+from ._lazy import lazy_attributes
+
+# the objects are imported on first use
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    'read_inp_file': '.input_file',
+    'SwmmInput': '.input_file',
+    'read_rpt_file': '.report_file',
+    'SwmmReport': '.report_file',
+    'read_out_file': '.output_file',
+    'SwmmOutput': '.output_file',
+    'out2frame': '.output_file',
+    'swmm5_run': '.run',
+    'SwmmHotstart': '.hotstart',
+}, submodules=['input_file', 'report_file', 'output_file', 'run', 'hotstart'])
+
+__all__ = ['read_inp_file', 'SwmmInput', 'read_rpt_file', 'SwmmReport', 'read_out_file', 'SwmmOutput', 'out2frame',
+           'swmm5_run', 'SwmmHotstart']
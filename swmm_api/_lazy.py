@@ -0,0 +1,34 @@
+from importlib import import_module
+
+
+def lazy_attributes(package, objects, submodules=()):
+    """
+    Create the module functions ``__getattr__`` and ``__dir__`` (PEP 562) to import objects of a package on first use.
+
+    This keeps the import of the package fast, as heavy dependencies (i.e. pandas) are only imported when needed.
+
+    Args:
+        package (str): name of the package (``__name__``)
+        objects (dict[str, str]): relative module name per object name, i.e. ``{'SwmmOutput': '.out'}``
+        submodules (list[str]): names of submodules which are available as attributes of the package
+
+    Returns:
+        tuple[function, function]: ``__getattr__`` and ``__dir__`` of the package
+    """
+    namespace = vars(import_module(package))
+
+    def __getattr__(name):
+        if name in objects:
+            value = getattr(import_module(objects[name], package), name)
+        elif name in submodules:
+            value = import_module(f'.{name}', package)
+        else:
+            raise AttributeError(f'module {package!r} has no attribute {name!r}')
+        # only imported once
+        namespace[name] = value
+        return value
+
+    def __dir__():
+        return sorted(set(namespace) | set(objects) | set(submodules))
+
+    return __getattr__, __dir__
@@ -0,0 +1,233 @@
+import numpy as np
+from pandas import DataFrame, Series
+
+from .scenarios import run_scenarios
+
+
+def nse(simulated, observed):
+    """
+    Nash-Sutcliffe efficiency.
+
+    Args:
+        simulated (pandas.Series | numpy.ndarray): simulated values
+        observed (pandas.Series | numpy.ndarray): observed values
+
+    Returns:
+        float: efficiency between -inf and 1 (perfect fit)
+    """
+    simulated, observed = np.asarray(simulated, dtype=float), np.asarray(observed, dtype=float)
+    return 1 - np.sum((simulated - observed) ** 2) / np.sum((observed - observed.mean()) ** 2)
+
+
+def kge(simulated, observed):
+    """
+    Kling-Gupta efficiency (Gupta et al., 2009).
+
+    Args:
+        simulated (pandas.Series | numpy.ndarray): simulated values
+        observed (pandas.Series | numpy.ndarray): observed values
+
+    Returns:
+        float: efficiency between -inf and 1 (perfect fit)
+    """
+    simulated, observed = np.asarray(simulated, dtype=float), np.asarray(observed, dtype=float)
+    r = np.corrcoef(simulated, observed)[0, 1]
+    alpha = simulated.std() / observed.std()
+    beta = simulated.mean() / observed.mean()
+    return 1 - np.sqrt((r - 1) ** 2 + (alpha - 1) ** 2 + (beta - 1) ** 2)
+
+
+def rmse(simulated, observed):
+    """
+    Root-mean-square error.
+
+    Args:
+        simulated (pandas.Series | numpy.ndarray): simulated values
+        observed (pandas.Series | numpy.ndarray): observed values
+
+    Returns:
+        float: error between 0 (perfect fit) and inf
+    """
+    simulated, observed = np.asarray(simulated, dtype=float), np.asarray(observed, dtype=float)
+    return np.sqrt(np.mean((simulated - observed) ** 2))
+
+
+class METRICS:
+    """
+    All goodness-of-fit metrics for the calibration.
+
+    Attributes:
+        NSE (str): Nash-Sutcliffe efficiency (see :func:`nse`)
+        KGE (str): Kling-Gupta efficiency (see :func:`kge`)
+        RMSE (str): root-mean-square error (see :func:`rmse`)
+    """
+    NSE = 'nse'
+    KGE = 'kge'
+    RMSE = 'rmse'
+
+
+# metric function and if the metric is an efficiency (1 is a perfect fit) or an error (0 is a perfect fit)
+_METRICS = {
+    METRICS.NSE: (nse, True),
+    METRICS.KGE: (kge, True),
+    METRICS.RMSE: (rmse, False),
+}
+
+
+class _GoodnessOfFit:
+    """
+    Compare simulated and observed series in a worker process of :func:`swmm_api.scenarios.run_scenarios`.
+
+    Only the timestamps of the observed series which are also in the out-file are used.
+    """
+
+    def __init__(self, observed, metric):
+        self.observed = observed
+        self.metric = metric
+
+    def __call__(self, out):
+        function, _ = _METRICS[self.metric]
+        result = {}
+        for (kind, label, variable), observed in self.observed.items():
+            simulated, observed = out.get_part(kind, label, variable).align(observed.dropna(), join='inner')
+            result[f'{self.metric}_{kind}_{label}_{variable}'] = function(simulated, observed)
+        return result
+
+
+class DifferentialEvolution:
+    """
+    Differential evolution optimizer (rand/1/bin, Storn and Price, 1997) with an ask-and-tell interface.
+
+    Every call of :meth:`ask` returns a whole generation, which can be evaluated in parallel.
+
+    Any other optimizer with the same interface (i.e. ``cma.CMAEvolutionStrategy``) can be used in :func:`calibrate`.
+    """
+
+    def __init__(self, bounds, population_size=None, mutation=0.8, crossover=0.9, seed=None):
+        """
+        Create the optimizer.
+
+        Args:
+            bounds (list[tuple[float, float]]): ``(low, high)`` per parameter
+            population_size (int): number of candidates per generation. Default: 10 times the number of parameters.
+            mutation (float): differential weight
+            crossover (float): crossover probability
+            seed (int): seed of the random number generator
+        """
+        self.low, self.high = np.array(bounds, dtype=float).T
+        self.population_size = 10 * len(bounds) if population_size is None else population_size
+        self.mutation = mutation
+        self.crossover = crossover
+        self._rng = np.random.default_rng(seed)
+        self.population = self.low + self._rng.random((self.population_size, len(bounds))) * (self.high - self.low)
+        self.fitness = None
+
+    def ask(self):
+        """
+        Get the candidates of the next generation.
+
+        Returns:
+            numpy.ndarray: candidates (population size x parameters)
+        """
+        if self.fitness is None:
+            return self.population.copy()
+
+        n, k = self.population.shape
+        # three different random candidates per candidate
+        picks = np.array([self._rng.choice(np.delete(np.arange(n), i), 3, replace=False) for i in range(n)])
+        a, b, c = (self.population[picks[:, j]] for j in range(3))
+        mutant = np.clip(a + self.mutation * (b - c), self.low, self.high)
+
+        cross = self._rng.random((n, k)) < self.crossover
+        cross[np.arange(n), self._rng.integers(0, k, n)] = True
+        return np.where(cross, mutant, self.population)
+
+    def tell(self, candidates, fitness):
+        """
+        Update the population with the evaluated candidates (lower fitness is better).
+
+        Args:
+            candidates (numpy.ndarray): candidates of :meth:`ask`
+            fitness (list[float]): fitness per candidate
+        """
+        candidates, fitness = np.asarray(candidates, dtype=float), np.asarray(fitness, dtype=float)
+        if self.fitness is None:
+            self.population, self.fitness = candidates, fitness
+            return
+        better = fitness <= self.fitness
+        self.population[better] = candidates[better]
+        self.fitness[better] = fitness[better]
+
+
+def calibrate(inp, factors, bounds, observed, metric=METRICS.NSE, optimizer=None, generations=20, cache=None,
+              decimals=8, seed=None, **kwargs):
+    """
+    Calibrate the parameters of a model to observed data.
+
+    Every generation of candidates of the optimizer runs as a parallel batch
+    (see :func:`swmm_api.scenarios.run_scenarios`) and the simulated series are compared to the observed series
+    in the worker processes. Candidates which were evaluated before are not simulated again.
+
+    The optimizer minimizes the mean of the metrics over all observed series (``1 - metric`` for efficiencies).
+
+    Args:
+        inp (SwmmInput): base model
+        factors (dict[str, tuple[str, str | list[str] | None, str]]): per parameter name the ``(section, label, attribute)``
+            (see :func:`swmm_api.scenarios.set_parameter`)
+        bounds (dict[str, tuple[float, float]]): ``(low, high)`` per parameter name
+        observed (dict[tuple[str, str, str], pandas.Series]): observed series per ``(kind, label, variable)``
+            of the out-file with the timestamps as index
+        metric (str): goodness-of-fit metric (see :class:`METRICS`)
+        optimizer (object): optimizer with the methods ``ask()`` (returns the candidates of a generation)
+            and ``tell(candidates, fitness)``. Candidates outside the bounds are clipped.
+            Default: :class:`DifferentialEvolution`.
+        generations (int): number of generations
+        cache (dict): fitness per evaluated candidate, to continue a previous calibration. Will be updated.
+        decimals (int): number of decimals of the parameters to identify candidates in the cache
+        seed (int): seed of the random number generator of the default optimizer
+        **kwargs: keyword arguments for :func:`swmm_api.scenarios.run_scenarios` (i.e. ``processes``)
+
+    Returns:
+        tuple[pandas.Series, pandas.DataFrame]: best parameters and a table of all evaluations
+    """
+    if metric not in _METRICS:
+        raise NotImplementedError(f'Metric "{metric}" not implemented. Use one of {list(_METRICS)}.')
+    _, is_efficiency = _METRICS[metric]
+
+    names = list(bounds)
+    low, high = np.array(list(bounds.values()), dtype=float).T
+    if optimizer is None:
+        optimizer = DifferentialEvolution(list(bounds.values()), seed=seed)
+    if cache is None:
+        cache = {}
+
+    kwargs.setdefault('show_progress', False)
+    goodness_of_fit = _GoodnessOfFit(observed, metric)
+
+    history = []
+    for generation in range(generations):
+        asked = optimizer.ask()
+        candidates = np.clip(np.asarray(asked, dtype=float), low, high)
+        keys = [tuple(np.round(c, decimals)) for c in candidates]
+
+        new = list(dict.fromkeys(key for key in keys if key not in cache))
+        if new:
+            variants = DataFrame(new, columns=names)
+            results = run_scenarios(inp, factors, variants, extract=goodness_of_fit, **kwargs)
+            metrics = results.drop(columns=names + ['errors'])
+            values = metrics.values.astype(float)
+            fitness = np.nanmean(1 - values if is_efficiency else values, axis=1)
+            # failed simulations
+            fitness[np.isnan(fitness)] = np.inf
+            for key, f, (_, row) in zip(new, fitness, metrics.iterrows()):
+                cache[key] = f
+                history.append({'generation': generation, **dict(zip(names, key)), **row.to_dict(), 'fitness': f})
+
+        optimizer.tell(asked, [cache[key] for key in keys])
+
+        if hasattr(optimizer, 'stop') and optimizer.stop():
+            break
+
+    history = DataFrame(history)
+    best = history.loc[history['fitness'].idxmin()] if not history.empty else Series(dtype=float)
+    return best, history
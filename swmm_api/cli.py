@@ -0,0 +1,310 @@
+import argparse
+import csv
+import glob
+import io
+import json
+import os
+import sys
+import time
+import traceback
+from contextlib import redirect_stdout
+from multiprocessing import Pool
+
+# default statistics of the out-stats command
+_DEFAULT_STATISTICS = {
+    'runoff_volume': ('system', '', 'runoff', 'volume'),
+    'flooding_volume': ('system', '', 'flooding', 'volume'),
+    'outflow_volume': ('system', '', 'outflow', 'volume'),
+    'peak_outflow': ('system', '', 'outflow', 'max'),
+}
+
+
+def expand_globs(patterns):
+    """
+    Get the files matching the patterns.
+
+    Args:
+        patterns (list[str]): paths or glob patterns (``**`` matches any number of directories)
+
+    Returns:
+        list[str]: sorted paths of the matching files (without duplicates)
+    """
+    filenames = set()
+    for pattern in patterns:
+        matches = glob.glob(pattern, recursive=True)
+        if not matches:
+            print(f'No files match "{pattern}".', file=sys.stderr)
+        filenames.update(fn for fn in matches if os.path.isfile(fn))
+    return sorted(filenames)
+
+
+def _get_output_filename(filename, output_dir, extension):
+    """
+    Get the path of the converted file.
+
+    Args:
+        filename (str): path to the input file
+        output_dir (str | None): directory of the converted file. Default: directory of the input file.
+        extension (str): file extension of the converted file (i.e. ``'.parquet'``)
+
+    Returns:
+        str: path of the converted file
+    """
+    base = os.path.splitext(os.path.basename(filename))[0] + extension
+    if output_dir is None:
+        return os.path.join(os.path.dirname(filename), base)
+    os.makedirs(output_dir, exist_ok=True)
+    return os.path.join(output_dir, base)
+
+
+def _out_to_parquet(filename, output_dir=None, compression='brotli'):
+    from .output_file import SwmmOutput, parquet
+
+    fn_parquet = _get_output_filename(filename, output_dir, '.parquet')
+    with SwmmOutput(filename) as out:
+        parquet.write(out.to_frame(), fn_parquet, compression=compression)
+    return fn_parquet
+
+
+def _inp_to_gpkg(filename, output_dir=None, crs='EPSG:32633'):
+    from .input_file.macros.gis import convert_inp_to_geo_package
+
+    fn_gpkg = _get_output_filename(filename, output_dir, '.gpkg')
+    convert_inp_to_geo_package(filename, fn_gpkg, crs=crs)
+    return fn_gpkg
+
+
+def _rpt_to_json(filename, output_dir=None):
+    from pandas import DataFrame
+    from .report_file import SwmmReport
+
+    rpt = SwmmReport(filename)
+    data = {'errors': rpt.get_errors(), 'warnings': rpt.get_warnings()}
+    for name in dir(type(rpt)):
+        if (name in ('available_parts', 'unit')) or not isinstance(getattr(type(rpt), name), property):
+            continue
+        try:
+            part = getattr(rpt, name)
+        except Exception:
+            # incomplete report (i.e. of a failed simulation)
+            continue
+        if isinstance(part, DataFrame):
+            part = json.loads(part.to_json(orient='index', date_format='iso'))
+        if part:
+            data[name] = part
+
+    fn_json = _get_output_filename(filename, output_dir, '.json')
+    with open(fn_json, 'w') as f:
+        # timestamps and durations as text
+        json.dump(data, f, indent=2, default=str)
+    return fn_json
+
+
+def _out_stats(filename, statistics):
+    from .output_file import SwmmOutput
+    from .scenarios import extract_statistics
+
+    with SwmmOutput(filename) as out:
+        return extract_statistics(out, statistics)
+
+
+def _call(job):
+    """Run a command for a single file in a worker process and catch every error."""
+    function, filename, kwargs = job
+    start = time.perf_counter()
+    try:
+        # the functions of the library print their progress, which would clutter the output of the command
+        with redirect_stdout(io.StringIO()):
+            result = function(filename, **kwargs)
+        error = None
+    except Exception:
+        result = None
+        error = traceback.format_exc()
+    return filename, result, error, time.perf_counter() - start
+
+
+def _print_throughput(n_files, n_failed, n_bytes, duration):
+    """Print the number of processed files and the throughput to stderr."""
+    duration = max(duration, 1e-9)
+    print(f'{n_files} files ({n_failed} failed, {n_bytes / 1e6:.1f} MB) in {duration:.1f} s: '
+          f'{n_files / duration:.2f} files/s, {n_bytes / 1e6 / duration:.1f} MB/s', file=sys.stderr)
+
+
+def _run_files(function, filenames, jobs=1, on_result=None, **kwargs):
+    """
+    Run a command for every file in parallel worker processes.
+
+    The results are passed to ``on_result`` in the order the files are finished.
+    Errors are printed to stderr and don't stop the other files.
+
+    Args:
+        function (function): command with the filename as first argument
+        filenames (list[str]): paths to the files
+        jobs (int): number of worker processes
+        on_result (function): function called with the filename, the result and the duration of every successful file
+        **kwargs: keyword arguments for ``function``
+
+    Returns:
+        int: number of failed files
+    """
+    start = time.perf_counter()
+    n_bytes = n_failed = 0
+    work = [(function, fn, kwargs) for fn in filenames]
+
+    def _handle(outcome):
+        nonlocal n_bytes, n_failed
+        filename, result, error, duration = outcome
+        n_bytes += os.path.getsize(filename)
+        if error is None:
+            on_result(filename, result, duration)
+        else:
+            n_failed += 1
+            print(f'FAILED {filename}\n{error}', file=sys.stderr, flush=True)
+
+    if jobs == 1:
+        for job in work:
+            _handle(_call(job))
+    else:
+        with Pool(min(jobs, max(len(work), 1))) as pool:
+            for outcome in pool.imap_unordered(_call, work):
+                _handle(outcome)
+
+    _print_throughput(len(filenames), n_failed, n_bytes, time.perf_counter() - start)
+    return n_failed
+
+
+def _print_converted(filename, result, duration):
+    print(f'{filename} -> {result} ({duration:.2f} s)', flush=True)
+
+
+def _parse_statistic(text):
+    """
+    Parse a statistic of the out-stats command.
+
+    Args:
+        text (str): ``[name=]kind/label/variable/statistic``, i.e. ``peak=link/C1/flow/max``
+            (empty label for the system variables, i.e. ``system//runoff/volume``)
+
+    Returns:
+        tuple[str, tuple[str, str, str, str]]: name and specification of the statistic
+            (see :func:`swmm_api.scenarios.extract_statistics`)
+    """
+    name, _, spec = text.rpartition('=')
+    parts = spec.split('/')
+    if len(parts) != 4:
+        raise argparse.ArgumentTypeError(f'"{text}" is not in the format [name=]kind/label/variable/statistic.')
+    return name or spec, tuple(parts)
+
+
+def _command_out2parquet(args):
+    return _run_files(_out_to_parquet, expand_globs(args.files), jobs=args.jobs, on_result=_print_converted,
+                      output_dir=args.output_dir, compression=args.compression)
+
+
+def _command_inp2gpkg(args):
+    return _run_files(_inp_to_gpkg, expand_globs(args.files), jobs=args.jobs, on_result=_print_converted,
+                      output_dir=args.output_dir, crs=args.crs)
+
+
+def _command_rpt2json(args):
+    return _run_files(_rpt_to_json, expand_globs(args.files), jobs=args.jobs, on_result=_print_converted,
+                      output_dir=args.output_dir)
+
+
+def _command_out_stats(args):
+    statistics = dict(args.stat) if args.stat else _DEFAULT_STATISTICS
+    writer = csv.writer(sys.stdout, lineterminator='\n')
+    writer.writerow(['file'] + list(statistics))
+
+    def _print_row(filename, result, duration):
+        writer.writerow([filename] + [result[name] for name in statistics])
+        sys.stdout.flush()
+
+    return _run_files(_out_stats, expand_globs(args.files), jobs=args.jobs, on_result=_print_row,
+                      statistics=statistics)
+
+
+def _command_run_batch(args):
+    from .run_batch import run_batch
+
+    filenames = expand_globs(args.files)
+    start = time.perf_counter()
+
+    def _print_result(result):
+        print(f'{result.status:<8} {result.inp} ({result.wall_time:.1f} s, attempt {result.attempts})', flush=True)
+        if not result.ok and result.errors:
+            print(result.errors, file=sys.stderr, flush=True)
+
+    results = run_batch(filenames, processes=args.jobs, timeout=args.timeout, retries=args.retries,
+                        engine=args.engine, rpt_dir=args.rpt_dir, out_dir=args.out_dir, create_out=not args.no_out,
+                        swmm_path=args.swmm_path, show_progress=False, manifest=args.manifest,
+                        callback=_print_result)
+
+    n_failed = sum(not result.ok for result in results)
+    duration = max(time.perf_counter() - start, 1e-9)
+    print(f'{len(results)} simulations ({n_failed} failed) in {duration:.1f} s: '
+          f'{len(results) / duration * 3600:.1f} simulations/h', file=sys.stderr)
+    return n_failed
+
+
+def _get_parser():
+    parser = argparse.ArgumentParser(prog='swmm-api', description='Convert and run many SWMM files in parallel.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    def _add_command(name, function, help_text, files_help):
+        sub = subparsers.add_parser(name, help=help_text, description=help_text)
+        sub.add_argument('files', nargs='+', help=f'{files_help} (paths or glob patterns, i.e. "models/**/*.inp")')
+        sub.add_argument('-j', '--jobs', type=int, default=1, help='number of parallel processes (default: 1)')
+        sub.set_defaults(function=function)
+        return sub
+
+    sub = _add_command('out2parquet', _command_out2parquet, 'Convert out-files to parquet-files.', 'out-files')
+    sub.add_argument('-o', '--output-dir', help='directory of the parquet-files (default: next to the out-files)')
+    sub.add_argument('--compression', default='brotli', help='compression of the parquet-files (default: brotli)')
+
+    sub = _add_command('inp2gpkg', _command_inp2gpkg, 'Convert inp-files to geopackages.', 'inp-files')
+    sub.add_argument('-o', '--output-dir', help='directory of the geopackages (default: next to the inp-files)')
+    sub.add_argument('--crs', default='EPSG:32633', help='coordinate reference system (default: EPSG:32633)')
+
+    sub = _add_command('rpt2json', _command_rpt2json, 'Convert report-files to json-files.', 'report-files')
+    sub.add_argument('-o', '--output-dir', help='directory of the json-files (default: next to the report-files)')
+
+    sub = _add_command('out-stats', _command_out_stats,
+                       'Write statistics of out-files as csv-table to stdout (one row per file).', 'out-files')
+    sub.add_argument('-s', '--stat', action='append', type=_parse_statistic,
+                     help='statistic as [name=]kind/label/variable/statistic, i.e. "peak=link/C1/flow/max" '
+                          '(statistics: max, min, mean, volume; repeatable; '
+                          'default: system runoff, flooding and outflow volume and peak outflow)')
+
+    sub = _add_command('run-batch', _command_run_batch, 'Run SWMM models.', 'inp-files')
+    sub.add_argument('--timeout', type=float, help='maximum duration of a simulation in seconds')
+    sub.add_argument('--retries', type=int, default=0, help='number of retries for a failed simulation')
+    sub.add_argument('--engine', choices=['cli', 'toolkit'], default='cli', help='way to run the simulations')
+    sub.add_argument('--swmm-path', help='path to the command line swmm executable')
+    sub.add_argument('--rpt-dir', help='directory of the report-files (default: next to the inp-files)')
+    sub.add_argument('--out-dir', help='directory of the out-files (default: next to the inp-files)')
+    sub.add_argument('--no-out', action='store_true', help='don\'t create out-files (only for the cli engine)')
+    sub.add_argument('--manifest', help='path to a manifest file to resume an interrupted batch run')
+    return parser
+
+
+def main(argv=None):
+    """
+    Entry point of the ``swmm-api`` command.
+
+    Every command processes the files in ``--jobs`` parallel processes, prints a line per finished file
+    and the throughput at the end (to stderr).
+
+    Args:
+        argv (list[str] | None): command line arguments. Default: :data:`sys.argv`.
+
+    Returns:
+        int: exit code (1 if any file failed)
+    """
+    args = _get_parser().parse_args(argv)
+    n_failed = args.function(args)
+    return 1 if n_failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
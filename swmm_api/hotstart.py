@@ -1,21 +1,282 @@
+import datetime
 from io import SEEK_SET
 
+import numpy as np
 import pandas as pd
 
 from ._read_bin import BinaryReader
 from .input_file import SEC
-from .output_file.extract import _FLOW_UNITS
+from .input_file.sections import InfiltrationGreenAmpt, InfiltrationCurveNumber
+from .output_file import SwmmOutput, OBJECTS, VARIABLES
+from .output_file.extract import _FLOW_UNITS, _FLOW_UNITS_METRIC
 
 _FILESTAMP = "SWMM5-HOTSTART4"
 
+# origin of the SWMM DateTime (days since this date)
+_SWMM_DATETIME_ORIGIN = datetime.datetime(1899, 12, 30)
+
+# feet per length unit of metric models (m > ft)
+_FEET_PER_METER = 1 / 0.3048
+
+# square feet per area unit of the subcatchments (ha | ac)
+_SQUARE_FEET_PER_HECTARE = 10000 * _FEET_PER_METER ** 2
+_SQUARE_FEET_PER_ACRE = 43560
+
+# flow unit per cfs (internal flow unit of SWMM)
+_FLOW_FACTORS = {
+    'CFS': 1.0,
+    'GPM': 448.831,
+    'MGD': 0.64632,
+    'CMS': 0.02832,
+    'LPS': 28.317,
+    'MLD': 2.4466,
+}
+
+# Ponded depths for each sub-area & total runoff
+#   impervious w/o depression storage
+#   impervious w/ depression storage
+#   pervious
+_SUBAREAS = ['imperv_zero', 'imperv', 'perv']
+
+# Infiltration state (always 6 elements, but only the first are used)
+#   HORTON:
+#       tp present time on infiltration curve (sec)
+#       Fe cumulative infiltration (ft)
+#   GREEN_AMPT:
+#       IMD current initial soil moisture deficit
+#       F   current cumulative infiltrated volume (ft)
+#       Fu  current upper zone infiltrated volume (ft)
+#       Sat saturation flag
+#       T   time until start of next rain event (sec)
+#   CURVE_NUMBER:
+#       S   current infiltration capacity (ft)
+#       P   current cumulative precipitation (ft)
+#       F   current cumulative infiltration (ft)
+#       T   current inter-event time (sec)
+#       Se  current event infiltration capacity (ft)
+#       f   previous infiltration rate (ft/sec)
+_N_INFILTRATION_STATES = 6
+
+# Groundwater state
+_GROUNDWATER_STATES = ['theta', 'bottomElev+lowerDepth', 'newFlow', 'maxInfilVol']
+
+# Snowpack state for each of the 3 snow surfaces
+#   depth_snow              depth of snow pack (ft)
+#   depth_free_water_snow   depth of free water in snow pack (ft)
+#   cold_content            cold content of snow pack
+#   antecedent_temperature  antecedent temperature index (deg F)
+#   initial_AWESI           initial AWESI of linear ADC
+_SNOW_SURFACES = ['plowable', 'imperv', 'perv']
+_SNOW_STATES = ['depth_snow', 'depth_free_water_snow', 'cold_content', 'antecedent_temperature', 'initial_AWESI']
+
+_NODE_SECTIONS = [SEC.JUNCTIONS, SEC.OUTFALLS, SEC.STORAGE, SEC.DIVIDERS]
+_LINK_SECTIONS = [SEC.CONDUITS, SEC.ORIFICES, SEC.PUMPS, SEC.WEIRS, SEC.OUTLETS]
+
+
+def _get_labels(inp, sections):
+    """
+    get the labels and the section of all objects in the order of the inp-file (= order of the objects in SWMM)
+
+    Args:
+        inp (swmm_api.SwmmInput): inp-file-data
+        sections (list[str]): labels of the sections
+
+    Returns:
+        tuple[list[str], list[str]]: labels of the objects and the section label per object
+    """
+    labels = []
+    kinds = []
+    for sec in inp._original_section_order:
+        if sec in sections and sec in inp:
+            labels += list(inp[sec].keys())
+            kinds += [sec] * len(inp[sec].keys())
+    return labels, kinds
+
+
+def _get_layout(inp):
+    """
+    get the record layout of the objects in the hotstart-file based on the inp-file-data
+
+    The records of the subcatchments and nodes differ in their length,
+    depending on the existence of groundwater and snowpack per subcatchment or if the node is a storage.
+    The layout is a boolean matrix (objects x columns) which marks the values stored in the file.
+
+    Args:
+        inp (swmm_api.SwmmInput): inp-file-data
+
+    Returns:
+        dict: labels, kinds, columns and layouts of the subcatchments, nodes and links
+    """
+    pollutants = list(inp.POLLUTANTS.keys())
+    landuses = list(inp.LANDUSES.keys())
+
+    # ---------------------------------------------------------------------------
+    # Runoff
+    labels_subcatchments = list(inp[SEC.SUBCATCHMENTS].keys()) if SEC.SUBCATCHMENTS in inp else []
+    n_subcatchments = len(labels_subcatchments)
+
+    columns_subcatchment = [f'depth_{s}' for s in _SUBAREAS] + ['runoff']
+    columns_subcatchment += [f'Infiltration_{i}' for i in range(_N_INFILTRATION_STATES)]
+    layout_subcatchment = [np.ones((n_subcatchments, len(columns_subcatchment)), dtype=bool)]
+
+    if SEC.GROUNDWATER in inp:
+        columns_subcatchment += _GROUNDWATER_STATES
+        has_groundwater = np.array([label in inp[SEC.GROUNDWATER] for label in labels_subcatchments], dtype=bool)
+        layout_subcatchment.append(np.repeat(has_groundwater[:, np.newaxis], len(_GROUNDWATER_STATES), axis=1))
+
+    if SEC.SNOWPACKS in inp:
+        columns_subcatchment += [f'{s}_{v}' for s in _SNOW_SURFACES for v in _SNOW_STATES]
+        has_snowpack = np.array([isinstance(sc.snow_pack, str) for sc in inp[SEC.SUBCATCHMENTS].values()], dtype=bool)
+        layout_subcatchment.append(np.repeat(has_snowpack[:, np.newaxis], len(_SNOW_SURFACES) * len(_SNOW_STATES), axis=1))
+
+    if pollutants:
+        # Water quality
+        #   Runoff quality
+        #   Ponded quality
+        #   Buildup and when streets were last swept
+        columns_quality = [f'{v}_{p}' for v in ['runoff', 'ponded'] for p in pollutants]
+        for landuse in landuses:
+            columns_quality += [f'{landuse}_{p}_buildup' for p in pollutants] + [f'{landuse}_lastSwept']
+        columns_subcatchment += columns_quality
+        layout_subcatchment.append(np.ones((n_subcatchments, len(columns_quality)), dtype=bool))
+
+    # ---------------------------------------------------------------------------
+    # Routing
+    labels_nodes, kind_nodes = _get_labels(inp, _NODE_SECTIONS)
+    # depth, lateral_flow, hydraulic_residence_time (only for storages) + Pollutants
+    is_storage = np.array([kind == SEC.STORAGE for kind in kind_nodes], dtype=bool)
+    layout_node = np.ones((len(labels_nodes), 3 + len(pollutants)), dtype=bool)
+    layout_node[:, 2] = is_storage
+
+    labels_links, kind_links = _get_labels(inp, _LINK_SECTIONS)
+
+    return {
+        'pollutants': pollutants,
+        'landuses': landuses,
+        'labels_subcatchments': labels_subcatchments,
+        'columns_subcatchment': columns_subcatchment,
+        'layout_subcatchment': np.hstack(layout_subcatchment),
+        'labels_nodes': labels_nodes,
+        'kind_nodes': kind_nodes,
+        'is_storage': is_storage,
+        'columns_node': ['depth', 'lateral_flow', 'hydraulic_residence_time'] + pollutants,
+        'layout_node': layout_node,
+        'labels_links': labels_links,
+        'kind_links': kind_links,
+        'columns_link': ['flow', 'depth', 'setting'] + pollutants,
+    }
+
+
+def _decode(buffer, layout, dtype):
+    """
+    decode a block of records with different lengths
+
+    The values in the buffer fill the marked cells of the layout in row-major order (= order in the file).
+
+    Args:
+        buffer (bytes): raw block of the file
+        layout (numpy.ndarray): boolean matrix (objects x columns) which marks the values stored in the file
+        dtype (str): type of the values (``'f8'`` or ``'f4'``)
+
+    Returns:
+        numpy.ndarray: values (objects x columns) with NaN for the values not stored in the file
+    """
+    values = np.full(layout.shape, np.nan)
+    values[layout] = np.frombuffer(buffer, dtype=dtype, count=int(layout.sum()))
+    return values
+
+
+def _default_subcatchment_states(inp, layout):
+    """
+    get the states of the subcatchments at the start of a simulation
+
+    The states are initialized like SWMM does (in ft and cfs):
+
+    - no ponded water and runoff
+    - initial infiltration state of the infiltration method
+    - initial groundwater table and moisture content of the aquifer
+    - initial snow depth and free water of the snowpack
+    - no pollutants and no buildup
+    - last street sweeping ``last_sweep`` days before the simulation start (as SWMM DateTime)
+
+    Args:
+        inp (swmm_api.SwmmInput): inp-file-data
+        layout (dict): record layout of the hotstart-file (see :func:`_get_layout`)
+
+    Returns:
+        numpy.ndarray: states (subcatchments x columns)
+    """
+    columns = layout['columns_subcatchment']
+    values = np.zeros((len(layout['labels_subcatchments']), len(columns)))
+
+    is_metric = inp.OPTIONS.get('FLOW_UNITS', 'CFS') in _FLOW_UNITS_METRIC
+    feet_per_length = _FEET_PER_METER if is_metric else 1
+    feet_per_depth = _FEET_PER_METER / 1000 if is_metric else 1 / 12  # mm | in
+
+    for i, label in enumerate(layout['labels_subcatchments']):
+        # Infiltration
+        infiltration = inp.INFILTRATION.get(label)
+        if isinstance(infiltration, InfiltrationGreenAmpt):
+            values[i, columns.index('Infiltration_0')] = infiltration.moisture_deficit_init
+        elif isinstance(infiltration, InfiltrationCurveNumber):
+            storage_max = (1000 / min(max(float(infiltration.curve_no), 10), 99) - 10) / 12
+            values[i, columns.index('Infiltration_0')] = storage_max
+            values[i, columns.index('Infiltration_4')] = storage_max
+
+        # Groundwater
+        if (SEC.GROUNDWATER in inp) and (label in inp[SEC.GROUNDWATER]):
+            gw = inp[SEC.GROUNDWATER][label]
+            aquifer = inp.AQUIFERS[gw.aquifer]
+            moisture = aquifer.Umc if np.isnan(gw.Umc) else gw.Umc
+            elevation_gw = (aquifer.Egw if np.isnan(gw.Egw) else gw.Egw) * feet_per_length
+            elevation_surface = gw.Esurf * feet_per_length
+            theta = min(moisture, aquifer.Por - 0.001)
+            fraction_pervious = 1 - inp.SUBCATCHMENTS[label].imperviousness / 100
+            values[i, columns.index('theta')] = theta
+            values[i, columns.index('bottomElev+lowerDepth')] = min(elevation_gw, elevation_surface)
+            if fraction_pervious > 0:
+                values[i, columns.index('maxInfilVol')] = (elevation_surface - elevation_gw) * (aquifer.Por - theta) / fraction_pervious
+
+        # Snowpack
+        if SEC.SNOWPACKS in inp:
+            snow_pack = inp.SUBCATCHMENTS[label].snow_pack
+            if isinstance(snow_pack, str) and (snow_pack in inp[SEC.SNOWPACKS]):
+                parts = inp[SEC.SNOWPACKS][snow_pack].parts
+                for surface, part_label in zip(_SNOW_SURFACES, ['PLOWABLE', 'IMPERVIOUS', 'PERVIOUS']):
+                    if part_label not in parts:
+                        continue
+                    part = parts[part_label]
+                    values[i, columns.index(f'{surface}_depth_snow')] = part.SD0 * feet_per_depth
+                    values[i, columns.index(f'{surface}_depth_free_water_snow')] = part.FW0 * feet_per_depth
+                    values[i, columns.index(f'{surface}_antecedent_temperature')] = part.Tbase * 9 / 5 + 32 if is_metric else part.Tbase
+                    values[i, columns.index(f'{surface}_initial_AWESI')] = 1
+
+    # Water quality
+    if layout['pollutants']:
+        # the date of the last sweeping is a SWMM DateTime (days since 1899-12-30)
+        options = inp.OPTIONS if SEC.OPTIONS in inp else {}
+        start = datetime.datetime.combine(options.get('START_DATE', datetime.date(2004, 1, 1)),
+                                          options.get('START_TIME', datetime.time(0)))
+        start = (start - _SWMM_DATETIME_ORIGIN) / datetime.timedelta(days=1)
+        for landuse in layout['landuses']:
+            last_sweep = inp.LANDUSES[landuse].last_sweep
+            values[:, columns.index(f'{landuse}_lastSwept')] = start - (0 if np.isnan(last_sweep) else last_sweep)
+
+    values[~layout['layout_subcatchment']] = np.nan
+    return values
+
 
 class SwmmHotstart(BinaryReader):
-    """The class that handles all extraction of data from the out file."""
+    """The class that handles all extraction of data from the hotstart file."""
 
     def __init__(self, filename,  inp):
         """
         read a with SWMM created binary hotstart file
 
+        The record layout of each object is derived once from the inp-data and every block of the file is decoded at once.
+
+        All values are in the internal units of SWMM (ft, cfs).
+
         Args:
             filename (str): path of the hotstart-file
             inp (swmm_api.SwmmInput): inp-file-data
@@ -25,187 +286,249 @@ class SwmmHotstart(BinaryReader):
 
         # openHotstartFile2
         _file_stamp = self._next(len(_FILESTAMP), 's')
-        n_subcatchments = self._next()
-        n_landuse = self._next()
-        n_nodes = self._next()
-        n_links = self._next()
-        n_pollutants = self._next()
-        i_flow_unit = self._next()
+        n_subcatchments, n_landuse, n_nodes, n_links, n_pollutants, i_flow_unit = self._next(6)
         self.unit = _FLOW_UNITS[i_flow_unit]
 
         # ---------
         # get inp-file-data informations
-        pollutants = list(inp.POLLUTANTS.keys())
-        landuses = list(inp.LANDUSES.keys())
-        labels_subcatchments = list(inp[SEC.SUBCATCHMENTS].keys())
-
-        kind_nodes = []
-        node_labels = []
+        layout = _get_layout(inp)
+
+        if ((n_subcatchments, n_landuse, n_nodes, n_links, n_pollutants) !=
+                (len(layout['labels_subcatchments']), len(layout['landuses']), len(layout['labels_nodes']),
+                 len(layout['labels_links']), len(layout['pollutants']))):
+            raise ValueError(f'The hotstart-file "{self.filename}" does not match the inp-data.')
+
+        layout_subcatchment = layout['layout_subcatchment']
+        layout_node = layout['layout_node']
+        # every link has the same record
+        dtype_link = np.dtype([(c, 'f4') for c in layout['columns_link']])
+
+        self._set_states(
+            layout,
+            subcatchments=_decode(self.fp.read(int(layout_subcatchment.sum()) * 8), layout_subcatchment, 'f8'),
+            nodes=_decode(self.fp.read(int(layout_node.sum()) * 4), layout_node, 'f4'),
+            links=pd.DataFrame(np.frombuffer(self.fp.read(n_links * dtype_link.itemsize), dtype=dtype_link,
+                                             count=n_links)).values.astype(float),
+            n_landuse=n_landuse)
+
+    def _set_states(self, layout, subcatchments, nodes, links, n_landuse):
+        """
+        set the states of the objects as frames
 
-        for sec in inp._original_section_order:
-            if sec in [SEC.JUNCTIONS, SEC.OUTFALLS, SEC.STORAGE, SEC.DIVIDERS] and sec in inp:
-                kind_nodes += [sec] * len(inp[sec].keys())
-                node_labels += list(inp[sec].keys())
+        Args:
+            layout (dict): record layout of the hotstart-file (see :func:`_get_layout`)
+            subcatchments (numpy.ndarray): states of the subcatchments (objects x columns)
+            nodes (numpy.ndarray): states of all nodes incl. storages (objects x columns)
+            links (numpy.ndarray): states of the links (objects x columns)
+            n_landuse (int): number of land uses
+        """
+        self._layout = layout
+        self._n_landuse = n_landuse
 
-        kind_links = []
-        links_labels = []
-        for sec in inp._original_section_order:
-            if sec in [SEC.CONDUITS, SEC.ORIFICES, SEC.PUMPS, SEC.WEIRS, SEC. OUTLETS] and sec in inp:
-                kind_links += [sec] * len(inp[sec].keys())
-                links_labels += list(inp[sec].keys())
+        self.columns_subcatchment = ['label'] + layout['columns_subcatchment']
+        self.columns_node = ['label', 'kind', 'depth', 'lateral_flow'] + layout['pollutants']
+        self.columns_storage = ['label', 'kind', 'depth', 'lateral_flow', 'hydraulic_residence_time'] + layout['pollutants']
+        self.columns_link = ['label', 'kind'] + layout['columns_link']
 
         # ---------------------------------------------------------------------------
         # Runoff
+        self._subcatchments = pd.DataFrame(subcatchments, columns=layout['columns_subcatchment'])
+        self._subcatchments.insert(0, 'label', layout['labels_subcatchments'])
 
-        subareas = ['imperv_zero', 'imperv', 'perv']
-        self.columns_subcatchment = ['label', *[f'depth_{s}' for s in subareas], 'runoff']
-        # Infiltration
-        self.columns_subcatchment += [f'Infiltration_{i}' for i in range(6)]
+        # ---------------------------------------------------------------------------
+        # Routing
+        nodes = pd.DataFrame(nodes, columns=layout['columns_node'])
+        nodes.insert(0, 'label', layout['labels_nodes'])
+        nodes.insert(1, 'kind', layout['kind_nodes'])
+        self._nodes = nodes.loc[~layout['is_storage'], self.columns_node].reset_index(drop=True)
+        self._storages = nodes.loc[layout['is_storage'], self.columns_storage].reset_index(drop=True)
+
+        self._links = pd.DataFrame(links, columns=layout['columns_link'])
+        self._links.insert(0, 'label', layout['labels_links'])
+        self._links.insert(1, 'kind', layout['kind_links'])
+
+    @classmethod
+    def from_frames(cls, inp, nodes=None, links=None, subcatchments=None, flow_unit=None):
+        """
+        Create a hotstart from the states of the objects, i.e. to write a hotstart-file with custom initial conditions.
 
-        if SEC.GROUNDWATER in inp:
-            self.columns_subcatchment += ['theta', 'bottomElev+lowerDepth', 'newFlow', 'maxInfilVol']
+        Objects or columns missing in the frames get the initial states of SWMM (see :func:`_default_subcatchment_states`),
+        which is an empty network for nodes and links.
 
-        if SEC.SNOWPACKS in inp:
-            for s in [subareas]:
-                for v in ['depth_snow', 'depth_free_water_snow', 'cold_content',
-                                              'antecedent_temperature', 'initial_AWESI']:
-
-                    self.columns_subcatchment.append(f'{s}_{v}')
-
-        if n_pollutants:
-            for v in ['runoff', 'ponded']:
-                for i_pollutant in range(n_pollutants):
-                    self.columns_subcatchment.append(f'{v}_{pollutants[i_pollutant]}')
-
-            for i_landuse in range(n_landuse):
-                self.columns_subcatchment += [f'{landuses[i_landuse]}_{pollutants[i_pollutant]}_buildup' for i_pollutant in range(n_pollutants)]
-                self.columns_subcatchment += [f'{landuses[i_landuse]}_lastSwept']
-
-        self.subcatchments = []
-        for i_sc in range(n_subcatchments):
-            subcatchment = [labels_subcatchments[i_sc]]
-            # Ponded depths for each sub-area & total runoff (4 elements)
-            #   impervious w/o depression storage
-            #   impervious w/ depression storage
-            #   pervious
-            subcatchment += self._next_doubles(4)
-
-            # Infiltration state (max. of 6 elements)
-            # immer 6 elemente, aber nur die ersten belegt
-
-            #   HORTON:
-            #       tp present time on infiltration curve (sec)
-            #       Fe cumulative infiltration (ft)
-            #   GREEN_AMPT:
-            #       IMD current initial soil moisture deficit
-            #       F   current cumulative infiltrated volume (ft)
-            #       Fu  current upper zone infiltrated volume (ft)
-            #       Sat saturation flag
-            #       T   time until start of next rain event (sec)
-            #   CURVE_NUMBER:
-            #       S   current infiltration capacity (ft)
-            #       P   current cumulative precipitation (ft)
-            #       F   current cumulative infiltration (ft)
-            #       T   current inter-event time (sec)
-            #       Se  current event infiltration capacity (ft)
-            #       f   previous infiltration rate (ft/sec)
-
-            subcatchment += self._next_doubles(6)
-
-            # Groundwater state (4 elements)
-            if SEC.GROUNDWATER in inp:
-                if labels_subcatchments[i_sc] in inp[SEC.GROUNDWATER]:
-                    # theta
-                    # bottomElev + lowerDepth
-                    # newFlow
-                    # maxInfilVol
-                    subcatchment += self._next_doubles(4)
-                else:
-                    subcatchment += [None] * 4
-
-            # Snowpack state (5 elements for each of 3 snow surfaces)
-            if SEC.SNOWPACKS in inp:
-                if labels_subcatchments[i_sc] in inp[SEC.SNOWPACKS]:
-                    for i_snow_surface in range(3):
-                        # depth_snow depth of snow pack (ft)
-                        # depth_free_water_snow    depth of free water in snow pack (ft)
-                        # cold_content cold content of snow pack
-                        # antecedent_temperature   antecedent temperature index (deg F)
-                        # initial_AWESI   initial AWESI of linear ADC
-                        subcatchment += self._next_doubles(5)
-                else:
-                    subcatchment += [None] * 3*5
-
-            if n_pollutants:
-                # Water quality
-                #   Runoff quality
-                #   Ponded quality
-                #   Buildup and when streets were last swept
-                subcatchment += self._next_doubles(2*n_pollutants)
-
-                for i_landuse in range(n_landuse):
-                    subcatchment += self._next_doubles(n_pollutants + 1)
-
-            self.subcatchments.append(subcatchment)
+        All values must be in the internal units of SWMM (ft, cfs).
 
-        # ---------------------------------------------------------------------------
-        # Routing
-        self.columns_node = ['label', 'kind', 'depth', 'lateral_flow'] + pollutants
-        self.columns_storage = ['label', 'kind', 'depth', 'lateral_flow', 'hydraulic_residence_time'] + pollutants
-
-        self.nodes = []
-        self.storages = []
-
-        for i_node in range(n_nodes):
-            if kind_nodes[i_node] == SEC.STORAGE:
-                # if is storage
-                # read 3 Parameters
-                #   depth
-                #   lateral_flow
-                #   hydraulic_residence_time
-                # + Pollutants
-                self.storages.append((node_labels[i_node], kind_nodes[i_node], *self._next_floats(n_pollutants + 3)))
-            else:
-                # read 2 Parameters
-                #   depth
-                #   lateral_flow
-                #  + Pollutants
-                self.nodes.append((node_labels[i_node], kind_nodes[i_node], *self._next_floats(n_pollutants + 2)))
-
-        self.columns_link = ['label', 'kind', 'flow', 'depth', 'setting'] + pollutants
-
-        self.links = []
-        for i_link in range(n_links):
-            # read 3 Parameters
-            #   flow
-            #   depth
-            #   setting
-            #  + Pollutants
-            self.links.append((links_labels[i_link], kind_links[i_link], *self._next_floats(n_pollutants + 3)))
+        Args:
+            inp (swmm_api.SwmmInput): inp-file-data
+            nodes (pandas.DataFrame): states of the nodes (incl. storages) with the label as index and the columns
+                ``depth``, ``lateral_flow``, ``hydraulic_residence_time`` (only for storages) and the pollutants.
+            links (pandas.DataFrame): states of the links with the label as index and the columns
+                ``flow``, ``depth``, ``setting`` and the pollutants.
+            subcatchments (pandas.DataFrame): states of the subcatchments with the label as index
+                and the columns of :attr:`SwmmHotstart.subcatchments_frame`.
+            flow_unit (str): flow unit of the model. Default: flow unit in the options of the inp-data.
+
+        Returns:
+            SwmmHotstart: hotstart object
+        """
+        self = cls.__new__(cls)
+        self.fp = None
+        self.filename = '<frames>'
+        self.unit = inp.OPTIONS.get('FLOW_UNITS', 'CFS') if flow_unit is None else flow_unit
+
+        layout = _get_layout(inp)
+
+        def _fill(values, labels, columns, frame):
+            if frame is not None:
+                frame = frame.reindex(index=labels, columns=columns)
+                given = frame.notna().values
+                values[given] = frame.values[given]
+            return values
+
+        values_nodes = np.zeros((len(layout['labels_nodes']), len(layout['columns_node'])))
+        values_nodes[~layout['layout_node']] = np.nan
+        values_links = np.zeros((len(layout['labels_links']), len(layout['columns_link'])))
+        values_links[:, layout['columns_link'].index('setting')] = 1
+
+        self._set_states(
+            layout,
+            subcatchments=_fill(_default_subcatchment_states(inp, layout), layout['labels_subcatchments'],
+                                layout['columns_subcatchment'], subcatchments),
+            nodes=_fill(values_nodes, layout['labels_nodes'], layout['columns_node'], nodes),
+            links=_fill(values_links, layout['labels_links'], layout['columns_link'], links),
+            n_landuse=len(layout['landuses']))
+        return self
+
+    def write(self, filename):
+        """
+        Write the states as a binary hotstart-file readable by SWMM.
+
+        Args:
+            filename (str): path of the new hotstart-file
+        """
+        layout = self._layout
+        nodes = pd.concat([self._nodes, self._storages]).set_index('label').reindex(layout['labels_nodes'])
+
+        with open(filename, 'wb') as f:
+            f.write(_FILESTAMP.encode('ascii'))
+            f.write(np.array([len(layout['labels_subcatchments']), self._n_landuse, len(layout['labels_nodes']),
+                              len(layout['labels_links']), len(layout['pollutants']), _FLOW_UNITS.index(self.unit)],
+                             dtype='i4').tobytes())
+            f.write(self._subcatchments[layout['columns_subcatchment']].values.astype('f8')[layout['layout_subcatchment']].tobytes())
+            f.write(nodes[layout['columns_node']].values.astype('f4')[layout['layout_node']].tobytes())
+            f.write(self._links[layout['columns_link']].values.astype('f4').tobytes())
 
     @property
     def links_frame(self):
-        df = pd.DataFrame.from_records(self.links)
-        df.columns = self.columns_link
-        return df
+        return self._links
 
     @property
     def nodes_frame(self):
-        df = pd.DataFrame.from_records(self.nodes)
-        df.columns = self.columns_node
-        return df
+        return self._nodes
 
     @property
     def storages_frame(self):
-        df = pd.DataFrame.from_records(self.storages)
-        df.columns = self.columns_storage
-        return df
+        return self._storages
 
     @property
     def subcatchments_frame(self):
-        df = pd.DataFrame.from_records(self.subcatchments)
-        df.columns = self.columns_subcatchment
-        return df
+        return self._subcatchments
+
+    @property
+    def links(self):
+        """list[tuple]: states of the links as records (label, kind, values, see :attr:`links_frame`)"""
+        return list(self._links.itertuples(index=False, name=None))
+
+    @property
+    def nodes(self):
+        """list[tuple]: states of the nodes (without storages) as records (label, kind, values, see :attr:`nodes_frame`)"""
+        return list(self._nodes.itertuples(index=False, name=None))
+
+    @property
+    def storages(self):
+        """list[tuple]: states of the storages as records (label, kind, values, see :attr:`storages_frame`)"""
+        return list(self._storages.itertuples(index=False, name=None))
+
+    @property
+    def subcatchments(self):
+        """list[list]: states of the subcatchments as records (label, values, see :attr:`subcatchments_frame`)"""
+        return [list(row) for row in self._subcatchments.itertuples(index=False, name=None)]
 
     def __repr__(self):
         return f'SwmmHotstart(file="{self.filename}")'
+
+
+def hotstart_from_output(out, inp, timestamp, filename):
+    """
+    Write a hotstart-file with the state of the network at a timestamp of a previous simulation.
+
+    The node depths and lateral inflows, the link flows, depths and settings
+    and the pollutant concentrations are read for a single period of the out-file.
+    The groundwater states of the subcatchments are taken from the out-file as well.
+    All other runoff states (i.e. ponded depths, infiltration, snowpack and buildup)
+    get the initial states of SWMM (see :meth:`SwmmHotstart.from_frames`).
+
+    The out-file must be created with the same network as the inp-data.
+    To start a simulation at this state, set the start time of the inp-data to the timestamp
+    (i.e. with :func:`swmm_api.input_file.macros.macros.set_times`) and add ``USE HOTSTART`` to the ``FILES`` section.
+
+    Args:
+        out (swmm_api.SwmmOutput | str): out-file or path to the out-file
+        inp (swmm_api.SwmmInput): inp-file-data
+        timestamp (datetime.datetime | str): timestamp of the state in the out-file
+        filename (str): path of the new hotstart-file
+
+    Returns:
+        SwmmHotstart: hotstart object
+    """
+    # only the file opened here is closed afterwards
+    if isinstance(out, SwmmOutput):
+        return _hotstart_from_output(out, inp, timestamp, filename)
+    with SwmmOutput(out) as out:
+        return _hotstart_from_output(out, inp, timestamp, filename)
+
+
+def _hotstart_from_output(out, inp, timestamp, filename):
+    """hotstart of :func:`hotstart_from_output` with the out-file opened"""
+    feet_per_length = _FEET_PER_METER if out.flow_unit in _FLOW_UNITS_METRIC else 1
+    cfs_per_flow = 1 / _FLOW_FACTORS[out.flow_unit]
+    pollutants = out.labels[OBJECTS.POLLUTANT]
+
+    nodes = out.get_period(timestamp, OBJECTS.NODE)
+    nodes_state = nodes[pollutants].copy()
+    nodes_state['depth'] = nodes[VARIABLES.NODE.DEPTH] * feet_per_length
+    nodes_state['lateral_flow'] = nodes[VARIABLES.NODE.LATERAL_INFLOW] * cfs_per_flow
+
+    links = out.get_period(timestamp, OBJECTS.LINK)
+    links_state = links[pollutants].copy()
+    links_state['flow'] = links[VARIABLES.LINK.FLOW] * cfs_per_flow
+    links_state['depth'] = links[VARIABLES.LINK.DEPTH] * feet_per_length
+    # the capacity is the control setting for pumps and regulators
+    is_conduit = [out.model_properties[OBJECTS.LINK][label]['type'] == 'CONDUIT' for label in links.index]
+    links_state['setting'] = links[VARIABLES.LINK.CAPACITY].where(~pd.Series(is_conduit, index=links.index), 1.)
+
+    # the groundwater states are also part of the out-file
+    subcatchments_state = None
+    if SEC.GROUNDWATER in inp:
+        labels_groundwater = [label for label in out.labels[OBJECTS.SUBCATCHMENT] if label in inp[SEC.GROUNDWATER]]
+        subcatchments = out.get_period(timestamp, OBJECTS.SUBCATCHMENT).loc[labels_groundwater]
+        square_feet_per_area = _SQUARE_FEET_PER_HECTARE if out.flow_unit in _FLOW_UNITS_METRIC else _SQUARE_FEET_PER_ACRE
+        subcatchments_state = pd.DataFrame(index=subcatchments.index)
+        subcatchments_state['theta'] = subcatchments[VARIABLES.SUBCATCHMENT.SOIL_MOISTURE]
+        subcatchments_state['bottomElev+lowerDepth'] = subcatchments[VARIABLES.SUBCATCHMENT.GW_ELEVATION] * feet_per_length
+        for label in labels_groundwater:
+            subcatchment = inp.SUBCATCHMENTS[label]
+            porosity = inp.AQUIFERS[inp[SEC.GROUNDWATER][label].aquifer].Por
+            elevation_surface = inp[SEC.GROUNDWATER][label].Esurf * feet_per_length
+            fraction_pervious = 1 - subcatchment.imperviousness / 100
+            state = subcatchments_state.loc[label]
+            # groundwater flow rate per unit area
+            subcatchments_state.loc[label, 'newFlow'] = (subcatchments.loc[label, VARIABLES.SUBCATCHMENT.GW_OUTFLOW]
+                                                         * cfs_per_flow / (subcatchment.area * square_feet_per_area))
+            if fraction_pervious > 0:
+                subcatchments_state.loc[label, 'maxInfilVol'] = ((elevation_surface - state['bottomElev+lowerDepth'])
+                                                                 * (porosity - state['theta']) / fraction_pervious)
+
+    hotstart = SwmmHotstart.from_frames(inp, nodes=nodes_state, links=links_state, subcatchments=subcatchments_state,
+                                        flow_unit=out.flow_unit)
+    hotstart.write(filename)
+    return hotstart
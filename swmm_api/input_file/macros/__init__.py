@@ -2,12 +2,11 @@ from .check import check_for_nodes, check_for_duplicates
 from .collection import nodes_dict, links_dict, subcatchments_per_node_dict, nodes_subcatchments_dict
 from .compare import CompareSections, compare_inp_files, compare_sections
 from .convert import junction_to_storage, junction_to_outfall, conduit_to_orifice
-from .curve import curve_figure
 from .edit import (combine_conduits, combine_conduits_keep_slope, combine_vertices, delete_link, delete_node,
                    delete_subcatchment, dissolve_conduit, flip_link_direction, move_flows, rename_link, rename_node,
                    rename_subcatchment, rename_timeseries, split_conduit, remove_quality_model, delete_pollutant)
 from .filter import (filter_tags, filter_nodes, filter_links_within_nodes, filter_links, filter_subcatchments,
-                     create_sub_inp, )
+                     filter_report, create_sub_inp, )
 from .geo import (transform_coordinates, complete_vertices, reduce_vertices, complete_link_vertices,
                   simplify_link_vertices, simplify_vertices, )
 
@@ -28,16 +27,20 @@ from .graph import (inp_to_graph, get_path, get_path_subgraph, next_links, next_
                     downstream_nodes, upstream_nodes, get_network_forks, split_network, conduit_iter_over_inp)
 from .macros import (find_node, find_link, calc_slope, conduit_slopes, conduits_are_equal, update_no_duplicates,
                      increase_max_node_depth, set_times, combined_subcatchment_frame, delete_sections)
-from .plotting_longitudinal import plot_longitudinal
-from .plotting_map import (plot_map, init_empty_map_plot, add_node_map, add_link_map, add_subcatchment_map,
-                           add_node_labels, set_inp_dimensions)
 from .reduce_unneeded import (reduce_curves, reduce_controls, simplify_curves, reduce_raingages,
                               remove_empty_sections, reduce_timeseries, reduce_pattern)
 from .split_inp_file import split_inp_to_files, read_split_inp_file
 from .summerize import print_summary
 from .tags import get_node_tags, get_link_tags, get_subcatchment_tags, filter_tags, delete_tag_group
 
-try:
-    from .cross_section_curve import (get_cross_section_maker, profil_area, to_cross_section_maker)
-except ImportError as e:
-    print('Missing package: pip install SWMM-xsections-shape-generator')
+from ..._lazy import lazy_attributes
+
+# the plotting functions are imported on first use, as they depend on matplotlib
+# and the cross-section functions on the optional package SWMM-xsections-shape-generator
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    'curve_figure': '.curve',
+    'plot_longitudinal': '.plotting_longitudinal',
+    **{name: '.plotting_map' for name in ('plot_map', 'init_empty_map_plot', 'add_node_map', 'add_link_map',
+                                          'add_subcatchment_map', 'add_node_labels', 'set_inp_dimensions')},
+    **{name: '.cross_section_curve' for name in ('get_cross_section_maker', 'profil_area', 'to_cross_section_maker')},
+}, submodules=['curve', 'plotting_longitudinal', 'plotting_map', 'cross_section_curve'])
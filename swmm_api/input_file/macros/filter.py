@@ -1,8 +1,10 @@
 from .reduce_unneeded import (reduce_controls, reduce_curves, reduce_raingages, remove_empty_sections, reduce_pattern,
                               reduce_timeseries, )
 from ..section_labels import *
+from .collection import nodes_dict, links_dict
 from ..section_lists import LINK_SECTIONS, NODE_SECTIONS
 from ..sections import Tag
+from ..sections.generic_section import ReportSection
 from ..sections._identifiers import IDENTIFIERS
 
 
@@ -26,7 +28,7 @@ def filter_nodes(inp, final_nodes):
             inp[section] = inp[section].slice_section(final_nodes)
 
     # __________________________________________
-    for section in [INFLOWS, DWF]:
+    for section in [INFLOWS, DWF, RDII, TREATMENT]:
         if section in inp:
             inp[section] = inp[section].slice_section(final_nodes, by=IDENTIFIERS.node)
 
@@ -121,14 +123,22 @@ def filter_subcatchments(inp, final_nodes):
         sub_orig = inp[SUBCATCHMENTS].copy()
         # all with an outlet to final_nodes
         inp[SUBCATCHMENTS] = inp[SUBCATCHMENTS].slice_section(final_nodes, by='outlet')
-        # all with an outlet to an subcatchment
-        inp[SUBCATCHMENTS].update(sub_orig.slice_section(inp[SUBCATCHMENTS].keys(), by='outlet'))
+        # all with an outlet to an subcatchment (over any number of subcatchments)
+        while True:
+            new = sub_orig.slice_section(inp[SUBCATCHMENTS].keys(), by='outlet')
+            if set(new.keys()) <= set(inp[SUBCATCHMENTS].keys()):
+                break
+            inp[SUBCATCHMENTS].update(new)
 
         # __________________________________________
         for section in [SUBAREAS, INFILTRATION, POLYGONS]:
             if section in inp:
                 inp[section] = inp[section].slice_section(inp[SUBCATCHMENTS])
 
+        for section in [LID_USAGE, GROUNDWATER, GWF, COVERAGES, LOADINGS]:
+            if section in inp:
+                inp[section] = inp[section].slice_section(inp[SUBCATCHMENTS], by=IDENTIFIERS.subcatchment)
+
         # __________________________________________
         if TAGS in inp:
             new = inp[TAGS].create_new_empty()
@@ -138,7 +148,7 @@ def filter_subcatchments(inp, final_nodes):
             # inp[TAGS] = inp[TAGS].slice_section(((Tag.TYPES.Subcatch, k) for k in inp[SUBCATCHMENTS]))
 
     else:
-        for section in [SUBAREAS, INFILTRATION, POLYGONS]:
+        for section in [SUBAREAS, INFILTRATION, POLYGONS, LID_USAGE, GROUNDWATER, GWF, COVERAGES, LOADINGS]:
             if section in inp:
                 del inp[section]
 
@@ -150,6 +160,41 @@ def filter_subcatchments(inp, final_nodes):
     return inp
 
 
+def filter_report(inp):
+    """
+    remove objects from the lists in the REPORT section which are not in the network
+
+    Args:
+        inp (SwmmInput): inp-file data
+
+    .. Important::
+        works inplace
+    """
+    if REPORT not in inp:
+        return
+
+    objects = {
+        ReportSection.KEYS.SUBCATCHMENTS: inp[SUBCATCHMENTS] if SUBCATCHMENTS in inp else {},
+        ReportSection.KEYS.NODES: nodes_dict(inp),
+        ReportSection.KEYS.LINKS: links_dict(inp),
+    }
+    for key, existing in objects.items():
+        if isinstance(inp[REPORT].get(key), list):
+            labels = [label for label in inp[REPORT][key] if label in existing]
+            if labels:
+                inp[REPORT][key] = labels
+            else:
+                del inp[REPORT][key]
+
+    if isinstance(inp[REPORT].get(ReportSection.KEYS.LID), list):
+        # LID entries are a list of [name, subcatchment, filename]
+        lids = [lid for lid in inp[REPORT][ReportSection.KEYS.LID] if lid[1] in objects[ReportSection.KEYS.SUBCATCHMENTS]]
+        if lids:
+            inp[REPORT][ReportSection.KEYS.LID] = lids
+        else:
+            del inp[REPORT][ReportSection.KEYS.LID]
+
+
 def create_sub_inp(inp, nodes):
     """
     split model network and only keep nodes.
@@ -167,6 +212,7 @@ def create_sub_inp(inp, nodes):
     inp = filter_nodes(inp, nodes)
     inp = filter_links_within_nodes(inp, nodes)
     inp = filter_subcatchments(inp, nodes)
+    filter_report(inp)
 
     # __________________________________________
     reduce_controls(inp)
@@ -1,10 +1,14 @@
-from networkx import DiGraph, all_simple_paths, subgraph, node_connected_component
+from typing import TYPE_CHECKING
 
 from ..inp import SwmmInput
 from .collection import nodes_dict, links_dict
 from .filter import create_sub_inp
 from ..section_labels import SUBCATCHMENTS
 
+if TYPE_CHECKING:
+    # only for the annotations (networkx is imported lazily, when a graph is created)
+    import networkx
+
 
 def inp_to_graph(inp):
     """
@@ -16,6 +20,8 @@ def inp_to_graph(inp):
     Returns:
         networkx.DiGraph: networkx graph of the model
     """
+    from networkx import DiGraph
+
     # g = nx.Graph()
     g = DiGraph()
     for node in nodes_dict(inp).keys():
@@ -30,11 +36,15 @@ def inp_to_graph(inp):
 
 
 def get_path(g, start, end):
+    from networkx import all_simple_paths
+
     # dijkstra_path(g, start, end)
     return list(all_simple_paths(g, start, end))[0]
 
 
 def get_path_subgraph(base, start, end):
+    from networkx import subgraph
+
     g = inp_to_graph(base) if isinstance(base, SwmmInput) else base
     sub_list = get_path(g, start=start, end=end)
     sub_graph = subgraph(g, sub_list)
@@ -113,7 +123,7 @@ def downstream_nodes(graph, node):
     return _downstream_nodes(graph,  node)
 
 
-def _downstream_nodes(graph: DiGraph, node: str, node_list=None) -> list:
+def _downstream_nodes(graph: 'networkx.DiGraph', node: str, node_list=None) -> list:
     if node_list is None:
         node_list = []
     node_list.append(node)
@@ -142,7 +152,7 @@ def upstream_nodes(graph, node):
     return _upstream_nodes(graph,  node)
 
 
-def _upstream_nodes(graph: DiGraph, node: str, node_list=None) -> list:
+def _upstream_nodes(graph: 'networkx.DiGraph', node: str, node_list=None) -> list:
     if node_list is None:
         node_list = []
     node_list.append(node)
@@ -184,6 +194,8 @@ def split_network(inp, keep_node, split_at_node=None, keep_split_node=True, grap
     Returns:
         SwmmInput: filtered inp-file data
     """
+    from networkx import DiGraph, subgraph, node_connected_component
+
     if graph is None:
         graph = inp_to_graph(inp)
 
@@ -269,6 +281,8 @@ def inp_to_graph2(inp):
     Returns:
         networkx.DiGraph: networkx graph of the model
     """
+    from networkx import DiGraph
+
     # g = nx.Graph()
     g = DiGraph()
     for node_label, node in nodes_dict(inp).items():
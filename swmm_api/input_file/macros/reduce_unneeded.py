@@ -38,7 +38,7 @@ def reduce_pattern(inp):
 
     if AQUIFERS in inp:
         #  optional monthly time pattern used to adjust the upper zone evaporation fraction
-        used_pattern |= set(inp[AQUIFERS].frame['Epat'].dropna().values)
+        used_pattern |= set(inp[AQUIFERS].frame['pattern'].dropna().values)
 
     if INFLOWS in inp:
         #  optional time pattern used to adjust the baseline value on a periodic basis
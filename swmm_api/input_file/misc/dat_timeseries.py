@@ -29,7 +29,11 @@ def write_swmm_timeseries_data(series, filename, drop_zeros=True):
     with open(filename, 'w') as file:
         file.write(';;EPA SWMM Time Series Data\n')
         ts.index.name = ';date      time'
-        ts.to_csv(file, sep='\t', index=True, header=True, date_format='%m/%d/%Y %H:%M', line_terminator='\n')
+        kwargs = dict(sep='\t', index=True, header=True, date_format='%m/%d/%Y %H:%M')
+        try:
+            ts.to_csv(file, lineterminator='\n', **kwargs)
+        except TypeError:  # pandas < 1.5
+            ts.to_csv(file, line_terminator='\n', **kwargs)
 
 
 def read_swmm_timeseries_data(filename):
@@ -1,3 +1,14 @@
-from .out import read_out_file, SwmmOutput, out2frame
 from .definitions import VARIABLES, OBJECTS
 from . import definitions as OUT
+from .._lazy import lazy_attributes
+
+# the reader is imported on first use, as it depends on pandas
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    'read_out_file': '.out',
+    'SwmmOutput': '.out',
+    'out2frame': '.out',
+    'ensemble_stats': '.ensemble',
+    'compare': '.compare_out',
+}, submodules=['out', 'ensemble', 'compare_out', 'extract', 'parquet', 'frequency'])
+
+__all__ = ['read_out_file', 'SwmmOutput', 'out2frame', 'ensemble_stats', 'compare', 'VARIABLES', 'OBJECTS', 'OUT']
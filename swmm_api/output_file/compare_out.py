@@ -0,0 +1,108 @@
+"""
+comparison of the results of two SWMM output files
+
+i.e. for regression tests of models across SWMM versions or model revisions
+"""
+from numpy import zeros, full, abs, divide, sqrt, nan, where, errstate, maximum
+from pandas import DataFrame, MultiIndex, NaT
+
+from .extract import SwmmExtractValueError, _CHUNK_BYTES
+from .out import SwmmOutput
+
+
+def compare(out_a, out_b, kind=None, variable=None, rtol=1e-5, atol=1e-8):
+    """
+    Compare the results of two out-files per object and variable.
+
+    Both files are read in matching chunks, so only one chunk of both files is held in memory at once.
+    The results of ``out_b`` are used as the reference (i.e. for the relative difference and the NSE).
+
+    Only the objects and variables which are in both files are compared.
+
+    Args:
+        out_a (SwmmOutput | str): out-file or path to out-file
+        out_b (SwmmOutput | str): reference out-file or path to out-file
+        kind (str | list): [``'subcatchment'``, ``'node'`, ``'link'``, ``'system'``]. Default: all object types.
+        variable (str | list): variable names. Default: all variables.
+        rtol (float): relative tolerance to detect diverging values (see :func:`numpy.isclose`)
+        atol (float): absolute tolerance to detect diverging values (see :func:`numpy.isclose`)
+
+    Returns:
+        pandas.DataFrame: comparison with the columns (kind, label, variable) as index and the columns:
+
+            - ``max_abs_diff``: maximum absolute difference
+            - ``max_rel_diff``: maximum relative difference to the reference
+            - ``rmse``: root-mean-square error
+            - ``nse``: Nash–Sutcliffe efficiency
+            - ``first_diverging``: first timestamp where the values differ more than the tolerance
+    """
+    # only the files opened here are closed afterwards
+    opened = []
+    try:
+        if not isinstance(out_a, SwmmOutput):
+            out_a = SwmmOutput(out_a)
+            opened.append(out_a)
+        if not isinstance(out_b, SwmmOutput):
+            out_b = SwmmOutput(out_b)
+            opened.append(out_b)
+        return _compare(out_a, out_b, kind, variable, rtol, atol)
+    finally:
+        for out in opened:
+            out.close()
+
+
+def _compare(out_a, out_b, kind, variable, rtol, atol):
+    """comparison of :func:`compare` with both out-files opened"""
+    if (out_a.start_date != out_b.start_date) or (out_a.report_interval != out_b.report_interval):
+        raise SwmmExtractValueError('The start date or the report interval of the output files differ.')
+
+    columns_b = set(out_b._filter_part_columns(kind, None, variable))
+    columns = [c for c in out_a._filter_part_columns(kind, None, variable) if c in columns_b]
+    n_columns = len(columns)
+
+    n_periods = min(out_a.n_periods, out_b.n_periods)
+    end = out_a._get_timestamps([n_periods - 1])[0] if n_periods else None
+    chunk_size = max(1, _CHUNK_BYTES // max(out_a._bytes_per_period, out_b._bytes_per_period))
+
+    max_abs_diff = zeros(n_columns)
+    max_rel_diff = zeros(n_columns)
+    sum_squared_error = zeros(n_columns)
+    first_diverging = full(n_columns, -1)
+    # sums of the reference shifted by its first value for a numerically stable variance
+    shift = None
+    sum_b = zeros(n_columns)
+    sum_b_squared = zeros(n_columns)
+
+    for (i_chunk, values_a), (_, values_b) in zip(out_a._iter_chunks(columns, end=end, chunk_size=chunk_size),
+                                                  out_b._iter_chunks(columns, end=end, chunk_size=chunk_size)):
+        values_a = values_a.astype(float)
+        values_b = values_b.astype(float)
+        if shift is None:
+            shift = values_b[0].copy()
+
+        abs_diff = abs(values_a - values_b)
+        max_abs_diff = maximum(max_abs_diff, abs_diff.max(axis=0))
+        rel_diff = divide(abs_diff, abs(values_b), out=zeros(abs_diff.shape), where=values_b != 0)
+        max_rel_diff = maximum(max_rel_diff, rel_diff.max(axis=0))
+        sum_squared_error += (abs_diff ** 2).sum(axis=0)
+
+        values_b -= shift
+        sum_b += values_b.sum(axis=0)
+        sum_b_squared += (values_b ** 2).sum(axis=0)
+
+        diverging = abs_diff > (atol + rtol * abs(values_b + shift))
+        new = (first_diverging == -1) & diverging.any(axis=0)
+        first_diverging[new] = i_chunk + diverging[:, new].argmax(axis=0)
+
+    with errstate(divide='ignore', invalid='ignore'):
+        sum_squared_deviation = sum_b_squared - sum_b ** 2 / n_periods
+        nse = where(sum_squared_deviation > 0, 1 - sum_squared_error / sum_squared_deviation, nan)
+
+    timestamps = list(out_a._get_timestamps(first_diverging.clip(0)))
+    return DataFrame({
+        'max_abs_diff': max_abs_diff,
+        'max_rel_diff': max_rel_diff,
+        'rmse': sqrt(sum_squared_error / max(n_periods, 1)),
+        'nse': nse,
+        'first_diverging': [t if i != -1 else NaT for t, i in zip(timestamps, first_diverging)],
+    }, index=MultiIndex.from_tuples(columns, names=['kind', 'label', 'variable']))
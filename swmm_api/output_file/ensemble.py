@@ -0,0 +1,120 @@
+"""
+statistics over an ensemble of SWMM output files with an identical model structure
+
+i.e. for Monte Carlo simulations or rainfall ensembles
+"""
+import struct
+from io import SEEK_END
+from multiprocessing.dummy import Pool
+
+from numpy import empty, frombuffer, array, quantile
+from pandas import DataFrame, MultiIndex
+
+from .extract import SwmmExtractValueError, _RECORDSIZE, _MAGIC_NUMBER
+from .out import SwmmOutput
+
+
+def _read_signature(filename):
+    """
+    read the parts of the header of an out-file which define the structure of the results
+
+    Only raw bytes are read and compared, so the header has not to be parsed for every file.
+
+    Args:
+        filename (str): path to the out-file
+
+    Returns:
+        tuple[bytes, int]: signature of the file (flow unit, number of objects, labels, start date and report interval)
+            and number of periods
+    """
+    with open(filename, 'rb') as f:
+        f.seek(-6 * _RECORDSIZE, SEEK_END)
+        pos_labels, pos_input, pos_output, n_periods, error_code, magic_num = struct.unpack('6i', f.read(6 * _RECORDSIZE))
+        if (magic_num != _MAGIC_NUMBER) or (error_code != 0):
+            raise SwmmExtractValueError(f'The output file "{filename}" indicates a problem with the run.')
+        f.seek(2 * _RECORDSIZE)
+        signature = f.read(5 * _RECORDSIZE)
+        f.seek(pos_labels)
+        signature += f.read(pos_input - pos_labels)
+        f.seek(pos_output - 3 * _RECORDSIZE)
+        signature += f.read(3 * _RECORDSIZE)
+    return signature, n_periods
+
+
+def ensemble_stats(files, kind, variable, quantiles=(0.05, 0.5, 0.95), labels=None, threshold=None,
+                   processes=4, max_memory=2 ** 28):
+    """
+    Get the statistics per object and period over an ensemble of out-files with an identical model structure.
+
+    The headers of the files are read in parallel and checked once for compatibility.
+    The results are read in chunks of periods, so the memory usage is bounded by ``max_memory``
+    regardless of the number of files.
+
+    Args:
+        files (list[str]): paths of the out-files
+        kind (str): [``'subcatchment'``, ``'node'`, ``'link'``, ``'system'``] (predefined in :obj:`swmm_api.output_file.definitions.OBJECTS`)
+        variable (str): variable name (predefined in :obj:`swmm_api.output_file.definitions.VARIABLES`)
+        quantiles (list[float]): quantiles to compute (between 0 and 1)
+        labels (str | list): name of the objects. Default: all objects of the kind.
+        threshold (float): if set, the probability of exceeding this threshold is computed.
+        processes (int): number of files read in parallel
+        max_memory (int): maximum number of bytes of the results of all files held in memory at once
+
+    Returns:
+        pandas.DataFrame: statistics with the datetime as index and the columns
+            (statistic, label) where the statistics are ``'mean'``, ``'std'``, the quantiles and ``'exceedance'``.
+    """
+    files = list(files)
+    if not files:
+        raise SwmmExtractValueError('No output files given for the ensemble.')
+
+    with Pool(processes) as pool:
+        return _ensemble_stats(pool, files, kind, variable, quantiles, labels, threshold, max_memory)
+
+
+def _ensemble_stats(pool, files, kind, variable, quantiles, labels, threshold, max_memory):
+    """statistics of :func:`ensemble_stats` with one thread pool for reading the headers and all chunks"""
+    signatures = pool.map(_read_signature, files)
+
+    signature, n_periods = signatures[0]
+    incompatible = [fn for fn, (s, n) in zip(files, signatures) if (s != signature) or (n != n_periods)]
+    if incompatible:
+        raise SwmmExtractValueError(f'The output files {incompatible} are not compatible with "{files[0]}".')
+
+    with SwmmOutput(files[0]) as out:
+        columns = out._filter_part_columns(kind, labels, variable)
+        index_columns = array(out._get_column_offsets(columns), dtype=int) // _RECORDSIZE
+        bytes_per_period = out._bytes_per_period
+        pos_start_output = out._pos_start_output
+        index = out.index
+
+    n_records = bytes_per_period // _RECORDSIZE
+    n_columns = len(columns)
+    chunk_size = max(1, max_memory // (len(files) * max(n_columns, 1) * _RECORDSIZE))
+
+    statistics = ['mean', 'std'] + list(quantiles) + (['exceedance'] if threshold is not None else [])
+    results = empty((len(statistics), n_periods, n_columns))
+
+    for i_chunk in range(0, n_periods, chunk_size):
+        n = min(chunk_size, n_periods - i_chunk)
+        values = empty((len(files), n, n_columns), dtype='f4')
+
+        def _read_chunk(i_file):
+            with open(files[i_file], 'rb') as f:
+                f.seek(pos_start_output + i_chunk * bytes_per_period)
+                buffer = f.read(n * bytes_per_period)
+            values[i_file] = frombuffer(buffer, dtype='f4', count=n * n_records).reshape(n, n_records)[:, index_columns]
+
+        pool.map(_read_chunk, range(len(files)))
+
+        chunk = slice(i_chunk, i_chunk + n)
+        results[0, chunk] = values.mean(axis=0, dtype=float)
+        results[1, chunk] = values.std(axis=0, dtype=float)
+        if quantiles:
+            results[2:2 + len(quantiles), chunk] = quantile(values, quantiles, axis=0)
+        if threshold is not None:
+            results[-1, chunk] = (values > threshold).mean(axis=0)
+
+    return DataFrame(results.transpose(1, 0, 2).reshape(n_periods, -1), index=index[:n_periods],
+                     columns=MultiIndex.from_product([statistics, [label for _, label, _ in columns]],
+                                                     names=['statistic', 'label']))
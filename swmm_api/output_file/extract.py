@@ -8,12 +8,13 @@
 # Python Version >= 3.7
 
 import copy
+from math import ceil, floor
 from os import remove
 
 import datetime
 import struct
 from io import SEEK_END, SEEK_SET
-from tqdm.auto import tqdm
+from numpy import array, frombuffer
 from warnings import warn
 
 from .definitions import OBJECTS, VARIABLES
@@ -37,6 +38,29 @@ _PROPERTY_LABELS = ['type', 'area', 'invert', 'max_depth', 'offset', 'length']
 _NODES_TYPES = ['JUNCTION', 'OUTFALL', 'STORAGE', 'DIVIDER']
 _LINK_TYPES = ['CONDUIT', 'PUMP', 'ORIFICE', 'WEIR', 'OUTLET']
 
+# maximum number of bytes read at once when iterating over the results in chunks
+_CHUNK_BYTES = 2 ** 26
+
+# factor to convert the flow unit times seconds to the volume unit of the report-file (10^6 ltr | 10^6 gal)
+_VOLUME_FACTORS = {
+    'CMS': 1e-3,  # m³ > 10^6 ltr
+    'LPS': 1e-6,  # ltr > 10^6 ltr
+    'MLD': 1 / 86400,  # 10^6 ltr/day * s > 10^6 ltr
+    'CFS': 7.48052e-6,  # ft³ > 10^6 gal
+    'GPM': 1 / 60e6,  # gal/min * s > 10^6 gal
+    'MGD': 1 / 86400,  # 10^6 gal/day * s > 10^6 gal
+}
+
+# variables which are flow rates in the flow unit of the model
+_FLOW_VARIABLES = {
+    OBJECTS.SUBCATCHMENT: [VARIABLES.SUBCATCHMENT.RUNOFF, VARIABLES.SUBCATCHMENT.GW_OUTFLOW],
+    OBJECTS.NODE        : [VARIABLES.NODE.LATERAL_INFLOW, VARIABLES.NODE.TOTAL_INFLOW, VARIABLES.NODE.FLOODING],
+    OBJECTS.LINK        : [VARIABLES.LINK.FLOW],
+    OBJECTS.SYSTEM      : [VARIABLES.SYSTEM.RUNOFF, VARIABLES.SYSTEM.DW_INFLOW, VARIABLES.SYSTEM.GW_INFLOW,
+                           VARIABLES.SYSTEM.RDII_INFLOW, VARIABLES.SYSTEM.DIRECT_INFLOW,
+                           VARIABLES.SYSTEM.LATERAL_INFLOW, VARIABLES.SYSTEM.FLOODING, VARIABLES.SYSTEM.OUTFLOW],
+}
+
 
 class SwmmExtractValueError(Exception):
     def __init__(self, message):
@@ -231,18 +255,15 @@ class SwmmOutExtract(BinaryReader):
         _bytes_per_period *= _RECORDSIZE
         return _bytes_per_period
 
-    def _get_selective_results(self, columns):
+    def _get_column_offsets(self, columns):
         """
-        get results of selective columns in .out-file
-
-        this function is due to its iterative reading slow,
-        but has it advantages with out-files with many columns (>1000) and fewer time-steps
+        get the position of selective columns within the record of one period
 
         Args:
             columns (list[tuple]): list of column identifier tuple with [(kind, label, variable), ...]
 
         Returns:
-            dict[str, list]: dictionary where keys are the column names ('/' as separator) and values are the list of result values
+            list[int]: list of the byte-offset of each column in a period
         """
         n_vars_subcatch = len(self.variables[OBJECTS.SUBCATCHMENT])
         n_vars_node = len(self.variables[OBJECTS.NODE])
@@ -253,11 +274,8 @@ class SwmmOutExtract(BinaryReader):
         n_links = len(self.labels[OBJECTS.LINK])
 
         offset_list = []
-        values = {}
 
         for kind, label, variable in columns:
-            values['/'.join([kind, label, variable])] = []
-
             index_kind = OBJECTS.LIST_.index(kind)
             index_variable = self.variables[kind].index(variable)
             item_index = self.labels[kind].index(str(label))
@@ -272,6 +290,25 @@ class SwmmOutExtract(BinaryReader):
                     n_nodes * n_vars_node +
                     n_links * n_vars_link)
             }[index_kind])*_RECORDSIZE)
+        return offset_list
+
+    def _get_selective_results(self, columns):
+        """
+        get results of selective columns in .out-file
+
+        this function is due to its iterative reading slow,
+        but has it advantages with out-files with many columns (>1000) and fewer time-steps
+
+        Args:
+            columns (list[tuple]): list of column identifier tuple with [(kind, label, variable), ...]
+
+        Returns:
+            dict[str, list]: dictionary where keys are the column names ('/' as separator) and values are the list of result values
+        """
+        from tqdm.auto import tqdm
+
+        values = {'/'.join([kind, label, variable]): [] for kind, label, variable in columns}
+        offset_list = self._get_column_offsets(columns)
 
         # offset_list = [o*_RECORDSIZE for o in offset_list]
         # cols = list(values.keys())
@@ -291,6 +328,100 @@ class SwmmOutExtract(BinaryReader):
 
         return values
 
+    def _get_period_range(self, start=None, end=None):
+        """
+        get the positions of the periods within a time range
+
+        Args:
+            start (datetime.datetime | str): first timestamp of the range. Default: first period of the file.
+            end (datetime.datetime | str): last timestamp of the range (inclusive). Default: last period of the file.
+
+        Returns:
+            tuple[int, int]: position of the first period and position after the last period of the range
+        """
+        first_date = self.start_date + self.report_interval
+
+        def _position(timestamp):
+            if isinstance(timestamp, str):
+                timestamp = datetime.datetime.fromisoformat(timestamp)
+            return (timestamp - first_date) / self.report_interval
+
+        i_start = 0 if start is None else max(0, ceil(_position(start)))
+        i_end = self.n_periods if end is None else min(self.n_periods, floor(_position(end)) + 1)
+        return i_start, max(i_start, i_end)
+
+    def _iter_chunks(self, columns, start=None, end=None, chunk_size=None):
+        """
+        iterate over the results of selective columns in chunks of consecutive periods
+
+        Only the values of one chunk are held in memory at once.
+
+        Args:
+            columns (list[tuple]): list of column identifier tuple with [(kind, label, variable), ...]
+            start (datetime.datetime | str): first timestamp to read. Default: first period of the file.
+            end (datetime.datetime | str): last timestamp to read. Default: last period of the file.
+            chunk_size (int): number of periods per chunk. Default: as many periods as fit in 64 MB.
+
+        Yields:
+            tuple[int, numpy.ndarray]: position of the first period of the chunk
+                and the values of the chunk with the shape (periods, columns)
+        """
+        i_start, i_end = self._get_period_range(start, end)
+        index_columns = array(self._get_column_offsets(columns), dtype=int) // _RECORDSIZE
+        n_records = self._bytes_per_period // _RECORDSIZE
+
+        if chunk_size is None:
+            chunk_size = max(1, _CHUNK_BYTES // self._bytes_per_period)
+
+        for i in range(i_start, i_end, chunk_size):
+            self._set_position(self._pos_start_output + i * self._bytes_per_period)
+            buffer = self.fp.read(min(chunk_size, i_end - i) * self._bytes_per_period)
+            n = len(buffer) // self._bytes_per_period
+            if n == 0:
+                break
+            yield i, frombuffer(buffer, dtype='f4', count=n * n_records).reshape(n, n_records)[:, index_columns]
+
+    def _get_period_values(self, timestamp, kind):
+        """
+        get the results of all objects of a type for a single period
+
+        Only the record of this period is read from the file.
+
+        Args:
+            timestamp (datetime.datetime | str): timestamp of the period
+            kind (str): ["subcatchment", "node", "link", "system"]
+
+        Returns:
+            numpy.ndarray: values with the shape (labels, variables)
+        """
+        i_start, i_end = self._get_period_range(timestamp, timestamp)
+        if i_start == i_end:
+            raise SwmmExtractValueError(f'Timestamp "{timestamp}" not in the output file.')
+
+        n_labels = len(self.labels[kind])
+        n_variables = len(self.variables[kind])
+        index_first = self._get_column_offsets([(kind, self.labels[kind][0], self.variables[kind][0])])[0] // _RECORDSIZE
+
+        self._set_position(self._pos_start_output + i_start * self._bytes_per_period)
+        values = frombuffer(self.fp.read(self._bytes_per_period), dtype='f4')
+        return values[index_first:index_first + n_labels * n_variables].reshape(n_labels, n_variables)
+
+    def _get_volume_factor(self, kind, variable):
+        """
+        get the factor to convert the integral of a variable over seconds to a volume
+
+        Args:
+            kind (str): ["subcatchment", "node", "link", "system"]
+            variable (str): variable name
+
+        Returns:
+            float: factor to convert a flow rate times seconds to the volume unit of the report-file
+                (``10^6 ltr`` | ``10^6 gal``) or ``1`` if the variable is not a flow rate.
+        """
+        if variable in _FLOW_VARIABLES.get(kind, []):
+            return _VOLUME_FACTORS[self.flow_unit]
+        return 1
+
     def _infer_n_periods(self):
         not_done = True
         period = 0
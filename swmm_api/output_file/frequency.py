@@ -0,0 +1,61 @@
+"""
+frequency analysis of annual maxima
+
+i.e. for the results of :meth:`swmm_api.output_file.out.SwmmOutput.annual_maxima`
+"""
+from math import pi, sqrt, log
+
+from pandas import DataFrame
+
+# Euler–Mascheroni constant
+_EULER = 0.5772156649
+
+# parameters (a) of the plotting position formula: T = (n + 1 - 2a) / (m - a)
+_PLOTTING_POSITIONS = {
+    'weibull': 0,
+    'gringorten': 0.44,
+    'hazen': 0.5,
+}
+
+
+def empirical_return_periods(annual_maxima, method='weibull'):
+    """
+    Get the empirical return period of every annual maximum based on its rank.
+
+    Args:
+        annual_maxima (pandas.DataFrame): annual maxima with the years as index and the objects as columns
+        method (str): plotting position formula. One of [``'weibull'``, ``'gringorten'``, ``'hazen'``]
+
+    Returns:
+        pandas.DataFrame: return period in years of each annual maximum (same shape as ``annual_maxima``)
+    """
+    a = _PLOTTING_POSITIONS[method]
+    rank = annual_maxima.rank(ascending=False, method='first')
+    n = annual_maxima.count()
+    return (n + 1 - 2 * a) / (rank - a)
+
+
+def return_period_values(annual_maxima, return_periods=(2, 5, 10, 20, 50, 100)):
+    """
+    Estimate the values for specific return periods with a Gumbel distribution fitted to the annual maxima.
+
+    The parameters of the distribution are estimated with the method of moments.
+
+    Args:
+        annual_maxima (pandas.DataFrame): annual maxima with the years as index and the objects as columns
+        return_periods (list[float]): return periods in years
+
+    Returns:
+        pandas.DataFrame: estimated values with the return periods as index and the objects as columns
+
+    Raises:
+        ValueError: if a return period is not greater than 1 year
+    """
+    if any(t <= 1 for t in return_periods):
+        raise ValueError('return periods must be > 1 year')
+
+    scale = annual_maxima.std() * sqrt(6) / pi
+    location = annual_maxima.mean() - _EULER * scale
+    values = DataFrame({t: location - scale * log(-log(1 - 1 / t)) for t in return_periods}).T
+    values.index.name = 'return_period'
+    return values
@@ -7,8 +7,9 @@ __license__ = "MIT"
 
 import datetime
 from itertools import product
-from numpy import dtype, fromfile, frombuffer
-from pandas import date_range, DataFrame, MultiIndex
+from numpy import dtype, fromfile, frombuffer, zeros, diff, vstack, nonzero, flatnonzero, concatenate, lexsort, \
+    add, maximum, append, array, full, nan, fmax, unique, searchsorted
+from pandas import date_range, DataFrame, MultiIndex, Series, Index
 from pandas._libs import OutOfBoundsDatetime
 
 from .extract import SwmmOutExtract
@@ -263,8 +264,8 @@ class SwmmOutput(SwmmOutExtract):
             if data.size == 0:
                 return DataFrame()
 
-            if data.shape[0] != self.index.size:
-                data = data[:self.index.size]
+            if data.shape[0] != len(self.index):
+                data = data[:len(self.index)]
 
             df = DataFrame(data, index=self.index, dtype=float)
 
@@ -278,6 +279,216 @@ class SwmmOutput(SwmmOutExtract):
 
         return df
 
+    def get_period(self, timestamp, kind):
+        """
+        Get the results of all objects of a type at a single timestamp.
+
+        Only the data of this period is read from the file.
+
+        Args:
+            timestamp (datetime.datetime | str): timestamp of the period
+            kind (str): [``'subcatchment'``, ``'node'`, ``'link'``, ``'system'``] (predefined in :obj:`swmm_api.output_file.definitions.OBJECTS`)
+
+        Returns:
+            pandas.DataFrame: data with the object labels as index and the variables as columns
+        """
+        return DataFrame(self._get_period_values(timestamp, kind), index=self.labels[kind],
+                         columns=self.variables[kind], dtype=float)
+
+    def integrate(self, kind, variable, labels=None, start=None, end=None, method='step'):
+        """
+        Integrate the results of objects over time, i.e. to get the total flooding, overflow or inflow volume.
+
+        The data is read chunk by chunk, so that the full timeseries is never held in memory.
+
+        Flow rates are converted to the volume unit of the report-file
+        (``10^6 ltr`` for metric and ``10^6 gal`` for US flow units).
+        All other variables are integrated over seconds.
+
+        Args:
+            kind (str): [``'subcatchment'``, ``'node'`, ``'link'``, ``'system'``] (predefined in :obj:`swmm_api.output_file.definitions.OBJECTS`)
+            variable (str): variable name (predefined in :obj:`swmm_api.output_file.definitions.VARIABLES`)
+            labels (str | list): name of the objects. Default: all objects of the kind.
+            start (datetime.datetime | str): first timestamp to integrate. Default: start of the results.
+            end (datetime.datetime | str): last timestamp to integrate. Default: end of the results.
+            method (str): integration rule. One of
+
+                - ``'step'``: sum of the values times the report interval (default)
+                - ``'trapezoidal'``: trapezoidal rule between the reported values
+
+        Returns:
+            pandas.Series: integrated values per object label
+        """
+        if method not in ('step', 'trapezoidal'):
+            raise NotImplementedError(f'Integration method "{method}" not implemented. Use "step" or "trapezoidal".')
+
+        columns = self._filter_part_columns(kind, labels, variable)
+        total = zeros(len(columns))
+        first = last = None
+        for _, values in self._iter_chunks(columns, start=start, end=end):
+            total += values.sum(axis=0, dtype=float)
+            if first is None:
+                first = values[0]
+            last = values[-1]
+
+        if (method == 'trapezoidal') and (first is not None):
+            total -= (first.astype(float) + last) / 2
+
+        total *= self.report_interval.total_seconds() * self._get_volume_factor(kind, variable)
+        return Series(total, index=[label for _, label, _ in columns], name=variable)
+
+    def _get_timestamps(self, positions):
+        """
+        get the timestamps of the periods at the given positions
+
+        Args:
+            positions (list[int] | numpy.ndarray): positions of the periods
+
+        Returns:
+            pandas.DatetimeIndex | list[datetime.datetime]: timestamps
+        """
+        if isinstance(self.index, list):
+            return [self.index[i] for i in positions]
+        return self.index[array(positions, dtype=int)]
+
+    def events(self, kind, labels, variable, threshold=0, min_gap=None, start=None, end=None):
+        """
+        Get all events where the results of the objects exceed a threshold, i.e. overflow events of outfalls or weirs.
+
+        The events are detected in one pass over the data chunk by chunk.
+        Events which continue over the border of a chunk are carried over to the next chunk.
+
+        Args:
+            kind (str): [``'subcatchment'``, ``'node'`, ``'link'``, ``'system'``] (predefined in :obj:`swmm_api.output_file.definitions.OBJECTS`)
+            labels (str | list | None): name of the objects. ``None`` for all objects of the kind.
+            variable (str): variable name (predefined in :obj:`swmm_api.output_file.definitions.VARIABLES`)
+            threshold (float): an event is a period where the values are greater than this threshold.
+            min_gap (datetime.timedelta): events of an object are merged if the time between them is less than this gap.
+                Default: only consecutive periods are merged.
+            start (datetime.datetime | str): first timestamp to analyse. Default: start of the results.
+            end (datetime.datetime | str): last timestamp to analyse. Default: end of the results.
+
+        Returns:
+            pandas.DataFrame: table of the events (empty if the threshold is never exceeded) with the columns:
+
+                - ``label``: name of the object
+                - ``start``: first timestamp of the event
+                - ``end``: last timestamp of the event
+                - ``duration``: duration of the event as timedelta
+                - ``peak``: maximum value during the event
+                - ``volume``: integrated values during the event (see :meth:`SwmmOutput.integrate`)
+        """
+        columns = self._filter_part_columns(kind, labels, variable)
+        gap_periods = 0 if min_gap is None else min_gap / self.report_interval
+
+        # state of the currently open event per column (start=-1 if there is none)
+        event_start = [-1] * len(columns)
+        event_end = [0] * len(columns)
+        event_peak = [0.] * len(columns)
+        event_sum = [0.] * len(columns)
+        previous = zeros(len(columns), dtype=bool)
+
+        finished = []
+
+        for i_chunk, values in self._iter_chunks(columns, start=start, end=end):
+            n = values.shape[0]
+            exceeding = values > threshold
+            edges = diff(vstack([previous, exceeding]).astype('i1'), axis=0)
+
+            # segments where the threshold is exceeded within the chunk (sorted by column and start)
+            cols_start, rows_start = nonzero(edges.T == 1)
+            cols_end, rows_end = nonzero(edges.T == -1)
+
+            cols_continued = flatnonzero(previous)
+            cols_start = concatenate([cols_start, cols_continued])
+            rows_start = concatenate([rows_start, zeros(cols_continued.size, dtype=int)])
+            order = lexsort((rows_start, cols_start))
+            cols_start, rows_start = cols_start[order], rows_start[order]
+
+            cols_open = flatnonzero(exceeding[-1])
+            cols_end = concatenate([cols_end, cols_open])
+            rows_end = concatenate([rows_end, [n] * cols_open.size]).astype(int)
+            rows_end = rows_end[lexsort((rows_end, cols_end))]
+
+            # events which ended right at the border of the last chunk
+            not_empty = rows_end > rows_start
+            cols_start, rows_start, rows_end = cols_start[not_empty], rows_start[not_empty], rows_end[not_empty]
+
+            # peak and sum per segment with values in column-major order
+            flat = append(values.T.astype(float).ravel(), 0)
+            bounds = vstack([cols_start * n + rows_start, cols_start * n + rows_end]).T.ravel()
+            peaks = maximum.reduceat(flat, bounds)[::2] if bounds.size else []
+            sums = add.reduceat(flat, bounds)[::2] if bounds.size else []
+
+            for c, s, e, peak, sum_ in zip(cols_start.tolist(), (rows_start + i_chunk).tolist(),
+                                           (rows_end + i_chunk).tolist(), list(peaks), list(sums)):
+                if (event_start[c] != -1) and ((s == event_end[c]) or (s - event_end[c] < gap_periods)):
+                    event_end[c] = e
+                    event_peak[c] = max(event_peak[c], peak)
+                    event_sum[c] += sum_
+                else:
+                    if event_start[c] != -1:
+                        finished.append((c, event_start[c], event_end[c], event_peak[c], event_sum[c]))
+                    event_start[c], event_end[c], event_peak[c], event_sum[c] = s, e, peak, sum_
+
+            previous = exceeding[-1]
+
+        finished += [(c, event_start[c], event_end[c], event_peak[c], event_sum[c])
+                     for c in range(len(columns)) if event_start[c] != -1]
+        finished.sort()
+
+        if not finished:
+            # typed columns, as an empty frame from records has only object columns
+            return DataFrame({'label': Series(dtype=object),
+                              'start': Series(dtype='datetime64[ns]'),
+                              'end': Series(dtype='datetime64[ns]'),
+                              'duration': Series(dtype='timedelta64[ns]'),
+                              'peak': Series(dtype=float),
+                              'volume': Series(dtype=float)})
+
+        df = DataFrame.from_records(finished, columns=['column', 'start', 'end', 'peak', 'volume'])
+        df.insert(0, 'label', [columns[c][1] for c in df['column']])
+        df['duration'] = (df['end'] - df['start']) * self.report_interval
+        df['start'] = self._get_timestamps(df['start'])
+        df['end'] = self._get_timestamps(df['end'] - 1)
+        df['volume'] *= self.report_interval.total_seconds() * self._get_volume_factor(kind, variable)
+        return df[['label', 'start', 'end', 'duration', 'peak', 'volume']]
+
+    def annual_maxima(self, kind, variable, labels=None):
+        """
+        Get the maximum value of each year for the objects, i.e. to verify the design of the network.
+
+        The maxima are computed in one pass over the data chunk by chunk.
+
+        Use :func:`swmm_api.output_file.frequency.return_period_values`
+        to estimate the values for specific return periods based on the annual maxima.
+
+        Args:
+            kind (str): [``'subcatchment'``, ``'node'`, ``'link'``, ``'system'``] (predefined in :obj:`swmm_api.output_file.definitions.OBJECTS`)
+            variable (str): variable name (predefined in :obj:`swmm_api.output_file.definitions.VARIABLES`)
+            labels (str | list): name of the objects. Default: all objects of the kind.
+
+        Returns:
+            pandas.DataFrame: annual maxima with the years as index and the object labels as columns
+        """
+        columns = self._filter_part_columns(kind, labels, variable)
+
+        if isinstance(self.index, list):
+            years_per_period = array([t.year for t in self.index])
+        else:
+            years_per_period = self.index.year.values
+        years = unique(years_per_period)
+
+        maxima = full((years.size, len(columns)), nan)
+        for i_chunk, values in self._iter_chunks(columns):
+            years_chunk = years_per_period[i_chunk:i_chunk + values.shape[0]]
+            # position of the first period of each year in the chunk
+            bounds = concatenate([[0], flatnonzero(diff(years_chunk)) + 1])
+            rows = searchsorted(years, years_chunk[bounds])
+            maxima[rows] = fmax(maxima[rows], maximum.reduceat(values, bounds, axis=0))
+
+        return DataFrame(maxima, index=Index(years, name='year'), columns=[label for _, label, _ in columns])
+
     def to_parquet(self):
         """
         Write the data in a parquet file.
@@ -1 +1,10 @@
-from .rpt import read_rpt_file, SwmmReport
+from .messages import read_rpt_messages
+from .._lazy import lazy_attributes
+
+# the reader is imported on first use, as it depends on pandas
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    'read_rpt_file': '.rpt',
+    'SwmmReport': '.rpt',
+}, submodules=['rpt', 'helpers'])
+
+__all__ = ['read_rpt_file', 'read_rpt_messages', 'SwmmReport']
@@ -0,0 +1,72 @@
+import re
+
+# error and warning lines of the report file, i.e. "  ERROR 200: one or more errors detected in input file."
+_MESSAGE_LINE = re.compile(r'^\s*(ERROR|WARNING) \d+:')
+
+
+def _errors_to_dict(lines):
+    """
+    Group the error lines by error.
+
+    Args:
+        lines (list[str]): lines of the report file
+
+    Returns:
+        dict[str, list[str]]: messages per error
+    """
+    di = {}
+    for line in lines:
+        line = line.strip()
+        if line.startswith('ERROR'):
+            label, txt = line.split(':', 1)
+            if label in di:
+                di[label].append(txt)
+            else:
+                di[label] = [txt]
+    return di
+
+
+def _warnings_to_dict(lines):
+    """
+    Group the warning lines by warning.
+
+    Args:
+        lines (list[str]): lines of the report file
+
+    Returns:
+        dict[str, (bool | list[str])]: object labels per warning or True for general warnings
+    """
+    di = {}
+    for line in lines:
+        line = line.strip()
+        if line.startswith('WARNING'):
+
+            if ('WARNING 06' in line) or ('WARNING 07' in line):
+                di[line] = True
+            else:
+                *message, object_label = line.split()
+                message = ' '.join(message)
+                if message in di:
+                    di[message].append(object_label)
+                else:
+                    di[message] = [object_label]
+    return di
+
+
+def read_rpt_messages(filename):
+    """
+    Read only the errors and warnings of a SWMM Report file (xxx.rpt).
+
+    Much faster than :meth:`swmm_api.SwmmReport.get_errors` and :meth:`swmm_api.SwmmReport.get_warnings`
+    for large report files, as the file is scanned line by line without splitting the report into its parts.
+
+    Args:
+        filename (str): filename of the report file
+
+    Returns:
+        tuple[dict, dict]: errors and warnings
+            (see :meth:`swmm_api.SwmmReport.get_errors` and :meth:`swmm_api.SwmmReport.get_warnings`)
+    """
+    with open(filename, 'r') as file:
+        lines = [line for line in file if _MESSAGE_LINE.match(line)]
+    return _errors_to_dict(lines), _warnings_to_dict(lines)
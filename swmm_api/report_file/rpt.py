@@ -12,6 +12,7 @@ import pandas as pd
 
 from .helpers import (_get_title_of_part, _remove_lines, _part_to_frame, _continuity_part_to_dict, ReportUnitConversion,
                       _routing_part_to_dict, _quality_continuity_part_to_dict, )
+from .messages import _errors_to_dict, _warnings_to_dict
 
 
 class SwmmReport:
@@ -879,17 +880,9 @@ class SwmmReport:
             dict[str, (str | bool | list[str])]: key is the error and value is a object label, a list of object-label or a bool
         """
         t = self._raw_parts.get('Version+Title', None)
-        di = {}
         if t:
-            for line in t.split('\n'):
-                line = line.strip()
-                if line.startswith('ERROR'):
-                    label, txt = line.split(':', 1)
-                    if label in di:
-                        di[label].append(txt)
-                    else:
-                        di[label] = [txt]
-        return di
+            return _errors_to_dict(t.split('\n'))
+        return {}
 
     def print_errors(self):
         """
@@ -956,22 +949,9 @@ class SwmmReport:
                 conduit flow and junction water depth).
         """
         t = self._raw_parts.get('Version+Title', None)
-        di = {}
         if t:
-            for line in t.split('\n'):
-                line = line.strip()
-                if line.startswith('WARNING'):
-
-                    if ('WARNING 06' in line) or ('WARNING 07' in line):
-                        di[line] = True
-                    else:
-                        *message, object_label = line.split()
-                        message = ' '.join(message)
-                        if message in di:
-                            di[message].append(object_label)
-                        else:
-                            di[message] = [object_label]
-        return di
+            return _warnings_to_dict(t.split('\n'))
+        return {}
 
     def print_warnings(self):
         """
@@ -994,3 +974,4 @@ def read_rpt_file(filename):
         :meth:`SwmmReport.__init__` : Equal functionality.
     """
     return SwmmReport(filename)
+
@@ -5,11 +5,16 @@ __email__ = "markus.pichler@tugraz.at"
 __version__ = "0.1"
 __license__ = "MIT"
 
+import re
+import shutil
 import subprocess
 import os
+import tempfile
+import threading
 from sys import platform as _platform
 
-from swmm_api import SwmmReport
+from swmm_api.report_file import read_rpt_messages
+from swmm_api.run_telemetry import run_measured
 
 
 class SWMMRunError(UserWarning):
@@ -129,6 +134,124 @@ def run_swmm_custom(command_line):
     return shell_output
 
 
+# progress in the console output of SWMM: percent complete or the elapsed day and hour of the simulation
+_PROGRESS_PERCENT = re.compile(rb'(\d+)\s*%')
+_PROGRESS_DAY_HOUR = re.compile(rb'(\d+)\s+hour:\s*(\d+)')
+
+
+def _get_simulation_days(fn_inp):
+    """
+    Get the duration of a simulation in days by reading only the OPTIONS section of the input file.
+
+    Args:
+        fn_inp (str): path to input file
+
+    Returns:
+        float | None: duration of the simulation in days (None if the times are not defined)
+    """
+    import datetime
+    from .input_file.sections import OptionSection
+
+    lines = []
+    in_options = False
+    with open(fn_inp, 'r', encoding='iso-8859-1') as file:
+        for line in file:
+            if line.lstrip().startswith('['):
+                if in_options:
+                    break
+                in_options = line.strip().upper() == '[OPTIONS]'
+            elif in_options:
+                lines.append(line)
+
+    options = OptionSection.from_inp_lines(''.join(lines))
+    try:
+        start = datetime.datetime.combine(options['START_DATE'], options.get('START_TIME', datetime.time(0)))
+        end = datetime.datetime.combine(options['END_DATE'], options.get('END_TIME', datetime.time(0)))
+    except (KeyError, TypeError):
+        return None
+    return (end - start).total_seconds() / 86400
+
+
+def run_swmm_stream(command_line, progress=None, timeout=None):
+    """
+    Run the command line executable and read the console output while the simulation is running.
+
+    The progress messages of SWMM (percent complete or the elapsed day and hour) are passed to the callback.
+
+    Args:
+        command_line (tuple[str, str, str, str]): SWMM executable, INP-, RPT- and OUT-filename
+        progress (callable): function ``f(fraction)`` called with the completed fraction of the simulation (0 to 1)
+            every time it changes
+        timeout (float | None): maximum duration of the simulation in seconds. The process is killed after the timeout.
+
+    Returns:
+        subprocess.CompletedProcess: return code and console output of SWMM
+
+    Raises:
+        subprocess.TimeoutExpired: if the simulation was killed after the timeout
+    """
+    days = None
+    if progress is not None:
+        days = _get_simulation_days(command_line[1])
+
+    process = subprocess.Popen(command_line, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    # read the error output in a thread, so that a full pipe does not block the process
+    stderr = []
+    reader = threading.Thread(target=lambda: stderr.append(process.stderr.read()), daemon=True)
+    reader.start()
+
+    killed = threading.Event()
+
+    def _kill():
+        killed.set()
+        process.kill()
+
+    killer = None
+    if timeout is not None:
+        killer = threading.Timer(timeout, _kill)
+        killer.start()
+
+    stdout = []
+    last = None
+    while True:
+        # returns as soon as SWMM writes something and an empty string when the process ends
+        chunk = os.read(process.stdout.fileno(), 4096)
+        if not chunk:
+            break
+        stdout.append(chunk)
+        if progress is None:
+            continue
+
+        fraction = None
+        percent = _PROGRESS_PERCENT.findall(chunk)
+        if percent:
+            fraction = int(percent[-1]) / 100
+        elif days:
+            day_hour = _PROGRESS_DAY_HOUR.findall(chunk)
+            if day_hour:
+                day, hour = day_hour[-1]
+                fraction = min((int(day) + int(hour) / 24) / days, 1)
+        if (fraction is not None) and (fraction != last):
+            progress(fraction)
+            last = fraction
+
+    process.wait()
+    if killer is not None:
+        killer.cancel()
+    reader.join()
+    process.stdout.close()
+    process.stderr.close()
+
+    stdout = b''.join(stdout)
+    if killed.is_set():
+        raise subprocess.TimeoutExpired(command_line, timeout, stdout, stderr[0])
+
+    if (progress is not None) and (process.returncode == 0) and (last != 1):
+        progress(1.)
+    return subprocess.CompletedProcess(command_line, process.returncode, stdout, stderr[0])
+
+
 def check_swmm_errors(fn_rpt, shell_output):
     msgs = {}
 
@@ -146,10 +269,11 @@ def check_swmm_errors(fn_rpt, shell_output):
         })
 
     if os.path.isfile(fn_rpt):
-        rpt = SwmmReport(fn_rpt)
-        errors = rpt.get_errors()
+        # only the error lines are read, the full report is not needed
+        errors, _ = read_rpt_messages(fn_rpt)
         if errors:
-            msgs['REPORT'] = rpt._pretty_dict(errors)
+            from swmm_api.report_file import SwmmReport
+            msgs['REPORT'] = SwmmReport._pretty_dict(errors)
     else:
         msgs['REPORT'] = 'NO Report file created!!!'
 
@@ -159,7 +283,26 @@ def check_swmm_errors(fn_rpt, shell_output):
         raise SWMMRunError(error_msg)
 
 
-def swmm5_run(inp, rpt_dir=None, out_dir=None, init_print=False, create_out=True, swmm_path=None):
+def get_temp_root(workdir):
+    """
+    Get the directory for temporary simulation files.
+
+    Args:
+        workdir (str | None): ``'tmpfs'`` for a RAM-backed directory (``/dev/shm`` on Linux,
+            otherwise the system temp directory), a path to a directory or None for the system temp directory
+
+    Returns:
+        str | None: path to the directory (None for the system temp directory)
+    """
+    if workdir == 'tmpfs':
+        if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK):
+            return '/dev/shm'
+        return tempfile.gettempdir()
+    return workdir
+
+
+def swmm5_run(inp, rpt_dir=None, out_dir=None, init_print=False, create_out=True, swmm_path=None, telemetry=False,
+              progress=None, timeout=None, workdir=None, extract=None):
     """
     Run a simulation with an EPA-SWMM input-file.
 
@@ -175,22 +318,65 @@ def swmm5_run(inp, rpt_dir=None, out_dir=None, init_print=False, create_out=True
                 UNIX users should place the path to the swmm executable in the system path and name the file 'swmm5'.
                 Default: the api will search in the standard paths for the swmm exe.
                 Be aware that the 'epaswmm5.exe' is the graphical user interface and will not work for this api.
+        telemetry (bool): if the resource usage and the routing statistics of the simulation should be returned
+            (see :class:`swmm_api.run_telemetry.RunTelemetry`)
+        progress (callable): function ``f(fraction)`` called with the completed fraction of the simulation
+            (see :func:`run_swmm_stream`). Not available in combination with ``telemetry`` or ``init_print``.
+        timeout (float | None): maximum duration of the simulation in seconds. The process is killed after the timeout.
+        workdir (str | None): run the simulation in a new temporary directory within this directory
+            (``'tmpfs'`` for a RAM-backed directory, see :func:`get_temp_root`).
+            The input file is copied into the temporary directory, which is deleted after the results are extracted.
+            Requires ``extract``. External files must be referenced with absolute paths in the input file.
+        extract (dict[str, tuple | str]): results to extract after the simulation
+            (see :func:`swmm_api.scenarios.extract_results`). The results are returned instead of the filenames.
 
     Returns:
-        tuple[str, str, str]: INP-, RPT- and OUT-filename
+        tuple[str, str] | dict: RPT- and OUT-filename or the extracted results if ``extract`` is given
+            (and the telemetry as additional item of a tuple if ``telemetry`` is True)
+
+    Raises:
+        subprocess.TimeoutExpired: if the simulation was killed after the timeout
     """
+    if workdir is not None:
+        if extract is None:
+            raise ValueError('A temporary working directory requires the results to extract ("extract").')
+        temp_dir = tempfile.mkdtemp(prefix='swmm_api_', dir=get_temp_root(workdir))
+        try:
+            fn_inp = os.path.join(temp_dir, os.path.basename(inp))
+            shutil.copyfile(inp, fn_inp)
+            return swmm5_run(fn_inp, init_print=init_print, swmm_path=swmm_path, telemetry=telemetry,
+                             progress=progress, timeout=timeout, extract=extract)
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
     command_line, inp, rpt, out = get_swmm_command_line_auto(inp, rpt_dir=rpt_dir, out_dir=out_dir,
                                                              create_out=create_out, swmm_path=swmm_path)
     # -------------------------
-    if init_print:
+    if telemetry:
+        stdout, record = run_measured(command_line, timeout=timeout)
+        if init_print:
+            print(stdout.stdout.decode())
+    elif init_print:
         run_swmm_stdout(command_line)
         stdout = ' '.join(command_line)
+    elif (progress is not None) or (timeout is not None):
+        stdout = run_swmm_stream(command_line, progress=progress, timeout=timeout)
     else:
         stdout = run_swmm_custom(command_line)
 
     # -------------------------
     check_swmm_errors(rpt, stdout)
 
+    if telemetry:
+        record.add_routing_statistics(rpt)
+
+    if extract is not None:
+        from .scenarios import extract_results
+        results = extract_results(out, rpt, extract)
+        return (results, record) if telemetry else results
+
+    if telemetry:
+        return rpt, out, record
     return rpt, out
 
 
@@ -198,6 +384,9 @@ def swmm5_run_parallel(inp_fns, processes=4):
     """
     run multiple swmm models in parallel
 
+    An error in one model stops the whole batch.
+    See :func:`swmm_api.run_batch.run_batch` for timeouts, retries and error isolation.
+
     Args:
         inp_fns (list): list of SWMM modell filenames (.inp-files)
         processes (int): number of parallel processes
@@ -0,0 +1,411 @@
+import hashlib
+import os
+import sqlite3
+import subprocess
+import time
+import traceback
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from multiprocessing import Process, Pipe
+from multiprocessing.connection import wait
+
+from pandas import DataFrame
+from tqdm.auto import tqdm
+
+from .run import get_swmm_command_line_auto, check_swmm_errors, SWMMRunError
+from .run_telemetry import RunTelemetry, run_measured, measure_self
+
+
+class STATUS:
+    """
+    All possible states of a simulation job.
+
+    Attributes:
+        PENDING (str): simulation waiting for a free worker process
+        RUNNING (str): simulation running
+        DONE (str): simulation finished without errors
+        FAILED (str): simulation finished with errors or the worker process crashed
+        TIMEOUT (str): simulation was killed after the timeout
+    """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    TIMEOUT = 'timeout'
+
+
+class ENGINE:
+    """
+    All possible ways to run a simulation.
+
+    Attributes:
+        CLI (str): the command line executable of SWMM (see :func:`swmm_api.run.swmm5_run`)
+        TOOLKIT (str): the python toolkit of SWMM (``swmm-toolkit``, see :func:`swmm_api.run_py.run`)
+    """
+    CLI = 'cli'
+    TOOLKIT = 'toolkit'
+
+
+# seconds the worker process gets to kill the SWMM executable itself after the timeout
+_TIMEOUT_GRACE = 10
+
+# maximum number of characters of the error message stored in the manifest
+_MAX_ERROR_LENGTH = 2000
+
+
+@dataclass
+class RunResult:
+    """
+    Result of a simulation job in a batch run.
+
+    Attributes:
+        inp (str): path to the input file
+        rpt (str): path to the report file
+        out (str): path to the output file (empty string if no out-file was created)
+        status (str): final state of the job (see :class:`STATUS`)
+        returncode (int | None): return code of the SWMM process (None if the job was killed)
+        errors (str | None): error messages of the simulation or the worker process
+        wall_time (float): duration of the last attempt in seconds
+        attempts (int): number of attempts to run the simulation
+        telemetry (RunTelemetry | None): resource usage and routing statistics of the last attempt
+            (None without ``run_batch(..., telemetry=True)``, if the job was killed by the main process
+            or the result is from the manifest)
+    """
+    inp: str
+    rpt: str
+    out: str
+    status: str
+    returncode: int = None
+    errors: str = None
+    wall_time: float = 0.
+    attempts: int = 1
+    telemetry: RunTelemetry = None
+
+    @property
+    def ok(self):
+        """bool: if the simulation finished without errors"""
+        return self.status == STATUS.DONE
+
+
+def _get_file_hash(filename):
+    h = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for block in iter(lambda: f.read(2 ** 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+class BatchManifest:
+    """
+    Record of the state of every job of a batch run in a SQLite database.
+
+    The manifest is updated with every state change of a job.
+    If a batch run is interrupted, the next run with the same manifest only runs the jobs which are not done
+    or whose input file changed in the meantime.
+
+    Attributes:
+        filename (str): path to the manifest file
+    """
+    _COLUMNS = ['inp', 'inp_hash', 'status', 'start', 'end', 'rpt', 'out', 'returncode', 'errors', 'wall_time',
+                'attempts']
+
+    def __init__(self, filename):
+        """
+        Open a new or existing manifest.
+
+        Args:
+            filename (str): path to the manifest file (i.e. ``batch.sqlite`` in the output directory)
+        """
+        self.filename = filename
+        self._connection = sqlite3.connect(filename)
+        self._connection.execute('CREATE TABLE IF NOT EXISTS jobs (inp TEXT PRIMARY KEY, inp_hash TEXT, status TEXT, '
+                                 'start TEXT, end TEXT, rpt TEXT, out TEXT, returncode INTEGER, errors TEXT, '
+                                 'wall_time REAL, attempts INTEGER)')
+        self._connection.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Close the connection to the manifest file."""
+        self._connection.close()
+
+    def get(self, inp):
+        """
+        Get the record of a job.
+
+        Args:
+            inp (str): path to input file
+
+        Returns:
+            dict | None: record of the job or None if the job is not in the manifest
+        """
+        row = self._connection.execute(f'SELECT {", ".join(self._COLUMNS)} FROM jobs WHERE inp = ?', (inp,)).fetchone()
+        if row is None:
+            return None
+        return dict(zip(self._COLUMNS, row))
+
+    def get_result(self, inp, inp_hash, require_out=True):
+        """
+        Get the result of a finished job.
+
+        Args:
+            inp (str): path to input file
+            inp_hash (str): current hash of the input file
+            require_out (bool): if the out-file of the job is needed
+
+        Returns:
+            RunResult | None: result of the job or None if the job is not done, the input file changed
+                or the report- or out-file of the job is missing (i.e. deleted or moved)
+        """
+        record = self.get(inp)
+        if (record is None) or (record['status'] != STATUS.DONE) or (record['inp_hash'] != inp_hash):
+            return None
+        if not (record['rpt'] and os.path.isfile(record['rpt'])):
+            return None
+        if require_out and not (record['out'] and os.path.isfile(record['out'])):
+            return None
+        return RunResult(**{key: record[key] for key in RunResult.__dataclass_fields__ if key in record})
+
+    def set_pending(self, inp, inp_hash):
+        """
+        Add a job to the manifest or reset a job to pending.
+
+        Args:
+            inp (str): path to input file
+            inp_hash (str): current hash of the input file
+        """
+        self._connection.execute('INSERT INTO jobs (inp, inp_hash, status) VALUES (?, ?, ?) '
+                                 'ON CONFLICT (inp) DO UPDATE SET inp_hash = excluded.inp_hash, status = excluded.status, '
+                                 'start = NULL, end = NULL, returncode = NULL, errors = NULL, wall_time = NULL, '
+                                 'attempts = NULL', (inp, inp_hash, STATUS.PENDING))
+        self._connection.commit()
+
+    def set_running(self, inp, attempt):
+        """
+        Mark a job as running.
+
+        Args:
+            inp (str): path to input file
+            attempt (int): number of the attempt to run the simulation
+        """
+        self._connection.execute('UPDATE jobs SET status = ?, start = ?, attempts = ? WHERE inp = ?',
+                                 (STATUS.RUNNING, datetime.now().isoformat(timespec='seconds'), attempt, inp))
+        self._connection.commit()
+
+    def set_result(self, result):
+        """
+        Record the result of a finished job.
+
+        Args:
+            result (RunResult): result of the job
+        """
+        errors = None if result.errors is None else result.errors[-_MAX_ERROR_LENGTH:]
+        self._connection.execute('UPDATE jobs SET status = ?, end = ?, rpt = ?, out = ?, returncode = ?, errors = ?, '
+                                 'wall_time = ?, attempts = ? WHERE inp = ?',
+                                 (result.status, datetime.now().isoformat(timespec='seconds'), result.rpt, result.out,
+                                  result.returncode, errors, result.wall_time, result.attempts, result.inp))
+        self._connection.commit()
+
+    def to_frame(self):
+        """
+        Get the records of all jobs as table.
+
+        Returns:
+            pandas.DataFrame: one row per job
+        """
+        rows = self._connection.execute(f'SELECT {", ".join(self._COLUMNS)} FROM jobs').fetchall()
+        return DataFrame(rows, columns=self._COLUMNS).set_index('inp')
+
+
+def _run_job(engine, command_line, timeout, telemetry, connection):
+    """
+    Run a single simulation in a worker process and send the result to the main process.
+
+    Args:
+        engine (str): way to run the simulation (see :class:`ENGINE`)
+        command_line (tuple[str, str, str, str]): SWMM executable, INP-, RPT- and OUT-filename
+        timeout (float | None): timeout for the command line executable in seconds
+        telemetry (bool): if the resource usage and the routing statistics of the simulation should be recorded
+        connection (multiprocessing.connection.Connection): sending end of the pipe to the main process
+    """
+    swmm_path, inp, rpt, out = command_line
+    result = {'status': STATUS.DONE, 'returncode': None, 'errors': None, 'telemetry': None}
+    try:
+        if engine == ENGINE.CLI:
+            try:
+                if telemetry:
+                    shell_output, result['telemetry'] = run_measured(command_line, timeout=timeout)
+                else:
+                    shell_output = subprocess.run(command_line, capture_output=True, timeout=timeout)
+            except subprocess.TimeoutExpired:
+                # run_measured and subprocess.run kill the SWMM executable
+                result['status'] = STATUS.TIMEOUT
+                result['errors'] = f'Simulation killed after {timeout} seconds.'
+            else:
+                result['returncode'] = shell_output.returncode
+                check_swmm_errors(rpt, shell_output)
+        else:
+            from .run_py import run
+            if telemetry:
+                with measure_self() as result['telemetry']:
+                    run(inp, rpt, out)
+            else:
+                run(inp, rpt, out)
+            result['returncode'] = 0
+
+        if result['telemetry'] is not None:
+            result['telemetry'].add_routing_statistics(rpt)
+
+    except SWMMRunError as e:
+        result['status'] = STATUS.FAILED
+        result['errors'] = str(e)
+
+    except Exception:
+        result['status'] = STATUS.FAILED
+        result['errors'] = traceback.format_exc()
+
+    connection.send(result)
+    connection.close()
+
+
+def run_batch(inp_fns, processes=4, timeout=None, retries=0, retry_on=(STATUS.FAILED, STATUS.TIMEOUT),
+              engine=ENGINE.CLI, rpt_dir=None, out_dir=None, create_out=True, swmm_path=None, show_progress=True,
+              manifest=None, callback=None, telemetry=False):
+    """
+    Run multiple swmm models in parallel worker processes.
+
+    Every simulation runs in its own process, so a crashing or hanging model does not affect the other jobs.
+    Simulations exceeding the timeout are killed. Failed jobs are retried depending on the retry policy.
+    Errors don't stop the batch, but are collected in the results.
+
+    With a manifest file, the state of every job is recorded (see :class:`BatchManifest`).
+    Rerunning an interrupted batch with the same manifest skips the finished jobs.
+
+    Args:
+        inp_fns (list[str]): list of SWMM model filenames (.inp-files)
+        processes (int): maximum number of simulations running at the same time
+        timeout (float | None): maximum duration of a simulation in seconds. Default: no timeout.
+        retries (int): number of retries for a failed job
+        retry_on (tuple[str]): states of a job which trigger a retry (see :class:`STATUS`)
+        engine (str): way to run the simulations (see :class:`ENGINE`). Default: command line executable.
+        rpt_dir (str): directory in which the report-files are written. Default: input-file directory.
+        out_dir (str): directory in which the output-files are written. Default: input-file directory.
+        create_out (bool): if the out-files should be created (only for the command line executable)
+        swmm_path (str): custom path to the command line swmm executable (see :func:`swmm_api.run.swmm5_run`)
+        show_progress (bool): if a progress bar should be shown
+        manifest (str | None): path to the manifest file to resume an interrupted batch run. Default: no manifest.
+        callback (function | None): function called with the :class:`RunResult` of every finished job
+            (in the order the jobs finish, i.e. to report the results while the batch is running)
+        telemetry (bool): if the resource usage and the routing statistics of every simulation should be recorded
+            (see :attr:`RunResult.telemetry`)
+
+    Returns:
+        list[RunResult]: result of every job in the order of the input filenames
+    """
+    if engine not in (ENGINE.CLI, ENGINE.TOOLKIT):
+        raise NotImplementedError(f'Engine "{engine}" not implemented. Use one of {[ENGINE.CLI, ENGINE.TOOLKIT]}.')
+
+    command_lines = []
+    for inp in inp_fns:
+        command_line = get_swmm_command_line_auto(inp, rpt_dir=rpt_dir, out_dir=out_dir,
+                                                  create_out=create_out or (engine == ENGINE.TOOLKIT),
+                                                  swmm_path=swmm_path if engine == ENGINE.CLI else '')[0]
+        command_lines.append(command_line)
+
+    # the worker process gets some time to kill the executable itself
+    deadline_grace = _TIMEOUT_GRACE if engine == ENGINE.CLI else 0
+
+    results = [None] * len(command_lines)
+    pending = deque()
+    running = {}  # connection -> (index, attempt, process, start time)
+    progress = tqdm(total=len(command_lines), desc='swmm5 batch', disable=not show_progress)
+
+    if manifest is not None:
+        manifest = BatchManifest(manifest)
+
+    for index, (_, inp, _, _) in enumerate(command_lines):
+        if manifest is not None:
+            inp_hash = _get_file_hash(inp)
+            results[index] = manifest.get_result(inp, inp_hash, require_out=bool(command_lines[index][3]))
+            if results[index] is not None:
+                progress.update(1)
+                if callback is not None:
+                    callback(results[index])
+                continue
+            manifest.set_pending(inp, inp_hash)
+        pending.append((index, 1))
+
+    def _finish(index, attempt, wall_time, status, returncode=None, errors=None, telemetry=None):
+        if (status in retry_on) and (attempt <= retries):
+            pending.append((index, attempt + 1))
+            return
+        _, inp, rpt, out = command_lines[index]
+        results[index] = RunResult(inp=inp, rpt=rpt, out=out, status=status, returncode=returncode, errors=errors,
+                                   wall_time=wall_time, attempts=attempt, telemetry=telemetry)
+        if manifest is not None:
+            manifest.set_result(results[index])
+        progress.update(1)
+        if callback is not None:
+            callback(results[index])
+
+    while pending or running:
+        while pending and (len(running) < processes):
+            index, attempt = pending.popleft()
+            if manifest is not None:
+                manifest.set_running(command_lines[index][1], attempt)
+            receiver, sender = Pipe(duplex=False)
+            process = Process(target=_run_job, args=(engine, command_lines[index], timeout, telemetry, sender),
+                              daemon=True)
+            process.start()
+            sender.close()
+            running[receiver] = (index, attempt, process, time.perf_counter())
+
+        wait_time = None
+        if timeout is not None:
+            next_start = min(start for *_, start in running.values())
+            wait_time = max(next_start + timeout + deadline_grace - time.perf_counter(), 0)
+
+        for receiver in wait(list(running), timeout=wait_time):
+            index, attempt, process, start = running.pop(receiver)
+            try:
+                result = receiver.recv()
+            except EOFError:
+                result = {'status': STATUS.FAILED, 'returncode': None,
+                          'errors': f'Worker process died with exit code {process.exitcode}.'}
+            process.join()
+            receiver.close()
+            _finish(index, attempt, time.perf_counter() - start, **result)
+
+        if timeout is not None:
+            now = time.perf_counter()
+            for receiver, (index, attempt, process, start) in list(running.items()):
+                if now - start >= timeout + deadline_grace:
+                    process.terminate()
+                    process.join()
+                    receiver.close()
+                    del running[receiver]
+                    _finish(index, attempt, now - start, STATUS.TIMEOUT,
+                            errors=f'Simulation killed after {timeout} seconds.')
+
+    progress.close()
+    if manifest is not None:
+        manifest.close()
+    return results
+
+
+def results_summary(results):
+    """
+    Get a table of the results of a batch run.
+
+    Args:
+        results (list[RunResult]): results of :func:`run_batch`
+
+    Returns:
+        pandas.DataFrame: one row per job with the attributes of the :class:`RunResult` as columns
+    """
+    return DataFrame([r.__dict__ for r in results], columns=list(RunResult.__dataclass_fields__))
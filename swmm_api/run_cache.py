@@ -0,0 +1,221 @@
+import hashlib
+import os
+import re
+import shutil
+
+from .input_file import SwmmInput, SEC
+from .input_file.sections import TimeseriesFile, RainGage
+from .run import swmm5_run, get_swmm_version_base, infer_swmm_path
+
+# filenames of the results in a cache entry
+_RPT = 'model.rpt'
+_OUT = 'model.out'
+
+# read the external files in blocks to limit the memory usage
+_BLOCK_SIZE = 2 ** 20
+
+
+def _normalized_inp_text(txt):
+    """
+    Normalize the text of an inp-file, so that comments and formatting do not change the hash.
+
+    Args:
+        txt (str): text of the inp-file
+
+    Returns:
+        str: text without comments, empty lines and redundant whitespaces
+    """
+    lines = []
+    for line in txt.splitlines():
+        line = ' '.join(line.split(';', 1)[0].split())
+        if line:
+            lines.append(line)
+    return '\n'.join(lines)
+
+
+def get_external_files(inp, inp_dir=''):
+    """
+    Get all external files which are read in a simulation.
+
+    These are the used files in the ``[FILES]`` section, the files of the time-series in the ``[TIMESERIES]`` section
+    and the rainfall data files in the ``[RAINGAGES]`` section.
+
+    Args:
+        inp (SwmmInput): inp-file data
+        inp_dir (str): directory of the inp-file to resolve relative paths
+
+    Returns:
+        list[str]: list of the paths of the external files
+    """
+    filenames = []
+    if SEC.FILES in inp:
+        filenames += [fn for key, fn in inp.FILES.items() if key.startswith('USE')]
+
+    if SEC.TIMESERIES in inp:
+        filenames += [ts.filename for ts in inp.TIMESERIES.values() if isinstance(ts, TimeseriesFile)]
+
+    if SEC.RAINGAGES in inp:
+        filenames += [rg.Filename for rg in inp.RAINGAGES.values() if rg.Source == RainGage.SOURCES.FILE]
+
+    return [os.path.join(inp_dir, fn) for fn in filenames]
+
+
+class SwmmResultCache:
+    """
+    Content-addressed cache of simulation results.
+
+    The key of a simulation is the hash of the normalized inp-file text,
+    the content of all external files (see :func:`get_external_files`) and the SWMM version.
+    Simulations with a known key are not run again, but the cached report- and output-files are returned.
+    If the cache exceeds the maximum size, the least recently used results are deleted.
+
+    Only the report- and output-file are cached. Saved interface files (i.e. ``SAVE HOTSTART``) are not created on a cache hit.
+
+    Attributes:
+        cache_dir (str): directory of the cache
+        max_size (int | None): maximum size of the cache in bytes. Default: no limit.
+    """
+
+    def __init__(self, cache_dir, max_size=None):
+        """
+        Create a cache for simulation results.
+
+        Args:
+            cache_dir (str): directory of the cache (will be created if it does not exist)
+            max_size (int | None): maximum size of the cache in bytes. Default: no limit.
+        """
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self._swmm_versions = {}
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _get_swmm_version(self, swmm_path=None):
+        if swmm_path is None:
+            swmm_path = infer_swmm_path()
+        if swmm_path not in self._swmm_versions:
+            self._swmm_versions[swmm_path] = get_swmm_version_base(swmm_path)
+        return self._swmm_versions[swmm_path]
+
+    def get_key(self, inp, swmm_path=None):
+        """
+        Get the cache key of a simulation.
+
+        Args:
+            inp (str): path to input file
+            swmm_path (str): custom path to the command line swmm executable (see :func:`swmm_api.run.swmm5_run`)
+
+        Returns:
+            str: hex-digest of the hash of the simulation
+        """
+        with open(inp, 'rb') as f:
+            txt = f.read().decode(errors='replace')
+
+        h = hashlib.sha256()
+        h.update(self._get_swmm_version(swmm_path).encode())
+        h.update(_normalized_inp_text(txt).encode())
+
+        for fn in get_external_files(SwmmInput.read_file(txt, encoding='utf-8'), os.path.dirname(inp)):
+            h.update(fn.encode())
+            if os.path.isfile(fn):
+                with open(fn, 'rb') as f:
+                    for block in iter(lambda: f.read(_BLOCK_SIZE), b''):
+                        h.update(block)
+
+        return h.hexdigest()
+
+    def _entries(self):
+        for key in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, key)
+            if os.path.isdir(path) and re.fullmatch(r'[0-9a-f]{64}', key):
+                yield path
+
+    @staticmethod
+    def _entry_size(path):
+        return sum(os.path.getsize(os.path.join(path, fn)) for fn in os.listdir(path))
+
+    @property
+    def size(self):
+        """int: current size of the cache in bytes"""
+        return sum(self._entry_size(path) for path in self._entries())
+
+    def evict(self, keep=None):
+        """
+        Delete the least recently used results until the cache is smaller than the maximum size.
+
+        Args:
+            keep (str): path of a cache entry which is never deleted (i.e. the latest result)
+        """
+        if self.max_size is None:
+            return
+        entries = sorted(((os.path.getmtime(path), self._entry_size(path), path) for path in self._entries()))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_size:
+                break
+            if path == keep:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        """Delete all results in the cache."""
+        for path in self._entries():
+            shutil.rmtree(path, ignore_errors=True)
+
+    def run(self, inp, init_print=False, swmm_path=None):
+        """
+        Run a simulation or get the results of an identical previous simulation.
+
+        Args:
+            inp (str): path to input file
+            init_print (bool): if the default commandline output should be printed
+            swmm_path (str): custom path to the command line swmm executable (see :func:`swmm_api.run.swmm5_run`)
+
+        Returns:
+            tuple[str, str]: RPT- and OUT-filename in the cache
+        """
+        path = os.path.join(self.cache_dir, self.get_key(inp, swmm_path=swmm_path))
+        fn_rpt, fn_out = os.path.join(path, _RPT), os.path.join(path, _OUT)
+
+        if os.path.isfile(fn_rpt) and os.path.isfile(fn_out):
+            # mark as recently used
+            os.utime(path)
+            return fn_rpt, fn_out
+
+        # run in a temporary directory and move the results at once into the cache,
+        # so that parallel runs never see incomplete results
+        path_temp = f'{path}.{os.getpid()}.tmp'
+        os.makedirs(path_temp, exist_ok=True)
+        try:
+            rpt, out = swmm5_run(inp, rpt_dir=path_temp, out_dir=path_temp, init_print=init_print, swmm_path=swmm_path)
+            os.replace(rpt, os.path.join(path_temp, _RPT))
+            os.replace(out, os.path.join(path_temp, _OUT))
+            try:
+                os.replace(path_temp, path)
+            except OSError:
+                # the same simulation was cached in the meantime by another process
+                pass
+        finally:
+            shutil.rmtree(path_temp, ignore_errors=True)
+
+        self.evict(keep=path)
+        return fn_rpt, fn_out
+
+
+def swmm5_run_cached(inp, cache_dir, max_size=None, init_print=False, swmm_path=None):
+    """
+    Run a simulation with an EPA-SWMM input-file or get the results of an identical previous simulation.
+
+    See :class:`SwmmResultCache` for details.
+
+    Args:
+        inp (str): path to input file
+        cache_dir (str): directory of the cache
+        max_size (int | None): maximum size of the cache in bytes. Default: no limit.
+        init_print (bool): if the default commandline output should be printed
+        swmm_path (str): custom path to the command line swmm executable (see :func:`swmm_api.run.swmm5_run`)
+
+    Returns:
+        tuple[str, str]: RPT- and OUT-filename in the cache
+    """
+    return SwmmResultCache(cache_dir, max_size=max_size).run(inp, init_print=init_print, swmm_path=swmm_path)
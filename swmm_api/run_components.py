@@ -0,0 +1,321 @@
+import os
+
+import numpy as np
+from pandas import DataFrame, concat
+
+from .input_file import SwmmInput, SEC
+from .input_file.sections import Control, FilesSection
+from .input_file.sections.generic_section import line_iter
+from .output_file import SwmmOutput, OBJECTS
+from .output_file.definitions import SYSTEM_VARIABLES
+from .report_file import SwmmReport
+from .run import delete_swmm_files, SWMMRunError
+from .run_batch import run_batch
+
+# system variables which are the sum over all sub-networks
+_SYSTEM_SUM = [SYSTEM_VARIABLES.RUNOFF, SYSTEM_VARIABLES.DW_INFLOW, SYSTEM_VARIABLES.GW_INFLOW,
+               SYSTEM_VARIABLES.RDII_INFLOW, SYSTEM_VARIABLES.DIRECT_INFLOW, SYSTEM_VARIABLES.LATERAL_INFLOW,
+               SYSTEM_VARIABLES.FLOODING, SYSTEM_VARIABLES.OUTFLOW, SYSTEM_VARIABLES.VOLUME]
+# system variables which are averaged over the subcatchment area
+# all other system variables (i.e. air temperature) are identical in all sub-networks
+_SYSTEM_AREA_WEIGHTED = [SYSTEM_VARIABLES.RAINFALL, SYSTEM_VARIABLES.SNOW_DEPTH, SYSTEM_VARIABLES.INFILTRATION]
+
+
+def _subcatchment_node(inp, label):
+    """
+    Get the node which receives the runoff of a subcatchment (over any number of subcatchments).
+
+    Args:
+        inp (SwmmInput): inp-file data
+        label (str): label of the subcatchment
+
+    Returns:
+        str: label of the node
+    """
+    visited = set()
+    while label in inp.SUBCATCHMENTS:
+        if label in visited:
+            raise SWMMRunError(f'The subcatchment "{label}" is part of a routing loop.')
+        visited.add(label)
+        label = inp.SUBCATCHMENTS[label].outlet
+    return label
+
+
+def network_components(inp):
+    """
+    Get the hydraulically independent sub-networks of a model.
+
+    The sub-networks are the weakly connected components of the network graph (see :func:`swmm_api.input_file.macros.inp_to_graph`).
+    Two parts of the network are also connected if
+
+    - a subcatchment is routed to one part and its groundwater or LID underdrain flow to the other,
+    - an outfall of one part is routed to a subcatchment of the other,
+    - a street conduit of one part has an inlet to a node of the other or
+    - a control rule uses objects of both parts.
+
+    Args:
+        inp (SwmmInput): inp-file data
+
+    Returns:
+        list[set[str]]: labels of the nodes per sub-network
+    """
+    from networkx import connected_components
+    from .input_file.macros import inp_to_graph, links_dict, nodes_dict
+
+    graph = inp_to_graph(inp).to_undirected()
+    links = links_dict(inp)
+
+    def _to_node(label):
+        return _subcatchment_node(inp, label) if SEC.SUBCATCHMENTS in inp else label
+
+    if SEC.GROUNDWATER in inp:
+        for gw in inp.GROUNDWATER.values():
+            graph.add_edge(_to_node(gw.subcatchment), gw.node)
+
+    if SEC.LID_USAGE in inp:
+        for lid in inp.LID_USAGE.values():
+            if isinstance(lid.drain_to, str):
+                graph.add_edge(_to_node(lid.subcatchment), _to_node(lid.drain_to))
+
+    if SEC.OUTFALLS in inp:
+        for outfall in inp.OUTFALLS.values():
+            if isinstance(outfall.route_to, str):
+                graph.add_edge(outfall.name, _to_node(outfall.route_to))
+
+    if isinstance(inp.get(SEC.INLET_USAGE), str):
+        # section is not converted: conduit, inlet, node, ...
+        for conduit, _, node, *_ in line_iter(inp[SEC.INLET_USAGE]):
+            if conduit in links:
+                graph.add_edge(links[conduit].from_node, node)
+
+    if SEC.CONTROLS in inp:
+        nodes = nodes_dict(inp)
+        for control in inp.CONTROLS.values():
+            objects = []
+            for part in control.conditions + control.actions:
+                if part.kind == Control.OBJECTS.NODE and part.label in nodes:
+                    objects.append(part.label)
+                elif part.kind != Control.OBJECTS.SIMULATION and part.label in links:
+                    objects.append(links[part.label].from_node)
+            for node in objects[1:]:
+                graph.add_edge(objects[0], node)
+
+    return [set(component) for component in connected_components(graph)]
+
+
+def _filter_inlet_usage(inp):
+    """
+    Remove the inlets of conduits which are not in the network.
+
+    Args:
+        inp (SwmmInput): inp-file data
+
+    .. Important::
+        works inplace
+    """
+    from .input_file.macros import links_dict
+
+    if isinstance(inp.get(SEC.INLET_USAGE), str):
+        links = links_dict(inp)
+        lines = [line for line in inp[SEC.INLET_USAGE].split('\n')
+                 if line.strip().startswith(';') or (line.split() and line.split()[0] in links)]
+        if any(not line.strip().startswith(';') for line in lines):
+            inp[SEC.INLET_USAGE] = '\n'.join(lines)
+        else:
+            del inp[SEC.INLET_USAGE]
+
+
+class ComponentResults:
+    """
+    Combined results of the simulations of the hydraulically independent sub-networks of a model.
+
+    The objects of all sub-networks can be queried like in a single out-file (see :meth:`get_part`)
+    and the summary tables of the reports are concatenated (see :meth:`get_summary`).
+
+    Attributes:
+        components (list[set[str]]): labels of the nodes per sub-network
+        results (list[swmm_api.run_batch.RunResult]): result of the simulation per sub-network
+        areas (list[float]): total area of the subcatchments per sub-network
+    """
+
+    def __init__(self, components, results, areas):
+        """
+        Combine the results of the sub-networks.
+
+        Args:
+            components (list[set[str]]): labels of the nodes per sub-network
+            results (list[swmm_api.run_batch.RunResult]): result of the simulation per sub-network
+            areas (list[float]): total area of the subcatchments per sub-network
+        """
+        self.components = components
+        self.results = results
+        self.areas = areas
+        self._outs = None
+        self._reports = None
+
+    def __repr__(self):
+        return f'ComponentResults({len(self.components)} sub-networks)'
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @property
+    def outs(self):
+        """list[SwmmOutput]: out-file per sub-network"""
+        if self._outs is None:
+            self._outs = [SwmmOutput(result.out) for result in self.results]
+        return self._outs
+
+    @property
+    def reports(self):
+        """list[SwmmReport]: report-file per sub-network"""
+        if self._reports is None:
+            self._reports = [SwmmReport(result.rpt) for result in self.results]
+        return self._reports
+
+    def get_component(self, kind, label):
+        """
+        Get the sub-network of an object.
+
+        Args:
+            kind (str): [``'subcatchment'``, ``'node'`, ``'link'``]
+            label (str): label of the object
+
+        Returns:
+            int: index of the sub-network
+        """
+        for i, out in enumerate(self.outs):
+            if label in out.labels[kind]:
+                return i
+        raise KeyError(f'{kind} "{label}" not found in any sub-network.')
+
+    def _get_system(self, label, variable):
+        data = {}
+        for kind, label, variable in self.outs[0]._filter_part_columns(OBJECTS.SYSTEM, label, variable):
+            column = '/'.join((kind, label, variable))
+            values = np.array([out.to_numpy()[column] for out in self.outs], dtype=float)
+            if variable in _SYSTEM_SUM:
+                data[column] = values.sum(axis=0)
+            elif (variable in _SYSTEM_AREA_WEIGHTED) and sum(self.areas):
+                data[column] = np.average(values, axis=0, weights=self.areas)
+            else:
+                data[column] = values[0]
+        return data
+
+    def get_part(self, kind=None, label=None, variable=None):
+        """
+        Get specific columns of the combined data.
+
+        The system variables are combined over all sub-networks:
+        flows and volumes are summed up, rainfall, snow depth and infiltration are averaged
+        over the subcatchment area and the other variables are taken from the first sub-network.
+
+        Args:
+            kind (str | list): [``'subcatchment'``, ``'node'`, ``'link'``, ``'system'``] (see :meth:`swmm_api.SwmmOutput.get_part`)
+            label (str | list): name of the objects
+            variable (str | list): variable names
+
+        Returns:
+            pandas.DataFrame | pandas.Series: Filtered data.
+                (return Series if only one column is selected otherwise return a DataFrame)
+        """
+        if kind is None:
+            kind = [OBJECTS.SUBCATCHMENT, OBJECTS.NODE, OBJECTS.LINK, OBJECTS.SYSTEM]
+        elif isinstance(kind, str):
+            kind = [kind]
+
+        data = {}
+        for k in kind:
+            if k == OBJECTS.SYSTEM:
+                data.update(self._get_system(label, variable))
+                continue
+            for out in self.outs:
+                columns = out._filter_part_columns(k, label, variable)
+                if columns:
+                    values = out.to_numpy()[list(map('/'.join, columns))]
+                    data.update({column: values[column] for column in values.dtype.names})
+
+        return self.outs[0]._to_pandas(data, drop_useless=True)
+
+    def get_summary(self, name):
+        """
+        Get a part of the reports of all sub-networks.
+
+        Args:
+            name (str): name of the part (a property of :class:`swmm_api.SwmmReport`, i.e. ``'node_flooding_summary'``)
+
+        Returns:
+            pandas.DataFrame | dict[int, dict]: tables of all sub-networks concatenated
+                or the part per index of the sub-network if the part is not a table (i.e. the continuity)
+        """
+        parts = {i: getattr(report, name) for i, report in enumerate(self.reports)}
+        tables = [part for part in parts.values() if isinstance(part, DataFrame)]
+        if tables:
+            return concat(tables)
+        return parts
+
+    def close(self):
+        """Close all out-files."""
+        if self._outs is not None:
+            for out in self._outs:
+                out.close()
+            self._outs = None
+
+    def delete_files(self):
+        """Delete the input-, report- and output-files of the sub-networks."""
+        self.close()
+        for result in self.results:
+            delete_swmm_files(result.inp, including_inp=True)
+
+
+def run_components(fn_inp, **kwargs):
+    """
+    Run the hydraulically independent sub-networks of a model in parallel processes.
+
+    Every sub-network (see :func:`network_components`) is written as a separate model into the directory of the
+    input file (see :func:`swmm_api.input_file.macros.create_sub_inp`) and all models run as a batch.
+
+    Notes:
+        Interface files in the ``[FILES]`` section are not supported (except ``USE RAINFALL``).
+
+    Args:
+        fn_inp (str): path to input file
+        **kwargs: keyword arguments for :func:`swmm_api.run_batch.run_batch`
+            (i.e. ``processes``, ``engine``, ``swmm_path``). Default for ``processes``: number of sub-networks.
+
+    Returns:
+        ComponentResults: combined results of the sub-networks
+    """
+    from .input_file.macros import create_sub_inp
+
+    inp = SwmmInput.read_file(fn_inp)
+    if SEC.FILES in inp:
+        unsupported = [key for key in inp.FILES if key != f'{FilesSection.KEYS.USE} {FilesSection.KEYS.RAINFALL}']
+        if unsupported:
+            raise NotImplementedError(f'Interface files {unsupported} are not supported for sub-networks.')
+
+    components = network_components(inp)
+    txt = inp.to_string()
+
+    base, _ = os.path.splitext(fn_inp)
+    fn_components = []
+    areas = []
+    for i, nodes in enumerate(components):
+        # a new copy of the model for every sub-network, as the filter functions work inplace
+        sub = create_sub_inp(SwmmInput.read_file(txt, encoding='utf-8'), nodes)
+        _filter_inlet_usage(sub)
+        areas.append(sum(s.area for s in sub.SUBCATCHMENTS.values()) if SEC.SUBCATCHMENTS in sub else 0)
+        fn_components.append(f'{base}_component_{i}.inp')
+        sub.write_file(fn_components[-1])
+
+    kwargs.setdefault('processes', len(fn_components))
+    results = run_batch(fn_components, **kwargs)
+
+    failed = [result for result in results if not result.ok]
+    if failed:
+        raise SWMMRunError('\n'.join(f'{result.inp}: {result.status}\n{result.errors}' for result in failed))
+
+    return ComponentResults(components, results, areas)
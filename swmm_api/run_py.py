@@ -1,32 +1,191 @@
 import os
-from datetime import timedelta
+from datetime import datetime, timedelta
 from math import floor
 
+import numpy as np
+from pandas import DataFrame, MultiIndex
 from swmm.toolkit import solver
-from pyswmm import Simulation
+from swmm.toolkit.shared_enum import ObjectType, NodeResult, LinkResult, SubcatchResult, TimeProperty
+from pyswmm import Simulation, SystemStats, Nodes
 from tqdm.auto import tqdm
 
 from swmm_api import SwmmReport
+from swmm_api.output_file.definitions import OBJECTS, SUBCATCHMENT_VARIABLES, NODE_VARIABLES, LINK_VARIABLES
 from swmm_api.run import get_result_filenames, SWMMRunError
+from swmm_api.run_telemetry import measure_self
 
+# toolkit object type, getter and result per out-file variable (see swmm_api.output_file.definitions)
+_TOOLKIT_RESULTS = {
+    OBJECTS.SUBCATCHMENT: (ObjectType.SUBCATCH, solver.subcatch_get_result, {
+        SUBCATCHMENT_VARIABLES.RAINFALL: SubcatchResult.RAIN,
+        SUBCATCHMENT_VARIABLES.SNOW_DEPTH: SubcatchResult.SNOW,
+        SUBCATCHMENT_VARIABLES.EVAPORATION: SubcatchResult.EVAPORATION,
+        SUBCATCHMENT_VARIABLES.INFILTRATION: SubcatchResult.INFILTRATION,
+        SUBCATCHMENT_VARIABLES.RUNOFF: SubcatchResult.RUNOFF,
+    }),
+    OBJECTS.NODE: (ObjectType.NODE, solver.node_get_result, {
+        NODE_VARIABLES.DEPTH: NodeResult.DEPTH,
+        NODE_VARIABLES.HEAD: NodeResult.HEAD,
+        NODE_VARIABLES.VOLUME: NodeResult.VOLUME,
+        NODE_VARIABLES.LATERAL_INFLOW: NodeResult.LATERAL_INFLOW,
+        NODE_VARIABLES.TOTAL_INFLOW: NodeResult.TOTAL_INFLOW,
+        NODE_VARIABLES.FLOODING: NodeResult.FLOOD,
+    }),
+    OBJECTS.LINK: (ObjectType.LINK, solver.link_get_result, {
+        LINK_VARIABLES.FLOW: LinkResult.FLOW,
+        LINK_VARIABLES.DEPTH: LinkResult.DEPTH,
+        LINK_VARIABLES.VOLUME: LinkResult.VOLUME,
+    }),
+}
 
-def run(fn_inp):
+
+def _raise_run_error(e, fn_inp, fn_rpt):
+    message = str(e) + '\n' + fn_inp
+    if os.path.isfile(fn_rpt):
+        message += str(SwmmReport(fn_rpt).get_errors())
+
+        with open(fn_rpt, 'r') as f:
+            rpt_content = f.read()
+        if 'ERROR' in rpt_content.upper():
+            message += rpt_content
+    else:
+        message += 'NO Report file created!!!'
+    raise SWMMRunError(message)
+
+
+def run(fn_inp, fn_rpt=None, fn_out=None, telemetry=False):
+    if fn_rpt is None or fn_out is None:
+        default_rpt, default_out = get_result_filenames(fn_inp)
+        fn_rpt = default_rpt if fn_rpt is None else fn_rpt
+        fn_out = default_out if fn_out is None else fn_out
     try:
-        solver.swmm_run(fn_inp, *get_result_filenames(fn_inp))
+        with measure_self() as record:
+            solver.swmm_run(fn_inp, fn_rpt, fn_out)
         print()
     except Exception as e:
-        fn_rpt, fn_out = get_result_filenames(fn_inp)
-        message = e.args[0] + '\n' + fn_inp
-        if os.path.isfile(fn_rpt):
-            message += str(SwmmReport(fn_rpt).get_errors())
-
-            with open(fn_rpt, 'r') as f:
-                rpt_content = f.read()
-            if 'ERROR' in rpt_content.upper():
-                message += rpt_content
+        _raise_run_error(e, fn_inp, fn_rpt)
+
+    if telemetry:
+        record.add_routing_statistics(fn_rpt)
+        return record
+
+
+def _get_result_getter(kind, label, variable):
+    """
+    Get a function which returns the current value of a variable of an object in the running simulation.
+
+    Args:
+        kind (str): [``'subcatchment'``, ``'node'`, ``'link'``]
+        label (str): label of the object
+        variable (str): variable name (like in the out-file, see :obj:`swmm_api.output_file.definitions.VARIABLES`)
+
+    Returns:
+        function: function without arguments which returns the value in the units of the model
+    """
+    if kind not in _TOOLKIT_RESULTS:
+        raise NotImplementedError(f'Kind "{kind}" not implemented. Use one of {list(_TOOLKIT_RESULTS)}.')
+    object_type, getter, results = _TOOLKIT_RESULTS[kind]
+    if variable not in results:
+        raise NotImplementedError(f'Variable "{variable}" of "{kind}" not available in the toolkit. '
+                                  f'Use one of {list(results)}.')
+    try:
+        index = solver.project_get_index(object_type, label)
+    except Exception:
+        raise KeyError(f'{kind} "{label}" not found in the model.')
+    result = results[variable]
+    return lambda: getter(index, result)
+
+
+def run_stream(fn_inp, columns, stride=None, chunk_size=10_000, callback=None, fn_rpt=None):
+    """
+    Run a simulation in this process and collect the values of selected variables while the simulation runs.
+
+    The values are written into a preallocated buffer.
+    Every time the buffer is full (and at the end of the simulation) the chunk is passed to the ``callback``.
+    The simulation does not save any results to an out-file,
+    so only the selected series are stored and no out-file has to be written and read again.
+
+    Args:
+        fn_inp (str): path to input file
+        columns (list[tuple[str, str, str]]): ``(kind, label, variable)`` to collect with the kind
+            ``'subcatchment'``, ``'node'`` or ``'link'`` and the variable name like in the out-file.
+            Available variables: subcatchment - ``rainfall``, ``snow_depth``, ``evaporation``, ``infiltration``,
+            ``runoff``; node - ``depth``, ``head``, ``volume``, ``lateral_inflow``, ``total_inflow``, ``flooding``;
+            link - ``flow``, ``depth``, ``volume``.
+        stride (int | datetime.timedelta): minimum duration between two samples (in seconds).
+            Default: every routing step.
+            The timestamps of the samples are the actual times of the routing steps.
+        chunk_size (int): number of samples in the buffer
+        callback (callable): function ``f(index, values)`` which gets the timestamps (numpy.ndarray of datetime64)
+            and the values (numpy.ndarray with one column per entry in ``columns``) of every chunk.
+            The arrays are reused for the next chunk, so copy them if they should be kept.
+        fn_rpt (str): path to the report file. Default: like the input file with the ``.rpt`` suffix.
+
+    Returns:
+        pandas.DataFrame | None: all samples with the timestamps as index and the ``columns`` as columns
+            (only if no ``callback`` is set)
+    """
+    if fn_rpt is None:
+        fn_rpt, _ = get_result_filenames(fn_inp)
+    if isinstance(stride, timedelta):
+        stride = stride / timedelta(seconds=1)
+
+    index = np.empty(chunk_size, dtype='datetime64[s]')
+    values = np.empty((chunk_size, len(columns)))
+    chunks = []
+
+    # errors of the callback are not errors of the simulation
+    callback_errors = []
+
+    def _flush(n):
+        if callback is not None:
+            try:
+                callback(index[:n], values[:n])
+            except Exception as e:
+                callback_errors.append(e)
+                raise
         else:
-            message += 'NO Report file created!!!'
-        raise SWMMRunError(message)
+            chunks.append((index[:n].copy(), values[:n].copy()))
+
+    try:
+        # an empty name for the out-file is a scratch file which is deleted at the end
+        solver.swmm_open(fn_inp, fn_rpt, '')
+        try:
+            getters = [_get_result_getter(*column) for column in columns]
+            start = np.datetime64(datetime(*solver.simulation_get_datetime(TimeProperty.START_DATE)), 's')
+            solver.swmm_start(0)
+
+            n = 0
+            while True:
+                elapsed = solver.swmm_stride(int(stride)) if stride else solver.swmm_step()
+                if elapsed == 0:
+                    break
+                index[n] = start + np.timedelta64(round(elapsed * 86400), 's')
+                values[n] = [get() for get in getters]
+                n += 1
+                if n == chunk_size:
+                    _flush(n)
+                    n = 0
+            if n:
+                _flush(n)
+
+            solver.swmm_end()
+            solver.swmm_report()
+        finally:
+            solver.swmm_close()
+
+    except Exception as e:
+        if isinstance(e, (NotImplementedError, KeyError)) or (e in callback_errors):
+            raise
+        _raise_run_error(e, fn_inp, fn_rpt)
+
+    if callback is None:
+        if chunks:
+            data = np.concatenate([v for _, v in chunks])
+            timestamps = np.concatenate([i for i, _ in chunks])
+        else:
+            data, timestamps = values[:0], index[:0]
+        return DataFrame(data, index=timestamps, columns=MultiIndex.from_tuples(columns))
 
 
 def run_progress(fn_inp, n_total=100):
@@ -42,5 +201,82 @@ def run_progress(fn_inp, n_total=100):
         progress.close()
 
 
+class FloodingExceeds:
+    """
+    Stop condition for :func:`run_until`: the total flooding volume of the system exceeds a threshold.
+
+    Attributes:
+        volume (float): threshold of the volume in the units of the model (ft³ or m³)
+    """
+
+    def __init__(self, volume):
+        self.volume = volume
+
+    def __call__(self, sim):
+        return SystemStats(sim).routing_stats['flooding'] > self.volume
+
+
+class OutfallsBelow:
+    """
+    Stop condition for :func:`run_until`: the inflow of all outfalls falls below a threshold after the storm.
+
+    The storm has passed when the inflow of any outfall exceeded the threshold at a previous check
+    and the simulation time is past ``after``.
+
+    Attributes:
+        flow (float): threshold of the inflow in the units of the model
+        after (datetime.datetime | None): earliest time to stop
+    """
+
+    def __init__(self, flow, after=None):
+        self.flow = flow
+        self.after = after
+        self._outfalls = None
+        self._storm = False
+
+    def __call__(self, sim):
+        if self._outfalls is None:
+            self._outfalls = [node for node in Nodes(sim) if node.is_outfall()]
+        below = all(node.total_inflow < self.flow for node in self._outfalls)
+        if not below:
+            self._storm = True
+            return False
+        return self._storm and ((self.after is None) or (sim.current_time >= self.after))
+
+
+def run_until(fn_inp, stop, check_every=10, fn_rpt=None, fn_out=None):
+    """
+    Run a simulation in this process and stop it as soon as a condition is met.
+
+    The report- and out-file are written until the time of the termination.
+
+    Args:
+        fn_inp (str): path to input file
+        stop (callable | list[callable]): condition(s) ``f(sim) -> bool`` which get the running
+            :class:`pyswmm.Simulation` (i.e. to query the state with :class:`pyswmm.Nodes` or :class:`pyswmm.Links`).
+            The simulation stops if any condition is true (i.e. :class:`FloodingExceeds` or :class:`OutfallsBelow`).
+        check_every (int): number of routing steps between two checks of the conditions
+        fn_rpt (str): path to the report file. Default: like the input file with the ``.rpt`` suffix.
+        fn_out (str): path to the out-file. Default: like the input file with the ``.out`` suffix.
+
+    Returns:
+        datetime.datetime | None: simulation time of the termination or None if the simulation ran to the end
+    """
+    if callable(stop):
+        stop = [stop]
+    if fn_rpt is None or fn_out is None:
+        default_rpt, default_out = get_result_filenames(fn_inp)
+        fn_rpt = default_rpt if fn_rpt is None else fn_rpt
+        fn_out = default_out if fn_out is None else fn_out
+
+    stopped = None
+    with Simulation(fn_inp, fn_rpt, fn_out) as sim:
+        for step, _ in enumerate(sim, start=1):
+            if (step % check_every == 0) and any(condition(sim) for condition in stop):
+                stopped = sim.current_time
+                sim.terminate_simulation()
+    return stopped
+
+
 def get_swmm_version():
     return '.'.join(solver.swmm_version_info())
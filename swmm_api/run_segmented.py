@@ -0,0 +1,271 @@
+import datetime
+import os
+from itertools import groupby
+
+import numpy as np
+from pandas import DataFrame, MultiIndex
+
+from .input_file import SwmmInput, SEC
+from .input_file.sections import Control, TimeseriesData, TimeseriesFile
+from .output_file.extract import SwmmOutExtract, SwmmExtractValueError, _RECORDSIZE
+from .run import delete_swmm_files, SWMMRunError
+from .run_batch import run_batch
+
+# size of the blocks to copy the results in bytes
+_BLOCK_SIZE = 2 ** 26
+
+
+def _read_epilogue(out):
+    """
+    Read the epilogue of an out-file.
+
+    Args:
+        out (SwmmOutExtract): out-file
+
+    Returns:
+        numpy.ndarray: position of the labels, the input and the output data, number of periods, error code and magic number
+    """
+    out._set_position(-6 * _RECORDSIZE, os.SEEK_END)
+    return np.frombuffer(out.fp.read(6 * _RECORDSIZE), dtype='i4').copy()
+
+
+def stitch_out_files(filenames, filename):
+    """
+    Concatenate out-files of consecutive periods of the same model to one out-file.
+
+    The header of the first file is used for the new file.
+    Periods of a file which are already in the previous file (i.e. the period at the reporting start) are skipped.
+
+    Args:
+        filenames (list[str]): paths to the out-files in chronological order
+        filename (str): path of the new out-file
+    """
+    outs = [SwmmOutExtract(fn) for fn in filenames]
+    try:
+        first = outs[0]
+        # number of periods to skip at the start of every file
+        skip = [0]
+        for previous, out in zip(outs, outs[1:]):
+            if (out.labels != first.labels) or (out.variables != first.variables) or (
+                    out.report_interval != first.report_interval) or (out._pos_start_output != first._pos_start_output):
+                raise SwmmExtractValueError(f'The structure of "{out.filename}" differs from "{first.filename}".')
+            overlap = (previous.start_date + previous.report_interval * previous.n_periods - out.start_date) / out.report_interval
+            if (overlap < 0) or (overlap != int(overlap)) or (overlap > out.n_periods):
+                raise SwmmExtractValueError(f'"{out.filename}" does not continue "{previous.filename}".')
+            skip.append(int(overlap))
+
+        # header of the first file
+        first._set_position(0)
+        header = first.fp.read(first._pos_start_output)
+
+        epilogues = [_read_epilogue(out) for out in outs]
+        epilogue = epilogues[0]
+        epilogue[3] = sum(out.n_periods - n for out, n in zip(outs, skip))
+        epilogue[4] = max(e[4] for e in epilogues)
+
+        with open(filename, 'wb') as f:
+            f.write(header)
+            for out, n in zip(outs, skip):
+                out._set_position(out._pos_start_output + n * out._bytes_per_period)
+                remaining = (out.n_periods - n) * out._bytes_per_period
+                while remaining:
+                    block = out.fp.read(min(remaining, _BLOCK_SIZE))
+                    f.write(block)
+                    remaining -= len(block)
+            f.write(epilogue.tobytes())
+    finally:
+        for out in outs:
+            out.close()
+
+
+def _compare_windows(fn_out, fn_reference, windows):
+    """
+    Compare the results of the segmented run with the reference run in the warm-up windows.
+
+    Args:
+        fn_out (str): path to the stitched out-file
+        fn_reference (str): path to the out-file of the sequential reference run
+        windows (list[tuple[datetime.datetime, datetime.datetime]]): start and end of every window
+
+    Returns:
+        pandas.DataFrame: maximum absolute difference and root-mean-square error per segment, kind and variable
+    """
+    out, reference = SwmmOutExtract(fn_out), SwmmOutExtract(fn_reference)
+    try:
+        # all columns grouped by kind and variable
+        columns = sorted(((kind, label, variable)
+                          for kind in out.variables for label in out.labels[kind] for variable in out.variables[kind]),
+                         key=lambda c: (c[0], c[2]))
+        groups = [(key, len(list(g))) for key, g in groupby(columns, key=lambda c: (c[0], c[2]))]
+        bounds = np.cumsum([0] + [n for _, n in groups])
+
+        rows = {}
+        for segment, (start, end) in enumerate(windows, start=1):
+            max_abs = np.zeros(len(columns))
+            sum_squares = np.zeros(len(columns))
+            n = 0
+            for (_, a), (_, b) in zip(out._iter_chunks(columns, start, end), reference._iter_chunks(columns, start, end)):
+                diff = a.astype(float) - b
+                max_abs = np.maximum(max_abs, np.abs(diff).max(axis=0))
+                sum_squares += (diff ** 2).sum(axis=0)
+                n += diff.shape[0]
+
+            for (key, _), i_start, i_end in zip(groups, bounds[:-1], bounds[1:]):
+                rows[(segment, *key)] = {
+                    'start': start,
+                    'end': end,
+                    'max_abs_diff': max_abs[i_start:i_end].max(),
+                    'rmse': np.sqrt(sum_squares[i_start:i_end].sum() / max(n * (i_end - i_start), 1)),
+                }
+    finally:
+        out.close()
+        reference.close()
+
+    frame = DataFrame.from_dict(rows, orient='index')
+    frame.index = MultiIndex.from_tuples(frame.index, names=['segment', 'kind', 'variable'])
+    return frame
+
+
+def _is_date(text):
+    """
+    Check if a part of a time series line is a date (as SWMM: ``MM/DD/YYYY``, ``MM-DD-YYYY``, ``MMM/DD/YYYY``, ...).
+
+    Args:
+        text (str): part of the line
+
+    Returns:
+        bool: if the part is a date
+    """
+    return ('/' in text) or (('-' in text) and not text.startswith('-'))
+
+
+def _anchor_relative_times(inp, fn_inp, start):
+    """
+    Convert the times of the time series which are relative to the simulation start to absolute dates.
+
+    SWMM anchors relative times (elapsed hours) at the start of the simulation,
+    which is different for every segment.
+
+    Args:
+        inp (SwmmInput): inp-file data
+        fn_inp (str): path to the input file (to find external time series files)
+        start (datetime.datetime): start of the whole simulation
+
+    Raises:
+        NotImplementedError: if the model has relative times which can't be converted
+            (external time series files without dates or control rules with the simulation time)
+
+    .. Important::
+        works inplace
+    """
+    if SEC.TIMESERIES in inp:
+        for timeseries in inp.TIMESERIES.values():
+            if isinstance(timeseries, TimeseriesData):
+                timeseries.data = [(start + datetime.timedelta(hours=t) if isinstance(t, (int, float)) else t, value)
+                                   for t, value in timeseries.data]
+
+            elif isinstance(timeseries, TimeseriesFile):
+                filename = os.path.join(os.path.dirname(os.path.abspath(fn_inp)), timeseries.filename)
+                if not os.path.isfile(filename):
+                    continue
+                with open(filename) as f:
+                    first = next((line.split() for line in f if line.strip() and not line.lstrip().startswith(';')), None)
+                if first and not _is_date(first[0]):
+                    raise NotImplementedError(f'The time series file "{timeseries.filename}" of "{timeseries.name}" has '
+                                              'times relative to the simulation start, which is different for every '
+                                              'segment. Use dates in the file.')
+
+    if SEC.CONTROLS in inp:
+        for control in inp.CONTROLS.values():
+            if any((condition.kind == Control.OBJECTS.SIMULATION) and (condition.attribute == Control.ATTRIBUTES.TIME)
+                   for condition in control.conditions):
+                raise NotImplementedError(f'The control rule "{control.name}" uses the elapsed simulation time, '
+                                          'which is different for every segment. Use SIMULATION DATE and CLOCKTIME.')
+
+
+def run_segmented(fn_inp, segments=4, warm_up=datetime.timedelta(days=7), fn_out=None, reference=False,
+                  keep_files=False, **kwargs):
+    """
+    Run a long continuous simulation split into segments in parallel processes.
+
+    Every segment but the first starts with a warm-up period before the segment start
+    (see :func:`swmm_api.input_file.macros.macros.set_times` with ``head``), which is not reported.
+    The out-files of the segments are stitched together to one continuous out-file.
+
+    The initial state of every segment differs from the state of a sequential run,
+    so the results at the start of the segments have an error which decreases with a longer warm-up.
+    To quantify the error, a sequential reference run can be done in parallel to the segments.
+
+    Times of the time series relative to the simulation start are converted to dates before the segments are written.
+
+    Args:
+        fn_inp (str): path to input file (the segment files are written into the same directory)
+        segments (int): number of segments
+        warm_up (datetime.timedelta): duration of the warm-up before every segment
+        fn_out (str): path of the stitched out-file. Default: input filename with the suffix ``_segmented.out``.
+        reference (bool): if a sequential reference run should be done to compare the results
+            in the warm-up windows (the first ``warm_up`` duration of every segment).
+        keep_files (bool): if the files of the segments should be kept
+        **kwargs: keyword arguments for :func:`swmm_api.run_batch.run_batch`
+            (i.e. ``processes``, ``engine``, ``swmm_path``). Default for ``processes``: number of simulations.
+
+    Returns:
+        tuple[str, pandas.DataFrame | None]: path of the stitched out-file and the errors of the segmented run
+            in the warm-up windows compared to the reference run (see ``reference``)
+
+    Raises:
+        NotImplementedError: if the model has relative times which can't be converted
+            (external time series files without dates or control rules with the elapsed simulation time)
+    """
+    from .input_file.macros.macros import set_times
+
+    inp = SwmmInput.read_file(fn_inp)
+    start = datetime.datetime.combine(inp.OPTIONS['START_DATE'], inp.OPTIONS['START_TIME'])
+    end = datetime.datetime.combine(inp.OPTIONS['END_DATE'], inp.OPTIONS['END_TIME'])
+    report_step = inp.OPTIONS['REPORT_STEP']
+    report_step = datetime.timedelta(hours=report_step.hour, minutes=report_step.minute, seconds=report_step.second)
+
+    # every segment has another simulation start
+    _anchor_relative_times(inp, fn_inp, start)
+
+    # the segment borders must be reporting times
+    n_steps = (end - start) // report_step
+    borders = [start + report_step * round(n_steps * i / segments) for i in range(segments)] + [end]
+
+    base, _ = os.path.splitext(fn_inp)
+    fn_segments = []
+    for i, (segment_start, segment_end) in enumerate(zip(borders, borders[1:])):
+        set_times(inp, segment_start, segment_end, head=min(warm_up, segment_start - start) if i else None)
+        fn_segments.append(f'{base}_segment_{i}.inp')
+        inp.write_file(fn_segments[-1])
+
+    fn_jobs = fn_segments.copy()
+    if reference:
+        set_times(inp, start, end)
+        fn_jobs.append(f'{base}_reference.inp')
+        inp.write_file(fn_jobs[-1])
+
+    kwargs.setdefault('processes', len(fn_jobs))
+    results = run_batch(fn_jobs, **kwargs)
+
+    try:
+        failed = [result for result in results if not result.ok]
+        if failed:
+            raise SWMMRunError('\n'.join(f'{result.inp}: {result.status}\n{result.errors}' for result in failed))
+
+        if fn_out is None:
+            fn_out = f'{base}_segmented.out'
+        stitch_out_files([result.out for result in results[:segments]], fn_out)
+
+        errors = None
+        if reference:
+            windows = [(segment_start, min(segment_start + warm_up, segment_end))
+                       for segment_start, segment_end in zip(borders[1:-1], borders[2:])]
+            errors = _compare_windows(fn_out, results[-1].out, windows)
+
+    finally:
+        if not keep_files:
+            for result in results:
+                delete_swmm_files(result.inp, including_inp=True)
+
+    return fn_out, errors
@@ -0,0 +1,243 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+
+try:
+    import resource
+except ImportError:
+    # not available on Windows
+    resource = None
+
+# ru_maxrss is in kilobytes on Linux and in bytes on macOS
+_MAXRSS_FACTOR = 1 if sys.platform == 'darwin' else 1024
+
+
+@dataclass
+class RunTelemetry:
+    """
+    Resource usage and solver statistics of a simulation.
+
+    The CPU times and the peak memory are not available on Windows (None).
+
+    Attributes:
+        start (float): start of the simulation as POSIX timestamp
+        wall_time (float): duration of the simulation in seconds
+        cpu_user (float | None): user CPU time in seconds
+        cpu_system (float | None): system CPU time in seconds
+        peak_rss (int | None): peak resident set size in bytes of the process running the simulation
+        min_time_step (float | None): minimum routing time step in seconds
+        average_time_step (float | None): average routing time step in seconds
+        max_time_step (float | None): maximum routing time step in seconds
+        steady_state (float | None): percent of the time in steady state
+        average_iterations (float | None): average iterations per routing step
+        not_converging (float | None): percent of the routing steps not converging
+    """
+    start: float
+    wall_time: float
+    cpu_user: float = None
+    cpu_system: float = None
+    peak_rss: int = None
+    min_time_step: float = None
+    average_time_step: float = None
+    max_time_step: float = None
+    steady_state: float = None
+    average_iterations: float = None
+    not_converging: float = None
+
+    @property
+    def cpu_time(self):
+        """float | None: total CPU time in seconds"""
+        if self.cpu_user is None:
+            return None
+        return self.cpu_user + self.cpu_system
+
+    def add_routing_statistics(self, fn_rpt):
+        """
+        Read the routing time step statistics from the report file.
+
+        Only available for dynamic wave routing.
+
+        Args:
+            fn_rpt (str): path to the report file
+        """
+        from .report_file import SwmmReport
+
+        if not os.path.isfile(fn_rpt):
+            return
+        summary = SwmmReport(fn_rpt).routing_time_step_summary
+        if not summary:
+            return
+
+        def _get(key):
+            value = summary.get(key)
+            if hasattr(value, 'total_seconds'):
+                return value.total_seconds()
+            return value
+
+        self.min_time_step = _get('Minimum Time Step')
+        self.average_time_step = _get('Average Time Step')
+        self.max_time_step = _get('Maximum Time Step')
+        self.steady_state = _get('% of Time in Steady State')
+        self.average_iterations = _get('Average Iterations per Step')
+        self.not_converging = _get('% of Steps Not Converging')
+
+
+def run_measured(command_line, timeout=None):
+    """
+    Run a command and measure the resource usage of the child process.
+
+    Args:
+        command_line (tuple[str]): command and arguments
+        timeout (float | None): timeout in seconds. The process is killed after the timeout.
+
+    Returns:
+        tuple[subprocess.CompletedProcess, RunTelemetry]: output of the process and the resource usage
+
+    Raises:
+        subprocess.TimeoutExpired: if the process was killed after the timeout
+    """
+    start = time.time()
+    t0 = time.perf_counter()
+    process = subprocess.Popen(command_line, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    if not hasattr(os, 'wait4'):
+        try:
+            stdout, stderr = process.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.communicate()
+            raise
+        telemetry = RunTelemetry(start=start, wall_time=time.perf_counter() - t0)
+        return subprocess.CompletedProcess(command_line, process.returncode, stdout, stderr), telemetry
+
+    # read the pipes in threads, so that the process can be reaped with os.wait4 to get its resource usage
+    output = {}
+
+    def _read(name, pipe):
+        output[name] = pipe.read()
+
+    readers = [threading.Thread(target=_read, args=(name, pipe), daemon=True)
+               for name, pipe in (('stdout', process.stdout), ('stderr', process.stderr))]
+    for reader in readers:
+        reader.start()
+
+    killed = threading.Event()
+
+    def _kill():
+        killed.set()
+        process.kill()
+
+    killer = None
+    if timeout is not None:
+        killer = threading.Timer(timeout, _kill)
+        killer.start()
+
+    _, status, usage = os.wait4(process.pid, 0)
+    wall_time = time.perf_counter() - t0
+    if killer is not None:
+        killer.cancel()
+    for reader in readers:
+        reader.join()
+    process.stdout.close()
+    process.stderr.close()
+    # the process is already reaped (same return code as subprocess, os.waitstatus_to_exitcode needs python 3.9)
+    process.returncode = -os.WTERMSIG(status) if os.WIFSIGNALED(status) else os.WEXITSTATUS(status)
+
+    if killed.is_set():
+        raise subprocess.TimeoutExpired(command_line, timeout, output['stdout'], output['stderr'])
+
+    telemetry = RunTelemetry(start=start, wall_time=wall_time, cpu_user=usage.ru_utime, cpu_system=usage.ru_stime,
+                             peak_rss=usage.ru_maxrss * _MAXRSS_FACTOR)
+    return subprocess.CompletedProcess(command_line, process.returncode, output['stdout'], output['stderr']), telemetry
+
+
+@contextmanager
+def measure_self():
+    """
+    Measure the resource usage of a code block running in this process (i.e. an in-process simulation).
+
+    The peak memory is the peak of the whole process (including the usage before the block).
+
+    Yields:
+        RunTelemetry: the resource usage (filled at the end of the block)
+    """
+    telemetry = RunTelemetry(start=time.time(), wall_time=0)
+    t0 = time.perf_counter()
+    before = resource.getrusage(resource.RUSAGE_SELF) if resource is not None else None
+    try:
+        yield telemetry
+    finally:
+        telemetry.wall_time = time.perf_counter() - t0
+        if before is not None:
+            after = resource.getrusage(resource.RUSAGE_SELF)
+            telemetry.cpu_user = after.ru_utime - before.ru_utime
+            telemetry.cpu_system = after.ru_stime - before.ru_stime
+            telemetry.peak_rss = after.ru_maxrss * _MAXRSS_FACTOR
+
+
+def telemetry_frame(results):
+    """
+    Get a table of the telemetry of a batch run.
+
+    Args:
+        results (list[swmm_api.run_batch.RunResult]): results of :func:`swmm_api.run_batch.run_batch`
+            with ``telemetry=True``
+
+    Returns:
+        pandas.DataFrame: one row per job (with telemetry) and the attributes of :class:`RunTelemetry` as columns
+    """
+    from pandas import DataFrame
+
+    rows = {result.inp: asdict(result.telemetry) for result in results if result.telemetry is not None}
+    return DataFrame.from_dict(rows, orient='index', columns=list(RunTelemetry.__dataclass_fields__))
+
+
+def telemetry_summary(results, n_slowest=10):
+    """
+    Aggregate the telemetry of a batch run.
+
+    The utilization is the CPU time of all jobs divided by the duration of the batch
+    and the maximum number of jobs running at the same time.
+
+    Args:
+        results (list[swmm_api.run_batch.RunResult]): results of :func:`swmm_api.run_batch.run_batch`
+            with ``telemetry=True``
+        n_slowest (int): number of slowest jobs to list
+
+    Returns:
+        tuple[pandas.Series, pandas.DataFrame]: key figures of the batch
+            (jobs, duration, throughput per hour, total CPU time, utilization, maximum peak memory,
+            minimum routing time step) and the telemetry of the slowest jobs
+    """
+    from pandas import Series
+
+    frame = telemetry_frame(results)
+    if frame.empty:
+        return Series(dtype=float), frame
+
+    end = frame['start'] + frame['wall_time']
+    duration = end.max() - frame['start'].min()
+
+    # maximum number of jobs running at the same time
+    events = sorted([(t, 1) for t in frame['start']] + [(t, -1) for t in end])
+    running = concurrency = 0
+    for _, change in events:
+        running += change
+        concurrency = max(concurrency, running)
+
+    cpu_time = (frame['cpu_user'] + frame['cpu_system']).sum(min_count=1)
+    summary = Series({
+        'jobs': len(frame),
+        'duration': duration,
+        'throughput': len(frame) / duration * 3600 if duration else float('nan'),
+        'concurrency': concurrency,
+        'cpu_time': cpu_time,
+        'utilization': cpu_time / (duration * concurrency) if duration else float('nan'),
+        'peak_rss': frame['peak_rss'].max(),
+        'min_time_step': frame['min_time_step'].min(),
+    })
+    return summary, frame.sort_values('wall_time', ascending=False).head(n_slowest)
@@ -0,0 +1,452 @@
+import os
+import shutil
+import tempfile
+import traceback
+from itertools import product
+from multiprocessing import Pool
+
+import numpy as np
+from pandas import DataFrame, Index
+from tqdm.auto import tqdm
+
+from .input_file import SwmmInput
+from .input_file.macros.reduce_unneeded import reduce_timeseries
+from .input_file.misc.dat_timeseries import write_swmm_timeseries_data
+from .input_file.sections import RainGage, TimeseriesFile
+from .output_file import SwmmOutput
+from .report_file import SwmmReport
+from .run import swmm5_run, get_result_filenames, delete_swmm_files, get_temp_root, SWMMRunError
+from .run_batch import ENGINE
+
+
+class STATISTICS:
+    """
+    All statistics which can be extracted from an out-file with :func:`extract_statistics`.
+
+    Attributes:
+        MAX (str): maximum value (i.e. the peak flow)
+        MIN (str): minimum value
+        MEAN (str): mean value
+        VOLUME (str): integrated value (i.e. the volume of a flow, see :meth:`swmm_api.SwmmOutput.integrate`)
+    """
+    MAX = 'max'
+    MIN = 'min'
+    MEAN = 'mean'
+    VOLUME = 'volume'
+
+
+def set_parameter(inp, section, label, attribute, value):
+    """
+    Set an attribute of one, many or all objects of a section.
+
+    Args:
+        inp (SwmmInput): inp-file data
+        section (str): label of the section (i.e. ``'CONDUITS'``)
+        label (str | list[str] | None): label of the object, list of labels or None for all objects of the section
+        attribute (str): name of the attribute of the object (i.e. ``'roughness'``)
+        value (any): new value of the attribute
+    """
+    if label is None:
+        label = list(inp[section].keys())
+    elif isinstance(label, str):
+        label = [label]
+
+    for lbl in label:
+        obj = inp[section][lbl]
+        if not hasattr(obj, attribute):
+            raise AttributeError(f'{type(obj).__name__} "{lbl}" in section [{section}] has no attribute "{attribute}".')
+        setattr(obj, attribute, value)
+
+
+def parameter_sweep(space):
+    """
+    Create all combinations of the parameter values (full factorial design).
+
+    Args:
+        space (dict[str, list]): values per parameter name
+
+    Returns:
+        pandas.DataFrame: one variant per row and one parameter per column
+    """
+    return DataFrame(list(product(*space.values())), columns=list(space.keys()),
+                     index=Index(range(np.prod([len(v) for v in space.values()], dtype=int)), name='scenario'))
+
+
+def monte_carlo(space, n, seed=None):
+    """
+    Create random variants of the parameters.
+
+    Args:
+        space (dict[str, tuple[float, float] | callable]): per parameter name either the bounds ``(low, high)``
+            of a uniform distribution or a function ``f(rng, n)`` which returns n random values
+            (i.e. ``lambda rng, n: rng.normal(0.013, 0.001, n)``).
+        n (int): number of variants
+        seed (int): seed of the random number generator
+
+    Returns:
+        pandas.DataFrame: one variant per row and one parameter per column
+    """
+    rng = np.random.default_rng(seed)
+    data = {}
+    for name, distribution in space.items():
+        if callable(distribution):
+            data[name] = distribution(rng, n)
+        else:
+            data[name] = rng.uniform(*distribution, size=n)
+    return DataFrame(data, index=Index(range(n), name='scenario'))
+
+
+def extract_statistics(out, statistics):
+    """
+    Extract statistics from an out-file.
+
+    The data is read chunk by chunk in a single pass, so that the full timeseries is never held in memory.
+
+    Args:
+        out (SwmmOutput): out-file
+        statistics (dict[str, tuple[str, str, str, str]]): per name of the result the
+            ``(kind, label, variable, statistic)`` to extract (statistic see :class:`STATISTICS`),
+            i.e. ``{'peak_outflow': ('link', 'C1', 'flow', 'max')}``
+
+    Returns:
+        dict[str, float]: value per name of the result
+    """
+    columns = {}
+    for name, (kind, label, variable, statistic) in statistics.items():
+        if statistic not in (STATISTICS.MAX, STATISTICS.MIN, STATISTICS.MEAN, STATISTICS.VOLUME):
+            raise NotImplementedError(f'Statistic "{statistic}" not implemented. '
+                                      f'Use one of {[STATISTICS.MAX, STATISTICS.MIN, STATISTICS.MEAN, STATISTICS.VOLUME]}.')
+        columns[name] = out._filter_part_columns(kind, label, variable)
+        if len(columns[name]) != 1:
+            raise ValueError(f'The result "{name}" must refer to exactly one object and variable.')
+
+    # all statistics (incl. the volumes) in one pass over the file
+    results = {}
+    if statistics:
+        names = list(statistics)
+        columns = [columns[name][0] for name in names]
+        maximum = np.full(len(columns), -np.inf)
+        minimum = np.full(len(columns), np.inf)
+        total = np.zeros(len(columns))
+        n = 0
+        for _, values in out._iter_chunks(columns):
+            maximum = np.maximum(maximum, values.max(axis=0))
+            minimum = np.minimum(minimum, values.min(axis=0))
+            total += values.sum(axis=0, dtype=float)
+            n += values.shape[0]
+
+        for i, name in enumerate(names):
+            statistic = statistics[name][3]
+            if statistic == STATISTICS.MAX:
+                results[name] = float(maximum[i])
+            elif statistic == STATISTICS.MIN:
+                results[name] = float(minimum[i])
+            elif statistic == STATISTICS.VOLUME:
+                # step integration like SwmmOutput.integrate
+                kind, _, variable, _ = statistics[name]
+                results[name] = float(total[i] * out.report_interval.total_seconds() * out._get_volume_factor(kind, variable))
+            else:
+                results[name] = total[i] / n if n else np.nan
+
+    return results
+
+
+def extract_results(fn_out, fn_rpt, spec):
+    """
+    Extract statistics, series and parts of the report from the results of a simulation.
+
+    The out-file is read chunk by chunk, so only the requested values are held in memory.
+
+    Args:
+        fn_out (str): path to the out-file
+        fn_rpt (str): path to the report-file
+        spec (dict[str, tuple | str]): per name of the result either
+
+            - ``(kind, label, variable, statistic)`` for a statistic (see :func:`extract_statistics`),
+            - ``(kind, label, variable)`` for the series (see :meth:`swmm_api.SwmmOutput.get_part`) or
+            - the name of a part of the report (a property of :class:`swmm_api.SwmmReport`,
+              i.e. ``'node_flooding_summary'``)
+
+    Returns:
+        dict: value per name of the result
+    """
+    statistics = {name: tuple(item) for name, item in spec.items() if not isinstance(item, str) and len(item) == 4}
+    series = {name: tuple(item) for name, item in spec.items() if not isinstance(item, str) and len(item) == 3}
+    parts = {name: item for name, item in spec.items() if isinstance(item, str)}
+
+    results = {}
+    if statistics or series:
+        with SwmmOutput(fn_out) as out:
+            results.update(extract_statistics(out, statistics))
+            for name, (kind, label, variable) in series.items():
+                columns = out._filter_part_columns(kind, label, variable)
+                chunks = [values for _, values in out._iter_chunks(columns)]
+                values = np.vstack(chunks) if chunks else np.empty((0, len(columns)), dtype='f4')
+                results[name] = out._to_pandas({'/'.join(column): values[:, i] for i, column in enumerate(columns)},
+                                                drop_useless=True)
+
+    if parts:
+        rpt = SwmmReport(fn_rpt)
+        for name, part in parts.items():
+            results[name] = getattr(rpt, part)
+
+    return results
+
+
+# state of a worker process of the scenario engine
+_WORKER = {}
+
+
+def _init_worker(inp_text, factors, statistics, extract, engine, swmm_path, temp_dir):
+    _WORKER.update(inp_text=inp_text, factors=factors, statistics=statistics,
+                   extract=extract, engine=engine, swmm_path=swmm_path, temp_dir=temp_dir)
+
+
+def _run_and_extract(fn_inp):
+    """
+    Run a model in a worker process, extract the results and delete the files.
+
+    Args:
+        fn_inp (str): path to input file
+
+    Returns:
+        dict: result per name and the error message of a failed simulation (``'errors'``)
+    """
+    fn_rpt, fn_out = get_result_filenames(fn_inp)
+
+    result = {}
+    errors = None
+    try:
+        if _WORKER['engine'] == ENGINE.CLI:
+            swmm5_run(fn_inp, swmm_path=_WORKER['swmm_path'])
+        else:
+            from .run_py import run
+            run(fn_inp)
+
+        with SwmmOutput(fn_out) as out:
+            result.update(extract_statistics(out, _WORKER['statistics']))
+            if _WORKER['extract'] is not None:
+                result.update(_WORKER['extract'](out))
+
+    except SWMMRunError as e:
+        errors = str(e)
+
+    except Exception:
+        # i.e. a missing out-file or an error of the extract function, which must not stop the other variants
+        result = {}
+        errors = traceback.format_exc()
+
+    finally:
+        # the results are extracted, so the files are not needed anymore
+        delete_swmm_files(fn_inp, including_inp=True)
+
+    result['errors'] = errors
+    return result
+
+
+def _run_scenario(job):
+    """
+    Create, run and evaluate a single variant in a worker process.
+
+    Args:
+        job (tuple[int, dict]): scenario number and value per parameter name
+
+    Returns:
+        tuple[int, dict]: scenario number and result per name
+    """
+    scenario, values = job
+    if 'inp' not in _WORKER:
+        _WORKER['inp'] = SwmmInput.read_file(_WORKER['inp_text'], encoding='utf-8')
+    inp = _WORKER['inp']
+
+    # every variant sets all parameters, so the model of the worker can be reused
+    for name, value in values.items():
+        set_parameter(inp, *_WORKER['factors'][name], value)
+
+    fn_inp = os.path.join(_WORKER['temp_dir'], f'scenario_{scenario}.inp')
+    inp.write_file(fn_inp)
+    return scenario, _run_and_extract(fn_inp)
+
+
+def _run_pool(function, jobs, inp_text, factors, statistics, extract, processes, engine, swmm_path, temp_dir,
+              show_progress, desc):
+    """
+    Run jobs in worker processes of the scenario engine in a temporary directory.
+
+    Args:
+        function (callable): function of a job, which returns the key and the result
+        jobs (list): arguments of the function per job
+
+    Returns:
+        dict: result per key
+    """
+    if statistics is None:
+        statistics = {}
+
+    temp_dir = tempfile.mkdtemp(prefix='swmm_api_scenarios_', dir=get_temp_root(temp_dir))
+    results = {}
+    try:
+        with Pool(processes, initializer=_init_worker,
+                  initargs=(inp_text, factors, statistics, extract, engine, swmm_path, temp_dir)) as pool:
+            for key, result in tqdm(pool.imap_unordered(function, jobs), total=len(jobs),
+                                    desc=desc, disable=not show_progress):
+                results[key] = result
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    return results
+
+
+def run_scenarios(inp, factors, variants, statistics=None, extract=None, processes=4, engine=ENGINE.CLI,
+                  swmm_path=None, temp_dir=None, show_progress=True):
+    """
+    Run variants of a model in parallel worker processes and extract statistics from the results.
+
+    The variants are created in the worker processes, written to a temporary directory and deleted together with
+    the report- and output-file as soon as the statistics are extracted.
+
+    External files (i.e. time-series files) must be referenced with absolute paths in the inp-data,
+    because the variants are written to another directory.
+
+    Args:
+        inp (SwmmInput): base model
+        factors (dict[str, tuple[str, str | list[str] | None, str]]): per parameter name the ``(section, label, attribute)``
+            which is changed in the variants (see :func:`set_parameter`),
+            i.e. ``{'roughness': ('CONDUITS', None, 'roughness')}`` for the roughness of all conduits.
+        variants (pandas.DataFrame): value of the parameters (columns) per variant (rows)
+            (i.e. from :func:`parameter_sweep` or :func:`monte_carlo`)
+        statistics (dict[str, tuple[str, str, str, str]]): results to extract per variant (see :func:`extract_statistics`)
+        extract (callable): custom function ``f(out) -> dict`` to extract additional results from the :class:`SwmmOutput`.
+            Must be a module level function (to be usable in the worker processes).
+        processes (int): number of parallel processes
+        engine (str): way to run the simulations (see :class:`swmm_api.run_batch.ENGINE`). Default: command line executable.
+        swmm_path (str): custom path to the command line swmm executable (see :func:`swmm_api.run.swmm5_run`)
+        temp_dir (str): directory for the temporary files (``'tmpfs'`` for a RAM-backed directory,
+            see :func:`swmm_api.run.get_temp_root`). Default: system temp directory.
+        show_progress (bool): if a progress bar should be shown
+
+    Returns:
+        pandas.DataFrame: one row per variant with the parameters, the extracted results and the error messages
+            of failed simulations as columns
+    """
+    missing = set(variants.columns) - set(factors)
+    if missing:
+        raise KeyError(f'No factor defined for the parameters {sorted(missing)}.')
+
+    jobs = [(scenario, values.to_dict()) for scenario, values in variants.iterrows()]
+    results = _run_pool(_run_scenario, jobs, inp.to_string(), factors, statistics, extract, processes, engine,
+                        swmm_path, temp_dir, show_progress, desc='swmm5 scenarios')
+    return variants.join(DataFrame.from_dict(results, orient='index'))
+
+
+# placeholder for the filename of the rainfall data of an ensemble member in the pre-rendered inp-file text
+_RAINFALL_PLACEHOLDER = '__swmm_api_ensemble_rainfall__.dat'
+
+# label of the time-series with the rainfall data of an ensemble member
+_RAINFALL_TIMESERIES = 'ensemble_rainfall'
+
+
+def _render_rainfall_ensemble(inp, gages=None):
+    """
+    Get the text of the inp-file with a placeholder for the rainfall data file.
+
+    The rain gages get their data from a time-series which references the placeholder file.
+
+    Args:
+        inp (SwmmInput): base model (is not changed)
+        gages (list[str] | None): labels of the rain gages which get the rainfall of the members. Default: all gages.
+
+    Returns:
+        str: text of the inp-file
+    """
+    inp = inp.copy()
+    if gages is None:
+        gages = list(inp.RAINGAGES.keys())
+
+    for label in gages:
+        gage = inp.RAINGAGES[label]
+        gage.Source = RainGage.SOURCES.TIMESERIES
+        gage.Timeseries = _RAINFALL_TIMESERIES
+        gage.Filename = gage.Station = gage.Units = np.nan
+
+    inp.add_obj(TimeseriesFile(_RAINFALL_TIMESERIES, _RAINFALL_PLACEHOLDER))
+    # the rainfall data of the base model is not needed anymore
+    reduce_timeseries(inp)
+    return inp.to_string()
+
+
+def _run_member(job):
+    """
+    Run and evaluate a single member of a rainfall ensemble in a worker process.
+
+    Args:
+        job (tuple[int, pandas.Series | str]): member number and rainfall data or path to a time-series file
+
+    Returns:
+        tuple[int, dict]: member number and result per name
+    """
+    member, rainfall = job
+    fn_inp = os.path.join(_WORKER['temp_dir'], f'member_{member}.inp')
+
+    if isinstance(rainfall, str):
+        fn_dat = os.path.abspath(rainfall)
+    else:
+        fn_dat = os.path.join(_WORKER['temp_dir'], f'member_{member}.dat')
+        write_swmm_timeseries_data(rainfall, fn_dat)
+
+    # only the reference to the rainfall data is changed in the pre-rendered text
+    with open(fn_inp, 'w') as f:
+        f.write(_WORKER['inp_text'].replace(_RAINFALL_PLACEHOLDER, fn_dat))
+
+    try:
+        return member, _run_and_extract(fn_inp)
+    finally:
+        if not isinstance(rainfall, str):
+            os.remove(fn_dat)
+
+
+def run_rainfall_ensemble(inp, members, statistics=None, extract=None, gages=None, processes=4, engine=ENGINE.CLI,
+                          swmm_path=None, temp_dir=None, show_progress=True):
+    """
+    Run a model with many rainfall series in parallel worker processes and extract statistics from the results.
+
+    The inp-file text is rendered once with a placeholder for the rainfall data.
+    For every member only the rainfall data file is written and the reference in the text is replaced.
+    The results are reduced to statistics (see :func:`extract_statistics`) in the worker processes
+    and the files are deleted.
+
+    External files (i.e. time-series files) must be referenced with absolute paths in the inp-data,
+    because the members are written to another directory.
+
+    Args:
+        inp (SwmmInput): base model
+        members (list[pandas.Series | str] | dict[str, pandas.Series | str]): rainfall per member,
+            either as series with the timestamps as index or as path to a SWMM time-series file (``.dat``).
+            The data must have the format and interval of the rain gages.
+        statistics (dict[str, tuple[str, str, str, str]]): results to extract per member (see :func:`extract_statistics`)
+        extract (callable): custom function ``f(out) -> dict`` to extract additional results from the :class:`SwmmOutput`.
+            Must be a module level function (to be usable in the worker processes).
+        gages (list[str] | None): labels of the rain gages which get the rainfall of the members. Default: all gages.
+        processes (int): number of parallel processes
+        engine (str): way to run the simulations (see :class:`swmm_api.run_batch.ENGINE`). Default: command line executable.
+        swmm_path (str): custom path to the command line swmm executable (see :func:`swmm_api.run.swmm5_run`)
+        temp_dir (str): directory for the temporary files (``'tmpfs'`` for a RAM-backed directory,
+            see :func:`swmm_api.run.get_temp_root`). Default: system temp directory.
+        show_progress (bool): if a progress bar should be shown
+
+    Returns:
+        pandas.DataFrame: one row per member with the extracted results and the error messages
+            of failed simulations as columns
+    """
+    if isinstance(members, dict):
+        keys = list(members.keys())
+        members = list(members.values())
+    else:
+        keys = list(range(len(members)))
+
+    jobs = list(enumerate(members))
+    results = _run_pool(_run_member, jobs, _render_rainfall_ensemble(inp, gages), None, statistics, extract,
+                        processes, engine, swmm_path, temp_dir, show_progress, desc='swmm5 rainfall ensemble')
+
+    frame = DataFrame.from_dict(results, orient='index').sort_index()
+    frame.index = Index([keys[i] for i in frame.index], name='member')
+    return frame
@@ -0,0 +1,214 @@
+import numpy as np
+from pandas import DataFrame, Index, MultiIndex
+
+from .scenarios import run_scenarios
+
+
+def _scale(unit_values, bounds):
+    """
+    Scale values in the unit hypercube to the bounds of the parameters.
+
+    Args:
+        unit_values (numpy.ndarray): values between 0 and 1 (rows x parameters)
+        bounds (dict[str, tuple[float, float]]): ``(low, high)`` per parameter name
+
+    Returns:
+        pandas.DataFrame: one variant per row and one parameter per column
+    """
+    low, high = np.array(list(bounds.values()), dtype=float).T
+    return DataFrame(low + unit_values * (high - low), columns=list(bounds.keys()),
+                     index=Index(range(unit_values.shape[0]), name='scenario'))
+
+
+def _indices_frame(indices, factors, outputs):
+    """
+    Convert the sensitivity indices to a table.
+
+    Args:
+        indices (dict[str, dict[str, numpy.ndarray]]): values per factor per index name per output
+        factors (list[str]): names of the factors
+        outputs (list[str]): names of the outputs
+
+    Returns:
+        pandas.DataFrame: factors as index and (output, index name) as columns
+    """
+    data = {(output, name): values for output in outputs for name, values in indices[output].items()}
+    return DataFrame(data, index=Index(factors, name='factor'),
+                     columns=MultiIndex.from_tuples(list(data), names=['output', 'index']))
+
+
+def morris_sample(bounds, trajectories=10, levels=4, seed=None):
+    """
+    Create the design matrix of the elementary effects method (Morris, 1991).
+
+    Every trajectory consists of one variant more than parameters.
+    Between two consecutive variants of a trajectory only one parameter changes.
+
+    Args:
+        bounds (dict[str, tuple[float, float]]): ``(low, high)`` per parameter name
+        trajectories (int): number of trajectories
+        levels (int): number of levels of the grid (must be even)
+        seed (int): seed of the random number generator
+
+    Returns:
+        pandas.DataFrame: one variant per row and one parameter per column
+    """
+    if levels % 2:
+        raise ValueError('The number of levels must be even.')
+    rng = np.random.default_rng(seed)
+    k = len(bounds)
+    delta = levels / (2 * (levels - 1))
+    ones = np.ones((k + 1, k))
+    lower = np.tril(ones, -1)
+
+    samples = []
+    for _ in range(trajectories):
+        base = rng.integers(0, levels // 2, size=k) / (levels - 1)
+        directions = np.diag(rng.choice([-1, 1], size=k))
+        permutation = np.eye(k)[rng.permutation(k)]
+        samples.append((ones * base + delta / 2 * ((2 * lower - ones) @ directions + ones)) @ permutation)
+
+    return _scale(np.vstack(samples), bounds)
+
+
+def morris_analyze(variants, results, bounds):
+    """
+    Calculate the elementary effects of the parameters on the outputs.
+
+    Args:
+        variants (pandas.DataFrame): design matrix (see :func:`morris_sample`)
+        results (pandas.DataFrame): outputs per variant (same index as the variants)
+        bounds (dict[str, tuple[float, float]]): ``(low, high)`` per parameter name
+
+    Returns:
+        pandas.DataFrame: factors as index and the mean (``mu``), mean of the absolute values (``mu_star``)
+            and standard deviation (``sigma``) of the elementary effects per output as columns
+    """
+    factors = list(bounds)
+    k = len(factors)
+    low, high = np.array(list(bounds.values()), dtype=float).T
+    x = ((variants[factors].values - low) / (high - low)).reshape(-1, k + 1, k)
+
+    step = np.diff(x, axis=1)  # trajectory x step x factor
+    factor_changed = np.abs(step).argmax(axis=2)
+    delta = np.take_along_axis(step, factor_changed[..., np.newaxis], axis=2)[..., 0]
+
+    indices = {}
+    for output in results.columns:
+        y = results[output].values.astype(float).reshape(-1, k + 1)
+        effects = np.diff(y, axis=1) / delta
+        # sort the effects of every trajectory by factor
+        effects = np.take_along_axis(effects, factor_changed.argsort(axis=1), axis=1)
+        indices[output] = {
+            'mu': np.nanmean(effects, axis=0),
+            'mu_star': np.nanmean(np.abs(effects), axis=0),
+            'sigma': np.nanstd(effects, axis=0, ddof=1),
+        }
+    return _indices_frame(indices, factors, list(results.columns))
+
+
+def sobol_sample(bounds, n=1024, seed=None):
+    """
+    Create the design matrix for the variance-based sensitivity indices (Saltelli, 2010).
+
+    The design consists of the two random matrices A and B and the k matrices AB_i,
+    which are A with the i-th column of B. This results in ``n * (k + 2)`` variants.
+
+    Args:
+        bounds (dict[str, tuple[float, float]]): ``(low, high)`` per parameter name
+        n (int): number of base samples
+        seed (int): seed of the random number generator
+
+    Returns:
+        pandas.DataFrame: one variant per row and one parameter per column
+    """
+    rng = np.random.default_rng(seed)
+    k = len(bounds)
+    a, b = rng.random((n, k)), rng.random((n, k))
+    samples = [a, b]
+    for i in range(k):
+        ab = a.copy()
+        ab[:, i] = b[:, i]
+        samples.append(ab)
+    return _scale(np.vstack(samples), bounds)
+
+
+def sobol_analyze(results, bounds):
+    """
+    Calculate the first order and total Sobol' indices of the parameters on the outputs.
+
+    The first order indices are estimated after Saltelli (2010) and the total indices after Jansen (1999).
+
+    Args:
+        results (pandas.DataFrame): outputs per variant of the design matrix (see :func:`sobol_sample`)
+        bounds (dict[str, tuple[float, float]]): ``(low, high)`` per parameter name
+
+    Returns:
+        pandas.DataFrame: factors as index and the first order (``S1``) and total (``ST``) indices per output as columns
+    """
+    factors = list(bounds)
+    k = len(factors)
+
+    indices = {}
+    for output in results.columns:
+        y = results[output].values.astype(float).reshape(k + 2, -1)
+        y_a, y_b, y_ab = y[0], y[1], y[2:]
+        variance = np.nanvar(np.concatenate([y_a, y_b]))
+        indices[output] = {
+            'S1': np.nanmean(y_b * (y_ab - y_a), axis=1) / variance,
+            'ST': 0.5 * np.nanmean((y_a - y_ab) ** 2, axis=1) / variance,
+        }
+    return _indices_frame(indices, factors, list(results.columns))
+
+
+def morris(inp, factors, bounds, statistics, trajectories=10, levels=4, seed=None, **kwargs):
+    """
+    Screen the parameters of a model with the elementary effects method.
+
+    The variants run as a parallel batch and the outputs are extracted with streaming statistics
+    (see :func:`swmm_api.scenarios.run_scenarios`).
+
+    Args:
+        inp (SwmmInput): base model
+        factors (dict[str, tuple[str, str | list[str] | None, str]]): per parameter name the ``(section, label, attribute)``
+            (see :func:`swmm_api.scenarios.set_parameter`)
+        bounds (dict[str, tuple[float, float]]): ``(low, high)`` per parameter name
+        statistics (dict[str, tuple[str, str, str, str]]): outputs of the model
+            (see :func:`swmm_api.scenarios.extract_statistics`)
+        trajectories (int): number of trajectories. Results in ``trajectories * (k + 1)`` simulations.
+        levels (int): number of levels of the grid (must be even)
+        seed (int): seed of the random number generator
+        **kwargs: keyword arguments for :func:`swmm_api.scenarios.run_scenarios` (i.e. ``processes``)
+
+    Returns:
+        pandas.DataFrame: elementary effects (see :func:`morris_analyze`)
+    """
+    variants = morris_sample(bounds, trajectories=trajectories, levels=levels, seed=seed)
+    results = run_scenarios(inp, factors, variants, statistics, **kwargs)
+    return morris_analyze(variants, results[list(statistics)], bounds)
+
+
+def sobol(inp, factors, bounds, statistics, n=1024, seed=None, **kwargs):
+    """
+    Calculate the variance-based sensitivity indices of the parameters of a model.
+
+    The variants run as a parallel batch and the outputs are extracted with streaming statistics
+    (see :func:`swmm_api.scenarios.run_scenarios`).
+
+    Args:
+        inp (SwmmInput): base model
+        factors (dict[str, tuple[str, str | list[str] | None, str]]): per parameter name the ``(section, label, attribute)``
+            (see :func:`swmm_api.scenarios.set_parameter`)
+        bounds (dict[str, tuple[float, float]]): ``(low, high)`` per parameter name
+        statistics (dict[str, tuple[str, str, str, str]]): outputs of the model
+            (see :func:`swmm_api.scenarios.extract_statistics`)
+        n (int): number of base samples. Results in ``n * (k + 2)`` simulations.
+        seed (int): seed of the random number generator
+        **kwargs: keyword arguments for :func:`swmm_api.scenarios.run_scenarios` (i.e. ``processes``)
+
+    Returns:
+        pandas.DataFrame: Sobol' indices (see :func:`sobol_analyze`)
+    """
+    variants = sobol_sample(bounds, n=n, seed=seed)
+    results = run_scenarios(inp, factors, variants, statistics, **kwargs)
+    return sobol_analyze(results[list(statistics)], bounds)
@@ -0,0 +1,321 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from multiprocessing import Process
+
+from pandas import DataFrame
+
+from .output_file import SwmmOutput
+from .run import swmm5_run, SWMMRunError
+from .run_batch import STATUS, _MAX_ERROR_LENGTH
+from .scenarios import extract_statistics
+
+
+class WorkQueue:
+    """
+    Pull-based queue of simulation jobs in a shared SQLite database.
+
+    Workers on any machine with access to the database file claim pending jobs (see :func:`run_worker`).
+    A claimed job is leased to the worker for a limited time and the worker has to renew the lease with heartbeats.
+    If a worker dies, its lease expires and the job is claimed by another worker.
+
+    The database file must be on a file system with working file locks (i.e. a local disk or an SMB share).
+    The clocks of the machines must be synchronized, as the leases are absolute timestamps.
+
+    Attributes:
+        filename (str): path to the database file
+        max_attempts (int): maximum number of claims of a job, before a job with an expired lease fails
+    """
+    _COLUMNS = ['id', 'inp', 'statistics', 'status', 'worker', 'lease_until', 'attempts', 'submitted', 'start', 'end',
+                'returncode', 'errors', 'wall_time', 'summary']
+
+    def __init__(self, filename, max_attempts=3):
+        """
+        Open a new or existing queue.
+
+        Args:
+            filename (str): path to the database file
+            max_attempts (int): maximum number of claims of a job, before a job with an expired lease fails
+        """
+        self.filename = filename
+        self.max_attempts = max_attempts
+        # autocommit mode, the transactions are started explicitly
+        self._connection = sqlite3.connect(filename, timeout=60, isolation_level=None)
+        self._connection.execute('CREATE TABLE IF NOT EXISTS jobs (id INTEGER PRIMARY KEY, inp TEXT, statistics TEXT, '
+                                 'status TEXT, worker TEXT, lease_until REAL, attempts INTEGER DEFAULT 0, '
+                                 'submitted TEXT, start TEXT, end TEXT, returncode INTEGER, errors TEXT, '
+                                 'wall_time REAL, summary TEXT)')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Close the connection to the database file."""
+        self._connection.close()
+
+    @contextmanager
+    def _transaction(self):
+        """Write transaction, which locks the database for other writers immediately."""
+        self._connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield
+        except BaseException:
+            self._connection.execute('ROLLBACK')
+            raise
+        self._connection.execute('COMMIT')
+
+    def submit(self, inp_fns, statistics=None):
+        """
+        Add jobs to the queue.
+
+        Args:
+            inp_fns (list[str]): paths to the input files (must be accessible for all workers)
+            statistics (dict[str, tuple[str, str, str, str]]): results which the workers extract from the out-files
+                (see :func:`swmm_api.scenarios.extract_statistics`)
+
+        Returns:
+            list[int]: id of every job
+        """
+        statistics = None if statistics is None else json.dumps(statistics)
+        submitted = datetime.now().isoformat(timespec='seconds')
+        ids = []
+        with self._transaction():
+            for inp in inp_fns:
+                cursor = self._connection.execute('INSERT INTO jobs (inp, statistics, status, submitted) '
+                                                  'VALUES (?, ?, ?, ?)', (inp, statistics, STATUS.PENDING, submitted))
+                ids.append(cursor.lastrowid)
+        return ids
+
+    def claim(self, worker, lease=60):
+        """
+        Claim the next pending job or a job with an expired lease.
+
+        Jobs with an expired lease and the maximum number of attempts are marked as failed.
+
+        Args:
+            worker (str): name of the worker
+            lease (float): duration of the lease in seconds
+
+        Returns:
+            tuple[int, str, dict | None] | None: id, path to the input file and statistics of the job
+                or None if no job is available
+        """
+        now = time.time()
+        with self._transaction():
+            self._connection.execute('UPDATE jobs SET status = ?, end = ?, errors = ? '
+                                     'WHERE status = ? AND lease_until < ? AND attempts >= ?',
+                                     (STATUS.FAILED, datetime.now().isoformat(timespec='seconds'),
+                                      f'Lease expired {self.max_attempts} times.', STATUS.RUNNING, now,
+                                      self.max_attempts))
+            row = self._connection.execute('SELECT id, inp, statistics FROM jobs '
+                                           'WHERE status = ? OR (status = ? AND lease_until < ?) ORDER BY id LIMIT 1',
+                                           (STATUS.PENDING, STATUS.RUNNING, now)).fetchone()
+            if row is None:
+                return None
+            job_id, inp, statistics = row
+            self._connection.execute('UPDATE jobs SET status = ?, worker = ?, lease_until = ?, '
+                                     'attempts = attempts + 1, start = ? WHERE id = ?',
+                                     (STATUS.RUNNING, worker, now + lease,
+                                      datetime.now().isoformat(timespec='seconds'), job_id))
+        return job_id, inp, None if statistics is None else json.loads(statistics)
+
+    def heartbeat(self, job_id, worker, lease=60):
+        """
+        Renew the lease of a claimed job.
+
+        Args:
+            job_id (int): id of the job
+            worker (str): name of the worker
+            lease (float): duration of the lease in seconds from now
+
+        Returns:
+            bool: if the worker still holds the lease (False if the lease expired and the job was claimed by another worker)
+        """
+        with self._transaction():
+            cursor = self._connection.execute('UPDATE jobs SET lease_until = ? WHERE id = ? AND worker = ? AND status = ?',
+                                              (time.time() + lease, job_id, worker, STATUS.RUNNING))
+        return cursor.rowcount == 1
+
+    def complete(self, job_id, worker, status, returncode=None, errors=None, wall_time=None, summary=None):
+        """
+        Record the result of a claimed job.
+
+        The result is discarded if the worker lost the lease of the job.
+
+        Args:
+            job_id (int): id of the job
+            worker (str): name of the worker
+            status (str): final state of the job (see :class:`swmm_api.run_batch.STATUS`)
+            returncode (int | None): return code of the SWMM process
+            errors (str | None): error messages of the simulation
+            wall_time (float | None): duration of the simulation in seconds
+            summary (dict | None): extracted results of the simulation
+
+        Returns:
+            bool: if the result was recorded
+        """
+        errors = None if errors is None else errors[-_MAX_ERROR_LENGTH:]
+        summary = None if summary is None else json.dumps(summary)
+        with self._transaction():
+            cursor = self._connection.execute('UPDATE jobs SET status = ?, end = ?, lease_until = NULL, returncode = ?, '
+                                              'errors = ?, wall_time = ?, summary = ? '
+                                              'WHERE id = ? AND worker = ? AND status = ?',
+                                              (status, datetime.now().isoformat(timespec='seconds'), returncode,
+                                               errors, wall_time, summary, job_id, worker, STATUS.RUNNING))
+        return cursor.rowcount == 1
+
+    def counts(self):
+        """
+        Get the number of jobs per state.
+
+        Returns:
+            dict[str, int]: number of jobs per state (see :class:`swmm_api.run_batch.STATUS`)
+        """
+        return dict(self._connection.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall())
+
+    def is_finished(self):
+        """
+        Check if all jobs are done or failed.
+
+        Returns:
+            bool: if no job is pending or running
+        """
+        counts = self.counts()
+        return not (counts.get(STATUS.PENDING, 0) or counts.get(STATUS.RUNNING, 0))
+
+    def wait(self, poll=5):
+        """
+        Wait until all jobs are done or failed.
+
+        Args:
+            poll (float): seconds between the checks
+        """
+        while not self.is_finished():
+            time.sleep(poll)
+
+    def to_frame(self):
+        """
+        Get the records of all jobs as table.
+
+        The extracted results of the jobs are expanded to columns.
+
+        Returns:
+            pandas.DataFrame: one row per job
+        """
+        rows = self._connection.execute(f'SELECT {", ".join(self._COLUMNS)} FROM jobs').fetchall()
+        frame = DataFrame(rows, columns=self._COLUMNS).set_index('id')
+        summaries = DataFrame.from_dict({job_id: json.loads(summary) for job_id, summary in frame.pop('summary').items()
+                                         if summary is not None}, orient='index')
+        return frame.drop(columns=['statistics']).join(summaries)
+
+
+def run_worker(filename, worker=None, lease=60, heartbeat=None, poll=5, exit_when_empty=True, rpt_dir=None,
+               out_dir=None, swmm_path=None, keep_files=True):
+    """
+    Claim and run the jobs of a queue until the queue is empty.
+
+    The simulation runs in a thread (see :func:`swmm_api.run.swmm5_run`), while the worker renews the lease with
+    heartbeats. The statistics of the job are extracted from the out-file and uploaded to the queue.
+
+    A worker which lost the lease of a job (i.e. because it was suspended) finishes the simulation,
+    but the result is discarded.
+
+    Args:
+        filename (str): path to the database file of the queue (see :class:`WorkQueue`)
+        worker (str): name of the worker. Default: host name, process id and a random suffix.
+        lease (float): duration of the lease in seconds
+        heartbeat (float): seconds between the heartbeats. Default: a third of the lease.
+        poll (float): seconds to wait for new jobs if the queue is empty
+        exit_when_empty (bool): if the worker should stop when no job is pending or running.
+            Otherwise, the worker waits for new jobs until it is killed.
+        rpt_dir (str): directory in which the report-files are written. Default: input-file directory.
+        out_dir (str): directory in which the output-files are written. Default: input-file directory.
+        swmm_path (str): custom path to the command line swmm executable (see :func:`swmm_api.run.swmm5_run`)
+        keep_files (bool): if the report- and output-files of successful jobs should be kept after extracting the
+            statistics (the files of failed jobs are always kept)
+
+    Returns:
+        int: number of jobs completed by this worker
+    """
+    if worker is None:
+        worker = f'{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}'
+    if heartbeat is None:
+        heartbeat = lease / 3
+
+    n_jobs = 0
+    with WorkQueue(filename) as queue:
+        while True:
+            job = queue.claim(worker, lease=lease)
+            if job is None:
+                if exit_when_empty and queue.is_finished():
+                    return n_jobs
+                # jobs of other workers may be released after their lease expired
+                time.sleep(poll)
+                continue
+
+            job_id, inp, statistics = job
+            outcome = {}
+
+            def _simulate():
+                try:
+                    outcome['files'] = swmm5_run(inp, rpt_dir=rpt_dir, out_dir=out_dir, swmm_path=swmm_path)
+                except Exception as e:
+                    outcome['error'] = e
+
+            start = time.perf_counter()
+            thread = threading.Thread(target=_simulate, daemon=True)
+            thread.start()
+            while thread.is_alive():
+                thread.join(heartbeat)
+                if thread.is_alive():
+                    queue.heartbeat(job_id, worker, lease=lease)
+            wall_time = time.perf_counter() - start
+
+            result = {'status': STATUS.DONE, 'returncode': 0, 'wall_time': wall_time}
+            if 'error' in outcome:
+                result.update(status=STATUS.FAILED, returncode=None,
+                              errors=str(outcome['error']) if isinstance(outcome['error'], SWMMRunError)
+                              else ''.join(traceback.format_exception(type(outcome['error']), outcome['error'],
+                                                                   outcome['error'].__traceback__)))
+            else:
+                fn_rpt, fn_out = outcome['files']
+                try:
+                    if statistics:
+                        with SwmmOutput(fn_out) as out:
+                            result['summary'] = extract_statistics(out, statistics)
+                except Exception:
+                    result.update(status=STATUS.FAILED, errors=traceback.format_exc())
+                finally:
+                    if not keep_files:
+                        for fn in (fn_rpt, fn_out):
+                            if os.path.isfile(fn):
+                                os.remove(fn)
+
+            queue.complete(job_id, worker, **result)
+            n_jobs += 1
+
+
+def run_local_workers(filename, processes=4, **kwargs):
+    """
+    Run multiple workers of a queue in parallel processes on this machine until the queue is empty.
+
+    Args:
+        filename (str): path to the database file of the queue (see :class:`WorkQueue`)
+        processes (int): number of workers
+        **kwargs: keyword arguments for :func:`run_worker` (except ``worker``)
+    """
+    workers = [Process(target=run_worker, args=(filename,), kwargs=kwargs, daemon=True) for _ in range(processes)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join()